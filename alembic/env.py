@@ -4,7 +4,7 @@ from sqlalchemy import engine_from_config, pool
 
 from alembic import context
 from movielibrary.models.base import Base
-from settings import settings
+from settings import get_settings
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -23,7 +23,7 @@ target_metadata = Base.metadata
 
 
 def get_url():
-    url = settings.sqlalchemy_url
+    url = get_settings().sqlalchemy_url
     if not url:
         raise ValueError("Не установлена переменная окружения sqlalchemy_url")
     return url
@@ -0,0 +1,48 @@
+"""Create outbox_events table
+
+Revision ID: 34e67c1c9fb7
+Revises: dbfd26b9c9d4
+Create Date: 2026-10-19 10:12:41.308114
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "34e67c1c9fb7"
+down_revision: Union[str, Sequence[str], None] = "dbfd26b9c9d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "outbox_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("event_type", sa.String(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("available_at", sa.DateTime(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column("processed_at", sa.DateTime(), nullable=True),
+        sa.Column("failed_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "idx_outbox_events_pending",
+        "outbox_events",
+        ["available_at"],
+        postgresql_where=sa.text("processed_at IS NULL AND failed_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_outbox_events_pending", table_name="outbox_events")
+    op.drop_table("outbox_events")
@@ -0,0 +1,42 @@
+"""Add ON DELETE CASCADE to film association tables
+
+Revision ID: 5b2f0c8e1a47
+Revises: 34e67c1c9fb7
+Create Date: 2026-10-19 12:03:17.482915
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b2f0c8e1a47"
+down_revision: Union[str, Sequence[str], None] = "34e67c1c9fb7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("film_genre", "film_country")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.drop_constraint(f"{table}_film_id_fkey", table, type_="foreignkey")
+        op.create_foreign_key(
+            f"{table}_film_id_fkey",
+            table,
+            "films",
+            ["film_id"],
+            ["id"],
+            ondelete="CASCADE",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_constraint(f"{table}_film_id_fkey", table, type_="foreignkey")
+        op.create_foreign_key(
+            f"{table}_film_id_fkey", table, "films", ["film_id"], ["id"]
+        )
@@ -0,0 +1,44 @@
+"""Store outbox timestamps with time zone
+
+Revision ID: c3d9e5f71a28
+Revises: f81b3d5c6e02
+Create Date: 2026-10-19 21:04:16.218733
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3d9e5f71a28"
+down_revision: Union[str, Sequence[str], None] = "f81b3d5c6e02"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("created_at", "available_at", "processed_at", "failed_at")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # записанное раньше время — наивное UTC
+    for column in COLUMNS:
+        op.alter_column(
+            "outbox_events",
+            column,
+            type_=sa.DateTime(timezone=True),
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in COLUMNS:
+        op.alter_column(
+            "outbox_events",
+            column,
+            type_=sa.DateTime(),
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+        )
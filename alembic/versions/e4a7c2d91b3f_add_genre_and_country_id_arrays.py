@@ -0,0 +1,101 @@
+"""Add genre_ids and country_ids arrays to films
+
+Revision ID: e4a7c2d91b3f
+Revises: 5b2f0c8e1a47
+Create Date: 2026-10-19 16:40:52.118406
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4a7c2d91b3f"
+down_revision: Union[str, Sequence[str], None] = "5b2f0c8e1a47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# колонка films -> таблица связей и её колонка
+ARRAYS = {
+    "genre_ids": ("film_genre", "genre_id"),
+    "country_ids": ("film_country", "country_id"),
+}
+EVENTS = {
+    "insert": "REFERENCING NEW TABLE AS new_rows",
+    "update": "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "delete": "REFERENCING OLD TABLE AS old_rows",
+}
+
+# Триггеры уровня оператора: массовые операции админки и COPY
+# пересчитывают каждый фильм один раз, а не на каждую строку связи
+SYNC_FUNCTION = """
+CREATE FUNCTION films_sync_{column}() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        {update} (SELECT film_id FROM new_rows);
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        {update} (SELECT film_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+SYNC_UPDATE = (
+    "UPDATE films f SET {column} = coalesce("
+    "(SELECT array_agg(l.{key} ORDER BY l.{key}) FROM {table} l "
+    "WHERE l.film_id = f.id), '{{}}') WHERE f.id IN"
+)
+BACKFILL = """
+UPDATE films f
+SET {column} = l.ids
+FROM (
+    SELECT film_id, array_agg({key} ORDER BY {key}) AS ids
+    FROM {table} GROUP BY film_id
+) l
+WHERE l.film_id = f.id
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column, (table, key) in ARRAYS.items():
+        op.add_column(
+            "films",
+            sa.Column(
+                column,
+                postgresql.ARRAY(sa.Integer()),
+                server_default="{}",
+                nullable=False,
+            ),
+        )
+        op.execute(BACKFILL.format(column=column, table=table, key=key))
+        op.create_index(
+            f"idx_films_{column}", "films", [column], postgresql_using="gin"
+        )
+
+        # в plpgsql таблица перехода, не объявленная у триггера, — ошибка
+        # только при обращении к ней, поэтому функция общая для трёх событий
+        update = SYNC_UPDATE.format(column=column, table=table, key=key)
+        op.execute(SYNC_FUNCTION.format(column=column, update=update))
+        for name, referencing in EVENTS.items():
+            op.execute(
+                f"CREATE TRIGGER {table}_sync_{name} AFTER {name.upper()} ON {table} "
+                f"{referencing} FOR EACH STATEMENT "
+                f"EXECUTE FUNCTION films_sync_{column}()"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column, (table, _) in ARRAYS.items():
+        for name in EVENTS:
+            op.execute(f"DROP TRIGGER {table}_sync_{name} ON {table}")
+        op.execute(f"DROP FUNCTION films_sync_{column}()")
+        op.drop_index(f"idx_films_{column}", table_name="films")
+        op.drop_column("films", column)
@@ -0,0 +1,52 @@
+"""Add version column to films
+
+Revision ID: f81b3d5c6e02
+Revises: e4a7c2d91b3f
+Create Date: 2026-10-19 18:12:07.530914
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f81b3d5c6e02"
+down_revision: Union[str, Sequence[str], None] = "e4a7c2d91b3f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "films",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+    # триггеры film_genre и film_country обновляют genre_ids и country_ids,
+    # поэтому смена жанров и стран тоже увеличивает версию
+    op.execute(
+        """
+        CREATE FUNCTION films_bump_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.version := OLD.version + 1;
+            RETURN NEW;
+        END
+        $$
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER films_bump_version BEFORE UPDATE ON films "
+        "FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) "
+        "EXECUTE FUNCTION films_bump_version()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER films_bump_version ON films")
+    op.execute("DROP FUNCTION films_bump_version()")
+    op.drop_column("films", "version")
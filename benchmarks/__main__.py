@@ -0,0 +1,238 @@
+"""
+Нагрузочные тесты MovieLibrary.
+
+    python -m benchmarks seed --films 100000
+    python -m benchmarks run --url http://127.0.0.1:8002 --films 100000 -o results/base.json
+    python -m benchmarks compare results/base.json results/new.json
+    python -m benchmarks render --films 2000
+    python -m benchmarks imports
+    python -m benchmarks serialize --films 10000
+    python -m benchmarks snapshot --films 100000
+    python -m benchmarks facets --genre Драма --genre Комедия --country США
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.catalog import SyntheticCatalog
+from benchmarks.load import run_load
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def default_dsn() -> str:
+    from settings import get_settings
+
+    return get_settings().postgres_dsn
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def cmd_seed(args: argparse.Namespace) -> None:
+    from benchmarks.seed import seed_catalog
+
+    catalog = SyntheticCatalog(films=args.films, seed=args.seed)
+    counts = asyncio.run(seed_catalog(args.dsn or default_dsn(), catalog))
+    for table, count in counts.items():
+        print(f"{table:>14}: {count}")
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    results = asyncio.run(
+        run_load(
+            args.url,
+            films=args.films,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            warmup=args.warmup,
+            seed=args.seed,
+            only=args.only,
+        )
+    )
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "url": args.url,
+            "films": args.films,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "seed": args.seed,
+        },
+        "routes": {result.name: result.as_dict() for result in results},
+    }
+
+    print(f"{'route':<24}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'err':>6}")
+    for result in results:
+        print(
+            f"{result.name:<24}{result.rps:>9.1f}{result.p50_ms:>9.1f}"
+            f"{result.p95_ms:>9.1f}{result.p99_ms:>9.1f}{result.errors:>6}"
+        )
+
+    output = args.output or RESULTS_DIR / f"{report['meta']['git_revision']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"\nРезультаты сохранены в {output}")
+
+
+def cmd_render(args: argparse.Namespace) -> None:
+    from benchmarks.render import run_render
+
+    results = asyncio.run(run_render(args.films, args.repeat))
+    print(f"{'mode':<10}{'ttfb, ms':>12}{'total, ms':>12}{'loop block, ms':>18}")
+    for mode, row in results.items():
+        print(
+            f"{mode:<10}{row['ttfb_ms']:>12.2f}{row['total_ms']:>12.2f}"
+            f"{row['max_loop_block_ms']:>18.2f}"
+        )
+
+
+def cmd_facets(args: argparse.Namespace) -> None:
+    from benchmarks.facets import run_facets
+
+    results = asyncio.run(
+        run_facets(
+            args.dsn or default_dsn(),
+            args.genre or ["Драма", "Комедия"],
+            args.country,
+            args.repeat,
+        )
+    )
+    print(f"{'query':<24}{'variant':<8}{'p50, ms':>10}{'p95, ms':>10}  plan")
+    for row in results:
+        print(
+            f"{row.query:<24}{row.variant:<8}{row.p50_ms:>10.2f}"
+            f"{row.p95_ms:>10.2f}  {row.plan}"
+        )
+
+
+def cmd_serialize(args: argparse.Namespace) -> None:
+    from benchmarks.serialize import run_serialize
+
+    for mode, ms in run_serialize(args.films, args.repeat).items():
+        print(f"{mode:<20}{ms:>10.2f} ms")
+
+
+def cmd_snapshot(args: argparse.Namespace) -> None:
+    from benchmarks.snapshot import run_snapshot
+
+    print(f"{'list':<24}{'python, ms':>12}{'snapshot, ms':>14}")
+    for name, (python_ms, snapshot_ms) in run_snapshot(args.films, args.repeat).items():
+        print(f"{name:<24}{python_ms:>12.2f}{snapshot_ms:>14.2f}")
+
+
+def cmd_imports(args: argparse.Namespace) -> None:
+    from benchmarks.imports import measure
+
+    timings = measure(repeat=args.repeat)
+    print(f"{'module':<32}{'import, ms':>12}{'budget, ms':>12}")
+    for timing in timings:
+        took = f"{timing.best_ms:.1f}" if timing.error is None else "error"
+        print(f"{timing.target:<32}{took:>12}{timing.budget_ms:>12.0f}")
+        if timing.error:
+            print(f"    {timing.error}")
+    if not all(timing.ok for timing in timings):
+        raise SystemExit(1)
+
+
+def cmd_compare(args: argparse.Namespace) -> None:
+    base = json.loads(args.base.read_text())["routes"]
+    new = json.loads(args.new.read_text())["routes"]
+
+    print(f"{'route':<24}{'rps':>18}{'p95, ms':>22}{'p99, ms':>22}")
+    for name in [name for name in base if name in new]:
+        old_row, new_row = base[name], new[name]
+        cells = []
+        for metric in ("rps", "p95_ms", "p99_ms"):
+            before, after = old_row[metric], new_row[metric]
+            change = (after - before) / before * 100 if before else 0.0
+            cells.append(f"{before:>7.1f}→{after:<7.1f}{change:+5.0f}%")
+        print(f"{name:<24}" + "".join(f"{cell:>22}" for cell in cells))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    seed = sub.add_parser("seed", help="Заполнить базу синтетическим каталогом")
+    seed.add_argument("--films", type=int, default=10_000)
+    seed.add_argument("--seed", type=int, default=42)
+    seed.add_argument("--dsn", help="По умолчанию собирается из .env")
+    seed.set_defaults(func=cmd_seed)
+
+    run = sub.add_parser("run", help="Нагрузить все маршруты и сохранить отчёт")
+    run.add_argument("--url", default="http://127.0.0.1:8002")
+    run.add_argument("--films", type=int, default=10_000)
+    run.add_argument("--concurrency", type=int, default=16)
+    run.add_argument("--duration", type=float, default=10.0)
+    run.add_argument("--warmup", type=float, default=1.0)
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--only", nargs="*", help="Префиксы имён маршрутов")
+    run.add_argument("-o", "--output", type=Path)
+    run.set_defaults(func=cmd_run)
+
+    render = sub.add_parser(
+        "render", help="TTFB и блокировка цикла событий при рендеринге страницы"
+    )
+    render.add_argument("--films", type=int, default=1000)
+    render.add_argument("--repeat", type=int, default=20)
+    render.set_defaults(func=cmd_render)
+
+    facets = sub.add_parser(
+        "facets", help="Фильтры по жанрам и странам: JOIN против массивов"
+    )
+    facets.add_argument(
+        "--genre", action="append", help="Два жанра; по умолчанию Драма и Комедия"
+    )
+    facets.add_argument("--country", default="США")
+    facets.add_argument("--repeat", type=int, default=20)
+    facets.add_argument("--dsn", help="По умолчанию собирается из .env")
+    facets.set_defaults(func=cmd_facets)
+
+    serialize = sub.add_parser(
+        "serialize", help="Сборка тела списка фильмов: сериализация против кэша"
+    )
+    serialize.add_argument("--films", type=int, default=10_000)
+    serialize.add_argument("--repeat", type=int, default=5)
+    serialize.set_defaults(func=cmd_serialize)
+
+    snapshot = sub.add_parser(
+        "snapshot", help="Фильтры списков по снимку каталога против перебора"
+    )
+    snapshot.add_argument("--films", type=int, default=100_000)
+    snapshot.add_argument("--repeat", type=int, default=5)
+    snapshot.set_defaults(func=cmd_snapshot)
+
+    imports = sub.add_parser("imports", help="Время холодного импорта против бюджетов")
+    imports.add_argument("--repeat", type=int, default=3)
+    imports.set_defaults(func=cmd_imports)
+
+    compare = sub.add_parser("compare", help="Сравнить два отчёта")
+    compare.add_argument("base", type=Path)
+    compare.add_argument("new", type=Path)
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
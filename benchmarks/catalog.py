@@ -0,0 +1,172 @@
+import itertools
+import random
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+
+GENRES = [
+    "Драма",
+    "Комедия",
+    "Триллер",
+    "Боевик",
+    "Криминал",
+    "Детектив",
+    "Фантастика",
+    "Мелодрама",
+    "Мультфильм",
+    "Ужасы",
+    "Мистика",
+    "Приключения",
+    "Фэнтези",
+    "Черная комедия",
+    "Биография",
+    "Военный",
+    "История",
+    "Документальный",
+]
+
+COUNTRIES = [
+    "США",
+    "Россия",
+    "Великобритания",
+    "Франция",
+    "Германия",
+    "Италия",
+    "Канада",
+    "Япония",
+    "Южная Корея",
+    "Испания",
+    "Австралия",
+    "Индия",
+    "Китай",
+    "СССР",
+    "Дания",
+    "Швеция",
+    "Норвегия",
+    "Ирландия",
+    "Нидерланды",
+    "Бельгия",
+    "Мексика",
+    "Бразилия",
+    "Аргентина",
+    "Польша",
+    "Новая Зеландия",
+]
+
+ADJECTIVES = [
+    "Тёмный",
+    "Последний",
+    "Тихий",
+    "Бесконечный",
+    "Северный",
+    "Забытый",
+    "Красный",
+    "Ночной",
+    "Железный",
+    "Большой",
+    "Странный",
+    "Чужой",
+    "Золотой",
+    "Далёкий",
+    "Опасный",
+]
+
+NOUNS = [
+    "город",
+    "рассвет",
+    "берег",
+    "поезд",
+    "сад",
+    "шторм",
+    "охотник",
+    "детектив",
+    "остров",
+    "маршрут",
+    "свидетель",
+    "лес",
+    "мост",
+    "код",
+    "горизонт",
+]
+
+SENTENCES = [
+    "Герой оказывается втянут в историю, из которой нет простого выхода.",
+    "Старые друзья встречаются спустя много лет, чтобы закончить начатое.",
+    "Маленький город скрывает тайну, о которой все предпочитают молчать.",
+    "Команда неудачников получает последний шанс всё исправить.",
+    "Одна ночь меняет жизнь нескольких незнакомых людей.",
+    "Расследование приводит детектива к самым влиятельным людям страны.",
+]
+
+SERIES_SHARE = 0.1
+# Относительная частота фильмов с 1, 2 и 3 жанрами (странами)
+LINK_COUNT_WEIGHTS = [6, 3, 1]
+
+GenreRow = Tuple[int, str]
+FilmRow = Tuple[int, str, str, int, str, float, str]
+LinkRow = Tuple[int, int]
+
+
+@dataclass
+class SyntheticCatalog:
+    """
+    Детерминированный генератор синтетического каталога.
+    Популярность жанров и стран убывает по закону Ципфа, как в реальной
+    библиотеке: драм и американских фильмов много, документальных мало.
+    """
+
+    films: int
+    seed: int = 42
+
+    def __post_init__(self):
+        self.genre_weights = [1 / rank for rank in range(1, len(GENRES) + 1)]
+        self.country_weights = [1 / rank for rank in range(1, len(COUNTRIES) + 1)]
+
+    def genres(self) -> List[GenreRow]:
+        return list(enumerate(GENRES, start=1))
+
+    def countries(self) -> List[GenreRow]:
+        return list(enumerate(COUNTRIES, start=1))
+
+    def title(self, rng: random.Random, film_id: int) -> str:
+        title = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"
+        if film_id % 7 == 0:
+            title += f" {film_id % 5 + 2}"
+        return title
+
+    def film_rows(self) -> Iterator[FilmRow]:
+        """Строки таблицы films: (id, title, type, year, description, rating, photo)."""
+        rng = random.Random(self.seed)
+        for film_id in range(1, self.films + 1):
+            is_series = rng.random() < SERIES_SHARE
+            title = self.title(rng, film_id)
+            if is_series:
+                title += " (Сериал)"
+            yield (
+                film_id,
+                title,
+                "series" if is_series else "movie",
+                rng.randint(1950, 2025),
+                " ".join(rng.sample(SENTENCES, 2)),
+                round(rng.uniform(3.0, 9.5), 1),
+                f"film_{film_id}.webp",
+            )
+
+    def _links(self, seed_offset: int, weights: List[float], max_links: int):
+        rng = random.Random(self.seed + seed_offset)
+        ids = list(range(1, len(weights) + 1))
+        cum_weights = list(itertools.accumulate(weights))
+        counts = range(1, max_links + 1)
+        count_weights = LINK_COUNT_WEIGHTS[:max_links]
+        for film_id in range(1, self.films + 1):
+            [count] = rng.choices(counts, weights=count_weights)
+            linked = set()
+            while len(linked) < count:
+                linked.add(rng.choices(ids, cum_weights=cum_weights)[0])
+            for linked_id in sorted(linked):
+                yield film_id, linked_id
+
+    def film_genre_rows(self) -> Iterator[LinkRow]:
+        return self._links(1, self.genre_weights, max_links=3)
+
+    def film_country_rows(self) -> Iterator[LinkRow]:
+        return self._links(2, self.country_weights, max_links=2)
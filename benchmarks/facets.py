@@ -0,0 +1,117 @@
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import asyncpg
+
+from benchmarks.load import percentile
+
+# Запросы страниц жанра и страны и фильтра по нескольким жанрам:
+# как они строились через таблицы связей и как строятся по массивам
+GENRE_ID = "(SELECT id FROM genres WHERE name = $1)"
+COUNTRY_ID = "(SELECT id FROM countries WHERE name = $1)"
+PAGE = "ORDER BY films.id DESC LIMIT 20 OFFSET 100"
+
+QUERIES: Dict[str, Tuple[str, str]] = {
+    "genre count": (
+        "SELECT count(DISTINCT films.id) FROM films "
+        "JOIN film_genre ON film_genre.film_id = films.id "
+        "JOIN genres ON genres.id = film_genre.genre_id WHERE genres.name = $1",
+        f"SELECT count(*) FROM films WHERE genre_ids @> ARRAY[{GENRE_ID}]",
+    ),
+    "genre page": (
+        "SELECT films.id, films.title FROM films "
+        "JOIN film_genre ON film_genre.film_id = films.id "
+        f"JOIN genres ON genres.id = film_genre.genre_id WHERE genres.name = $1 {PAGE}",
+        f"SELECT id, title FROM films WHERE genre_ids @> ARRAY[{GENRE_ID}] {PAGE}",
+    ),
+    "country count": (
+        "SELECT count(DISTINCT films.id) FROM films "
+        "JOIN film_country ON film_country.film_id = films.id "
+        "JOIN countries ON countries.id = film_country.country_id "
+        "WHERE countries.name = $1",
+        f"SELECT count(*) FROM films WHERE country_ids @> ARRAY[{COUNTRY_ID}]",
+    ),
+    "two genres + country": (
+        "SELECT count(*) FROM films WHERE "
+        "EXISTS (SELECT 1 FROM film_genre fg JOIN genres g ON g.id = fg.genre_id "
+        "WHERE fg.film_id = films.id AND g.name = $1) AND "
+        "EXISTS (SELECT 1 FROM film_genre fg JOIN genres g ON g.id = fg.genre_id "
+        "WHERE fg.film_id = films.id AND g.name = $2) AND "
+        "EXISTS (SELECT 1 FROM film_country fc JOIN countries c "
+        "ON c.id = fc.country_id WHERE fc.film_id = films.id AND c.name = $3)",
+        "SELECT count(*) FROM films WHERE genre_ids @> ARRAY["
+        "(SELECT id FROM genres WHERE name = $1), "
+        "(SELECT id FROM genres WHERE name = $2)] "
+        "AND country_ids @> ARRAY[(SELECT id FROM countries WHERE name = $3)]",
+    ),
+}
+
+
+@dataclass
+class PlanTiming:
+    query: str
+    variant: str
+    plan: str
+    p50_ms: float
+    p95_ms: float
+
+
+def plan_nodes(plan: dict) -> List[str]:
+    nodes = [plan["Node Type"]]
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+async def explain(
+    conn: asyncpg.Connection, sql: str, args: Sequence, repeat: int
+) -> Tuple[str, List[float]]:
+    """
+    Returns:
+        Узлы плана через запятую и Execution Time каждого прогона, мс
+    """
+    timings = []
+    nodes: List[str] = []
+    for _ in range(repeat):
+        [result] = await conn.fetchval(
+            f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", *args, column=0
+        )
+        timings.append(result["Execution Time"])
+        nodes = plan_nodes(result["Plan"])
+    # узлы без повторов в порядке появления
+    return ", ".join(dict.fromkeys(nodes)), timings
+
+
+async def run_facets(
+    dsn: str, genres: Sequence[str], country: str, repeat: int
+) -> List[PlanTiming]:
+    """Сравнивает планы и время запросов через JOIN и по массивам."""
+    arguments = {
+        "genre count": [genres[0]],
+        "genre page": [genres[0]],
+        "country count": [country],
+        "two genres + country": [genres[0], genres[1], country],
+    }
+    conn = await asyncpg.connect(dsn)
+    results = []
+    try:
+        await conn.set_type_codec(
+            "json", encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+        )
+        for name, variants in QUERIES.items():
+            for variant, sql in zip(("join", "array"), variants, strict=True):
+                plan, timings = await explain(conn, sql, arguments[name], repeat)
+                timings.sort()
+                results.append(
+                    PlanTiming(
+                        name,
+                        variant,
+                        plan,
+                        round(percentile(timings, 50), 2),
+                        round(percentile(timings, 95), 2),
+                    )
+                )
+    finally:
+        await conn.close()
+    return results
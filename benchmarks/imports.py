@@ -0,0 +1,104 @@
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Бюджеты холодного импорта, мс. Замеряются без .env: импорт не должен
+# читать настройки и открывать соединения, поэтому результат одинаков
+# на машине разработчика и в CI.
+BUDGETS_MS: Dict[str, float] = {
+    "movielibrary.schemas.film": 250,
+    "movielibrary.outbox": 600,
+    "movielibrary.main": 1500,
+    # почти всё время бота — сборка pydantic-моделей aiogram.types
+    "telegrambot:main": 4500,
+}
+
+# Переменные, которые читают Settings и бот: без них видно, что импорт
+# ничего не ждёт от окружения
+SETTINGS_PREFIXES = (
+    "POSTGRES_",
+    "SECRET_KEY",
+    "ALGORITHM",
+    "ACCESS_TOKEN_",
+    "EMAIL",
+    "PASSWORD",
+    "RECEIVER_",
+    "TELEGRAM_",
+    "API_BASE_URL",
+)
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)\s*$")
+
+
+@dataclass
+class ImportTiming:
+    target: str
+    best_ms: Optional[float]
+    budget_ms: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.best_ms <= self.budget_ms
+
+
+def clean_env() -> Dict[str, str]:
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith(SETTINGS_PREFIXES)
+    }
+    env.pop("PYTHONPATH", None)
+    return env
+
+
+def split_target(target: str) -> tuple:
+    """'каталог:модуль' — модуль импортируется из каталога, как при запуске бота."""
+    directory, _, module = target.rpartition(":")
+    return ROOT / directory if directory else ROOT, module
+
+
+def import_time_ms(target: str) -> float:
+    """
+    Один холодный импорт в отдельном интерпретаторе.
+    Returns:
+        Суммарное время импорта модуля с зависимостями, мс
+    Raises:
+        RuntimeError: Если модуль не импортируется
+    """
+    cwd, module = split_target(target)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        env=clean_env(),
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and match.group(2) == module:
+            return int(match.group(1)) / 1000
+    raise RuntimeError(f"{module} нет в выводе -X importtime")
+
+
+def measure(
+    budgets: Dict[str, float] = BUDGETS_MS, repeat: int = 3
+) -> List[ImportTiming]:
+    """Лучший из repeat прогонов: первый прогон прогревает кэш .pyc и диска."""
+    timings = []
+    for target, budget in budgets.items():
+        try:
+            best = min(import_time_ms(target) for _ in range(repeat))
+        except RuntimeError as e:
+            timings.append(ImportTiming(target, None, budget, str(e)))
+        else:
+            timings.append(ImportTiming(target, round(best, 1), budget))
+    return timings
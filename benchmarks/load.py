@@ -0,0 +1,194 @@
+import asyncio
+import math
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.catalog import COUNTRIES, GENRES
+
+SEARCH_TERMS = ["город", "рассвет", "Тёмный", "охотник", "остров", "Последний"]
+
+PathFactory = Callable[[random.Random], str]
+
+
+@dataclass
+class Route:
+    """Маршрут нагрузки: имя для отчёта и генератор конкретных путей."""
+
+    name: str
+    make_path: PathFactory
+
+
+def build_routes(films: int) -> List[Route]:
+    """
+    Все GET-маршруты films.py, filters.py и pages.py с параметрами,
+    выбранными случайно из синтетического каталога.
+    """
+
+    def film_id(rng: random.Random) -> int:
+        return rng.randint(1, films)
+
+    def year(rng: random.Random) -> int:
+        return rng.randint(1950, 2025)
+
+    return [
+        Route("api.films.list", lambda rng: "/api/films"),
+        Route(
+            "api.films.search",
+            lambda rng: f"/api/films/search?q={rng.choice(SEARCH_TERMS)}",
+        ),
+        Route("api.films.statistics", lambda rng: "/api/films/statistics"),
+        Route("api.films.retrieve", lambda rng: f"/api/films/{film_id(rng)}"),
+        Route("api.filters.genres", lambda rng: "/api/filters/genres"),
+        Route("api.filters.countries", lambda rng: "/api/filters/countries"),
+        Route(
+            "api.filters.genre",
+            lambda rng: f"/api/filters/genres/{rng.choice(GENRES)}",
+        ),
+        Route(
+            "api.filters.country",
+            lambda rng: f"/api/filters/countries/{rng.choice(COUNTRIES)}",
+        ),
+        Route("api.filters.year", lambda rng: f"/api/filters/years/{year(rng)}"),
+        Route("api.filters.series", lambda rng: "/api/filters/series"),
+        Route("pages.index", lambda rng: "/"),
+        Route("pages.series", lambda rng: f"/series?page={rng.randint(1, 20)}"),
+        Route(
+            "pages.search",
+            lambda rng: (
+                f"/search?q={rng.choice(SEARCH_TERMS)}&page={rng.randint(1, 5)}"
+            ),
+        ),
+        Route(
+            "pages.genre",
+            lambda rng: f"/genres/{rng.choice(GENRES)}?page={rng.randint(1, 20)}",
+        ),
+        Route(
+            "pages.country",
+            lambda rng: f"/countries/{rng.choice(COUNTRIES)}?page={rng.randint(1, 20)}",
+        ),
+        Route("pages.year", lambda rng: f"/years/{year(rng)}"),
+        Route("pages.film", lambda rng: f"/film/{film_id(rng)}"),
+        Route("pages.login_form", lambda rng: "/login"),
+        Route("pages.register_form", lambda rng: "/register"),
+        Route("pages.account", lambda rng: "/account"),
+    ]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Перцентиль по методу ближайшего ранга для уже отсортированных значений."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class RouteResult:
+    name: str
+    requests: int = 0
+    errors: int = 0
+    duration: float = 0.0
+    rps: float = 0.0
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+    p99_ms: float = 0.0
+    max_ms: float = 0.0
+    status_codes: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_samples(
+        cls,
+        name: str,
+        latencies: List[float],
+        statuses: List[int],
+        duration: float,
+    ) -> "RouteResult":
+        latencies = sorted(latencies)
+        codes: Dict[str, int] = {}
+        for status in statuses:
+            codes[str(status)] = codes.get(str(status), 0) + 1
+        return cls(
+            name=name,
+            requests=len(statuses),
+            errors=sum(1 for status in statuses if status == 0 or status >= 500),
+            duration=round(duration, 3),
+            rps=round(len(statuses) / duration, 1) if duration else 0.0,
+            p50_ms=round(percentile(latencies, 50) * 1000, 2),
+            p95_ms=round(percentile(latencies, 95) * 1000, 2),
+            p99_ms=round(percentile(latencies, 99) * 1000, 2),
+            max_ms=round((latencies[-1] if latencies else 0) * 1000, 2),
+            status_codes=codes,
+        )
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+async def run_route(
+    client: httpx.AsyncClient,
+    route: Route,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    seed: int,
+) -> RouteResult:
+    """
+    Нагружает один маршрут фиксированным числом параллельных клиентов:
+    каждый отправляет следующий запрос сразу после ответа на предыдущий.
+    """
+    latencies: List[float] = []
+    statuses: List[int] = []
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+
+    async def worker(worker_id: int) -> None:
+        rng = random.Random(seed * 1000 + worker_id)
+        while True:
+            sent = time.perf_counter()
+            if sent >= deadline:
+                return
+            try:
+                response = await client.get(route.make_path(rng))
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            done = time.perf_counter()
+            if sent >= measure_from:
+                latencies.append(done - sent)
+                statuses.append(status)
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return RouteResult.from_samples(route.name, latencies, statuses, duration)
+
+
+async def run_load(
+    base_url: str,
+    films: int,
+    concurrency: int,
+    duration: float,
+    warmup: float = 1.0,
+    seed: int = 42,
+    only: Optional[List[str]] = None,
+) -> List[RouteResult]:
+    routes = [
+        route
+        for route in build_routes(films)
+        if not only or any(route.name.startswith(prefix) for prefix in only)
+    ]
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=30, follow_redirects=False
+    ) as client:
+        results = []
+        for route in routes:
+            results.append(
+                await run_route(client, route, concurrency, duration, warmup, seed)
+            )
+        return results
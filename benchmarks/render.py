@@ -0,0 +1,112 @@
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+from typing import AsyncIterator, Callable, Dict, List
+
+from benchmarks.catalog import SyntheticCatalog
+
+TEMPLATES_DIR = "movielibrary/templates"
+# Шаг, с которым фоновая задача проверяет, не заблокирован ли цикл событий
+TICK = 0.001
+
+BodyFactory = Callable[[], AsyncIterator[bytes]]
+
+
+def page_context(films: int) -> dict:
+    """Контекст index.html с карточками синтетических фильмов."""
+    catalog = SyntheticCatalog(films=films)
+    cards = [
+        SimpleNamespace(
+            id=row[0], title=row[1], year=row[3], rating=row[5], photo=row[6]
+        )
+        for row in catalog.film_rows()
+    ]
+    return {
+        "request": SimpleNamespace(query_params={}),
+        "films": cards,
+        "genres": [SimpleNamespace(name=name) for _, name in catalog.genres()],
+        "page": 1,
+        "total_pages": 1,
+        "user_email": None,
+    }
+
+
+def body_factories(films: int) -> Dict[str, BodyFactory]:
+    from fastapi.templating import Jinja2Templates
+
+    from movielibrary import templating
+    from movielibrary.images import poster_srcset, poster_url
+
+    globals_ = {"poster_url": poster_url, "poster_srcset": poster_srcset}
+    context = page_context(films)
+
+    classic = Jinja2Templates(directory=TEMPLATES_DIR)
+    classic.env.globals.update(globals_)
+    streaming = templating.StreamingTemplates(TEMPLATES_DIR)
+    streaming.env.globals.update(globals_)
+
+    async def full_render() -> AsyncIterator[bytes]:
+        yield classic.get_template("index.html").render(context).encode()
+
+    def streamed(threaded: bool) -> BodyFactory:
+        def factory() -> AsyncIterator[bytes]:
+            threshold = templating.THREAD_RENDER_THRESHOLD
+            templating.THREAD_RENDER_THRESHOLD = -1 if threaded else films + 1
+            try:
+                return streaming.TemplateResponse("index.html", context).body_iterator
+            finally:
+                templating.THREAD_RENDER_THRESHOLD = threshold
+
+        return factory
+
+    return {
+        "full": full_render,
+        "stream": streamed(threaded=False),
+        "thread": streamed(threaded=True),
+    }
+
+
+async def measure(make_body: BodyFactory, repeat: int) -> Dict[str, float]:
+    """
+    TTFB и полное время рендеринга страницы, а также максимальная задержка
+    фоновой задачи — столько цикл событий не мог обслуживать другие запросы.
+    """
+    lags: List[float] = []
+    running = True
+
+    async def ticker() -> None:
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - started - TICK)
+
+    monitor = asyncio.create_task(ticker())
+    ttfb: List[float] = []
+    total: List[float] = []
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            first = None
+            async for _chunk in make_body():
+                if first is None:
+                    first = time.perf_counter() - started
+            total.append(time.perf_counter() - started)
+            ttfb.append(first or 0.0)
+            await asyncio.sleep(TICK * 2)
+    finally:
+        running = False
+        await monitor
+
+    return {
+        "ttfb_ms": round(statistics.median(ttfb) * 1000, 2),
+        "total_ms": round(statistics.median(total) * 1000, 2),
+        "max_loop_block_ms": round(max(lags, default=0.0) * 1000, 2),
+    }
+
+
+async def run_render(films: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    return {
+        name: await measure(factory, repeat)
+        for name, factory in body_factories(films).items()
+    }
@@ -0,0 +1,62 @@
+import logging
+import time
+
+import asyncpg
+
+from benchmarks.catalog import SyntheticCatalog
+
+logger = logging.getLogger(__name__)
+
+TABLES = ["film_genre", "film_country", "films", "genres", "countries"]
+
+
+async def seed_catalog(dsn: str, catalog: SyntheticCatalog) -> dict[str, int]:
+    """
+    Заменяет каталог в базе синтетическим через COPY.
+    Схема должна быть создана миграциями alembic; пользователи не затрагиваются.
+    Returns:
+        Число загруженных строк по таблицам
+    """
+    conn = await asyncpg.connect(dsn)
+    counts: dict[str, int] = {}
+    try:
+        async with conn.transaction():
+            await conn.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY")
+
+            sources = [
+                ("genres", ["id", "name"], catalog.genres()),
+                ("countries", ["id", "name"], catalog.countries()),
+                (
+                    "films",
+                    ["id", "title", "type", "year", "description", "rating", "photo"],
+                    catalog.film_rows(),
+                ),
+                ("film_genre", ["film_id", "genre_id"], catalog.film_genre_rows()),
+                (
+                    "film_country",
+                    ["film_id", "country_id"],
+                    catalog.film_country_rows(),
+                ),
+            ]
+            for table, columns, records in sources:
+                started = time.perf_counter()
+                status = await conn.copy_records_to_table(
+                    table, records=records, columns=columns
+                )
+                counts[table] = int(status.split()[-1])
+                logger.info(
+                    "%s: %d rows in %.1fs",
+                    table,
+                    counts[table],
+                    time.perf_counter() - started,
+                )
+
+            for table in ("films", "genres", "countries"):
+                await conn.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT coalesce(max(id), 1) FROM {table}))"
+                )
+        await conn.execute("ANALYZE")
+    finally:
+        await conn.close()
+    return counts
@@ -0,0 +1,71 @@
+import asyncio
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.catalog import SyntheticCatalog
+
+
+def synthetic_films(films: int) -> List:
+    """ORM-объекты Film с жанрами и странами, как после загрузки из базы."""
+    from movielibrary.models import Country, Film, FilmCountry, FilmGenre, Genre
+
+    catalog = SyntheticCatalog(films=films)
+    genres = {key: Genre(id=key, name=name) for key, name in catalog.genres()}
+    countries = {key: Country(id=key, name=name) for key, name in catalog.countries()}
+    by_id = {}
+    for row in catalog.film_rows():
+        film_id, title, type_, year, description, rating, photo = row
+        by_id[film_id] = Film(
+            id=film_id,
+            title=title,
+            type=type_,
+            year=year,
+            description=description,
+            rating=rating,
+            photo=photo,
+            version=1,
+        )
+    for film_id, genre_id in catalog.film_genre_rows():
+        by_id[film_id].genres.append(FilmGenre(genre=genres[genre_id]))
+    for film_id, country_id in catalog.film_country_rows():
+        by_id[film_id].countries.append(FilmCountry(country=countries[country_id]))
+    return list(by_id.values())
+
+
+def median_ms(run: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 2)
+
+
+def run_serialize(films: int, repeat: int) -> Dict[str, float]:
+    """
+    Время сборки тела полного списка фильмов: валидация и JSONResponse
+    для каждого фильма против склейки фрагментов из film_json_cache
+    (все фильмы в кэше, база не нужна).
+    """
+    from fastapi.responses import JSONResponse
+
+    from movielibrary.cache import film_json_cache
+    from movielibrary.projections import FILM_FIELDS, dump_films, film_json, films_json
+
+    objects = synthetic_films(films)
+    film_json_cache.max_entries = max(film_json_cache.max_entries, films)
+    for film in objects:
+        film_json_cache.put(film.id, film.version, film_json(film))
+    rows = [(film.id, film.version) for film in objects]
+
+    def cached() -> bytes:
+        return asyncio.run(films_json(None, rows))
+
+    assert cached() == JSONResponse(dump_films(objects, FILM_FIELDS)).body
+    return {
+        "validate + encode": median_ms(
+            lambda: JSONResponse(dump_films(objects, FILM_FIELDS)), repeat
+        ),
+        "cached fragments": median_ms(cached, repeat),
+    }
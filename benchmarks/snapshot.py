@@ -0,0 +1,92 @@
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from benchmarks.catalog import SyntheticCatalog
+from benchmarks.serialize import median_ms
+
+PAGE = 20
+
+
+def catalog_rows(films: int) -> Tuple[List[tuple], Dict[str, int], Dict[str, int]]:
+    """Строки снимка синтетического каталога и справочники жанров и стран."""
+    catalog = SyntheticCatalog(films=films)
+    genre_ids: Dict[int, List[int]] = defaultdict(list)
+    country_ids: Dict[int, List[int]] = defaultdict(list)
+    for film_id, genre_id in catalog.film_genre_rows():
+        genre_ids[film_id].append(genre_id)
+    for film_id, country_id in catalog.film_country_rows():
+        country_ids[film_id].append(country_id)
+    rows = [
+        (film_id, 1, year, rating, type_, genre_ids[film_id], country_ids[film_id])
+        for film_id, _, type_, year, _, rating, _ in catalog.film_rows()
+    ]
+    genres = {name: key for key, name in catalog.genres()}
+    countries = {name: key for key, name in catalog.countries()}
+    return rows, genres, countries
+
+
+def python_select(rows, flt, genres, countries, sort) -> List[int]:
+    """Тот же фильтр и сортировка перебором строк — точка отсчёта."""
+    wanted_genres = {genres.get(name) for name in flt.genres}
+    wanted_countries = {countries.get(name) for name in flt.countries}
+    found = [
+        row
+        for row in rows
+        if (flt.year_from is None or row[2] >= flt.year_from)
+        and (flt.year_to is None or row[2] <= flt.year_to)
+        and (flt.rating_from is None or row[3] >= flt.rating_from)
+        and (flt.rating_to is None or row[3] <= flt.rating_to)
+        and (flt.type is None or row[4] == flt.type)
+        and wanted_genres <= set(row[5])
+        and wanted_countries <= set(row[6])
+    ]
+    if sort == "rating":
+        found.sort(key=lambda row: (row[3], row[0]), reverse=True)
+    else:
+        found.sort(key=lambda row: row[0], reverse=True)
+    return [row[0] for row in found[:PAGE]]
+
+
+def run_snapshot(films: int, repeat: int) -> Dict[str, Tuple[float, float]]:
+    """
+    Первая страница списков по снимку каталога против перебора тех же
+    строк в Python; результаты обоих способов сверяются.
+
+    Returns:
+        Медианное время (перебор, снимок) в мс по каждому списку
+    """
+    from movielibrary.facets import SORT_NEWEST, SORT_RATING, FilmFilter
+    from movielibrary.models.enums import MediaType
+    from movielibrary.snapshot import Snapshot
+
+    rows, genres, countries = catalog_rows(films)
+    snapshot = Snapshot.build(1, rows, genres, countries)
+    first_genre, second_genre = sorted(genres)[:2]
+    first_country = sorted(countries)[0]
+    lists = {
+        "genre, newest": (FilmFilter(genres=(first_genre,)), SORT_NEWEST),
+        "2 genres + country": (
+            FilmFilter(genres=(first_genre, second_genre), countries=(first_country,)),
+            SORT_NEWEST,
+        ),
+        "years, by rating": (FilmFilter(year_from=1990, year_to=2010), SORT_RATING),
+        "movies, by rating": (FilmFilter(type=MediaType.movie), SORT_RATING),
+    }
+    results = {}
+    for name, (flt, sort) in lists.items():
+        expected = python_select(rows, flt, genres, countries, sort)
+        keys = snapshot.select(flt, sort, None, PAGE)
+        assert [key.id for key in keys] == expected, name
+        results[name] = (
+            median_ms(
+                lambda flt=flt, sort=sort: python_select(
+                    rows, flt, genres, countries, sort
+                ),
+                repeat,
+            ),
+            median_ms(
+                lambda flt=flt, sort=sort: snapshot.select(flt, sort, None, PAGE),
+                repeat,
+            ),
+        )
+    return results
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Set
 
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
@@ -10,16 +10,22 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from movielibrary.database import get_db
 from movielibrary.models import User
-from settings import settings
-
-SECRET_KEY = settings.secret_key
-ALGORITHM = settings.algorithm
-ACCESS_TOKEN_EXPIRE_MINUTES = int(settings.access_token_expire_minutes)
+from movielibrary.tracing import span
+from settings import Settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
 
 
+def admin_emails(settings: Settings) -> Set[str]:
+    """Email администраторов из ADMIN_EMAILS в нижнем регистре."""
+    return {
+        email.strip().lower()
+        for email in settings.admin_emails.split(",")
+        if email.strip()
+    }
+
+
 def get_password_hash(password: str) -> str:
     """Хэширует пароль с использованием sha256_crypt.
     Args:
@@ -27,7 +33,8 @@ def get_password_hash(password: str) -> str:
     Returns:
         Хэшированный пароль
     """
-    return pwd_context.hash(password)
+    with span("bcrypt hash"):
+        return pwd_context.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -38,7 +45,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True если пароль верный, False если неверный
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    with span("bcrypt verify"):
+        return pwd_context.verify(plain_password, hashed_password)
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
@@ -54,31 +62,37 @@ async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     return result.scalar_one_or_none()
 
 
-def create_access_token(email: str) -> str:
+def create_access_token(email: str, settings: Settings) -> str:
     """
     Создает JWT токен доступа для пользователя.
     Args:
         email: Email пользователя
+        settings: Настройки приложения с ключом и сроком жизни токена
     Returns:
         Закодированный JWT токен
     """
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = datetime.utcnow() + timedelta(
+        minutes=int(settings.access_token_expire_minutes)
+    )
     data = {"sub": email, "exp": expire, "type": "access"}
-    return jwt.encode(data, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(data, settings.secret_key, algorithm=settings.algorithm)
 
 
-def decode_access_token(token: str) -> str:
+def decode_access_token(token: str, settings: Settings) -> str:
     """
     Декодирует JWT токен доступа и возвращает email пользователя.
     Args:
         token: JWT токен для декодирования
+        settings: Настройки приложения с ключом и алгоритмом подписи
     Returns:
         Email пользователя из токена
     Raises:
         HTTPException: Если токен недействителен, просрочен или имеет неверный тип
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(
+            token, settings.secret_key, algorithms=[settings.algorithm]
+        )
         if payload.get("type") != "access":
             raise JWTError("Invalid token type")
         email: Optional[str] = payload.get("sub")
@@ -93,6 +107,24 @@ def decode_access_token(token: str) -> str:
         ) from None
 
 
+def is_admin_token(token: Optional[str], settings: Settings) -> bool:
+    """
+    Проверяет токен без обращения к базе, например в middleware.
+    Args:
+        token: JWT токен доступа или None
+        settings: Настройки приложения
+    Returns:
+        True если токен действителен и его email указан в ADMIN_EMAILS
+    """
+    if not token:
+        return False
+    try:
+        email = decode_access_token(token, settings)
+    except HTTPException:
+        return False
+    return email.lower() in admin_emails(settings)
+
+
 def get_token_from_request(request: Request) -> Optional[str]:
     """
     Извлекает токен доступа из cookies запроса.
@@ -123,14 +155,15 @@ async def get_current_user_required(
     Raises:
         HTTPException: 401 если токен отсутствует, недействителен или пользователь не найден
     """
-    token = get_token_from_request(request)
-    if not token:
-        raise HTTPException(status_code=401, detail="Требуется авторизация")
-    email = decode_access_token(token)
-    user = await get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(status_code=401, detail="Пользователь не найден")
-    return user
+    with span("auth current_user", **{"auth.required": True}):
+        token = get_token_from_request(request)
+        if not token:
+            raise HTTPException(status_code=401, detail="Требуется авторизация")
+        email = decode_access_token(token, request.app.state.settings)
+        user = await get_user_by_email(db, email)
+        if not user:
+            raise HTTPException(status_code=401, detail="Пользователь не найден")
+        return user
 
 
 async def get_current_user_optional(
@@ -147,12 +180,34 @@ async def get_current_user_optional(
     Returns:
         Объект User если авторизация успешна, иначе None
     """
-    token = get_token_from_request(request)
-    if not token:
-        return None
-    try:
-        email = decode_access_token(token)
-    except HTTPException:
-        return None
-    user = await get_user_by_email(db, email)
+    with span("auth current_user", **{"auth.required": False}):
+        token = get_token_from_request(request)
+        if not token:
+            return None
+        try:
+            email = decode_access_token(token, request.app.state.settings)
+        except HTTPException:
+            return None
+        user = await get_user_by_email(db, email)
+        return user
+
+
+async def get_current_admin(
+    request: Request,
+    user: User = Depends(get_current_user_required),
+) -> User:
+    """
+    Зависимость для административных маршрутов.
+    Args:
+        request: HTTP запрос
+        user: Авторизованный пользователь
+    Returns:
+        Объект User, если его email указан в ADMIN_EMAILS
+    Raises:
+        HTTPException: 403 если у пользователя нет прав администратора
+    """
+    if user.email.lower() not in admin_emails(request.app.state.settings):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав"
+        )
     return user
@@ -0,0 +1,486 @@
+"""
+Резервное копирование каталога через COPY (FORMAT binary).
+
+    python -m movielibrary.backup dump dumps/2026-10-19
+    python -m movielibrary.backup dump dumps/2026-10-20 --since-id 1250
+    python -m movielibrary.backup restore dumps/2026-10-19
+    python -m movielibrary.backup restore dumps/2026-10-20
+
+Каждая таблица выгружается отдельным соединением из общего снимка
+(pg_export_snapshot), сжимается gzip и сопровождается sha256 в manifest.json.
+Схема в базе должна быть создана миграциями той же ревизии, что и дамп.
+Перед полной загрузкой определения удаляемых индексов и ограничений
+сохраняются в recreate_schema.sql в каталоге дампа.
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+
+import asyncpg
+
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+# SQL для ручного восстановления индексов и ограничений, если полная
+# загрузка прервалась вместе с процессом
+RECOVERY_SCRIPT = "recreate_schema.sql"
+CHUNK_SIZE = 1024 * 1024
+COMPRESS_LEVEL = 3
+
+TABLES = ["genres", "countries", "users", "films", "film_genre", "film_country"]
+# Таблицы, которые в инкрементальном дампе выгружаются по films.id
+FILM_KEYS = {"films": "id", "film_genre": "film_id", "film_country": "film_id"}
+# Таблицы со связями на другие таблицы дампа загружаются после них,
+# если ограничения не удаляются на время загрузки
+DEPENDENT_TABLES = {"film_genre", "film_country"}
+# Триггеры этих таблиц пересчитывают films.genre_ids и country_ids;
+# в полном дампе массивы уже есть, а фильмы при параллельной загрузке
+# могут появиться позже связей
+SYNC_TRIGGER_TABLES = ("film_genre", "film_country")
+
+
+@dataclass
+class TableDump:
+    table: str
+    file: str
+    columns: List[str]
+    rows: int
+    bytes: int
+    sha256: str
+
+
+class GzipSink:
+    """Сжимает поток COPY в gzip-файл и считает sha256 сжатых данных."""
+
+    def __init__(self, path: Path):
+        self._file = path.open("wb")
+        self._compressor = zlib.compressobj(
+            COMPRESS_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+        self._hash = hashlib.sha256()
+        self.bytes = 0
+
+    def _emit(self, data: bytes) -> None:
+        self._hash.update(data)
+        self._file.write(data)
+        self.bytes += len(data)
+
+    def write(self, chunk: bytes) -> None:
+        self._emit(self._compressor.compress(chunk))
+
+    def close(self) -> str:
+        """Дописывает хвост gzip и возвращает sha256 файла."""
+        self._emit(self._compressor.flush())
+        self._file.close()
+        return self._hash.hexdigest()
+
+
+async def read_chunks(path: Path) -> AsyncIterator[bytes]:
+    """Читает gzip-файл порциями; распаковка идёт в потоке, не блокируя цикл."""
+    with gzip.open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, CHUNK_SIZE):
+            yield chunk
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def verify_checksums(directory: Path, manifest: dict) -> None:
+    """
+    Проверяет sha256 всех файлов дампа параллельно.
+    Raises:
+        ValueError: Если файл повреждён
+    """
+    tables = manifest["tables"]
+    digests = await asyncio.gather(
+        *(asyncio.to_thread(file_sha256, directory / t["file"]) for t in tables)
+    )
+    for table, digest in zip(tables, digests, strict=True):
+        if digest != table["sha256"]:
+            raise ValueError(f"Контрольная сумма {table['file']} не совпадает")
+
+
+def copy_status_rows(status: str) -> int:
+    return int(status.split()[-1])
+
+
+async def table_columns(conn: asyncpg.Connection, table: str) -> List[str]:
+    rows = await conn.fetch(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = 'public' AND table_name = $1 ORDER BY ordinal_position",
+        table,
+    )
+    return [row["column_name"] for row in rows]
+
+
+async def dump_table(
+    dsn: str,
+    snapshot: str,
+    directory: Path,
+    table: str,
+    columns: List[str],
+    since_id: Optional[int],
+) -> TableDump:
+    query = f"SELECT {', '.join(columns)} FROM {table}"
+    if since_id is not None and table in FILM_KEYS:
+        query += f" WHERE {FILM_KEYS[table]} > {int(since_id)}"
+
+    file = f"{table}.copy.gz"
+    sink = GzipSink(directory / file)
+    conn = await asyncpg.connect(dsn)
+    try:
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            await conn.execute(f"SET TRANSACTION SNAPSHOT '{snapshot}'")
+
+            async def write(chunk: bytes) -> None:
+                await asyncio.to_thread(sink.write, chunk)
+
+            status = await conn.copy_from_query(query, output=write, format="binary")
+    finally:
+        await conn.close()
+        digest = await asyncio.to_thread(sink.close)
+    return TableDump(table, file, columns, copy_status_rows(status), sink.bytes, digest)
+
+
+async def dump(
+    dsn: str, directory: Path, jobs: int, since_id: Optional[int] = None
+) -> dict:
+    """
+    Выгружает таблицы каталога параллельно из одного согласованного снимка.
+    Args:
+        dsn: Строка подключения к Postgres
+        directory: Каталог для файлов дампа
+        jobs: Число одновременных соединений
+        since_id: Для инкрементального дампа — выгружать только фильмы с id больше
+    Returns:
+        Содержимое manifest.json
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    coordinator = await asyncpg.connect(dsn)
+    try:
+        # снимок живёт, пока открыта транзакция координатора
+        tr = coordinator.transaction(isolation="repeatable_read", readonly=True)
+        await tr.start()
+        snapshot = await coordinator.fetchval("SELECT pg_export_snapshot()")
+        revision = await coordinator.fetchval("SELECT version_num FROM alembic_version")
+        max_film_id = await coordinator.fetchval("SELECT max(id) FROM films")
+        columns = {table: await table_columns(coordinator, table) for table in TABLES}
+
+        slots = asyncio.Semaphore(jobs)
+
+        async def run(table: str) -> TableDump:
+            async with slots:
+                result = await dump_table(
+                    dsn, snapshot, directory, table, columns[table], since_id
+                )
+                logger.info("%s: %d rows, %d bytes", table, result.rows, result.bytes)
+                return result
+
+        dumps = await asyncio.gather(*(run(table) for table in TABLES))
+        await tr.rollback()
+    finally:
+        await coordinator.close()
+
+    manifest = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "alembic_revision": revision,
+        "since_id": since_id,
+        "max_film_id": max_film_id,
+        "tables": [asdict(d) for d in dumps],
+    }
+    (directory / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    logger.info("Dump finished in %.1fs", time.perf_counter() - started)
+    return manifest
+
+
+async def schema_objects(conn: asyncpg.Connection, tables: Sequence[str]) -> dict:
+    """
+    Определения вторичных индексов, уникальных и внешних ключей таблиц.
+    Первичные ключи остаются на месте: без них загрузка не ускоряется заметно,
+    а ON CONFLICT в инкрементальном режиме на них опирается.
+    """
+    constraints = await conn.fetch(
+        "SELECT conrelid::regclass::text AS relation, conname AS name, contype AS type, "
+        "pg_get_constraintdef(oid) AS definition FROM pg_constraint "
+        "WHERE contype IN ('f', 'u') AND conrelid = ANY($1::regclass[])",
+        list(tables),
+    )
+    indexes = await conn.fetch(
+        "SELECT indexrelid::regclass::text AS name, "
+        "pg_get_indexdef(indexrelid) AS definition FROM pg_index i "
+        "WHERE indrelid = ANY($1::regclass[]) AND NOT indisprimary "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)",
+        list(tables),
+    )
+    return {
+        "foreign_keys": [dict(r) for r in constraints if r["type"] == "f"],
+        "unique": [dict(r) for r in constraints if r["type"] == "u"],
+        "indexes": [dict(r) for r in indexes],
+    }
+
+
+async def run_parallel(dsn: str, jobs: int, statements: Sequence[str]) -> None:
+    slots = asyncio.Semaphore(jobs)
+
+    async def run(statement: str) -> None:
+        async with slots:
+            conn = await asyncpg.connect(dsn)
+            try:
+                await conn.execute(statement)
+            finally:
+                await conn.close()
+
+    await asyncio.gather(*(run(statement) for statement in statements))
+
+
+async def load_table(dsn: str, directory: Path, table: dict, incremental: bool) -> int:
+    conn = await asyncpg.connect(dsn)
+    try:
+        source = read_chunks(directory / table["file"])
+        if not incremental:
+            status = await conn.copy_to_table(
+                table["table"], source=source, columns=table["columns"], format="binary"
+            )
+            return copy_status_rows(status)
+
+        # строки, которые уже есть в базе, пропускаются
+        async with conn.transaction():
+            staging = f"restore_{table['table']}"
+            await conn.execute(
+                f"CREATE TEMP TABLE {staging} "
+                f"(LIKE {table['table']} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            await conn.copy_to_table(
+                staging, source=source, columns=table["columns"], format="binary"
+            )
+            columns = ", ".join(table["columns"])
+            status = await conn.execute(
+                f"INSERT INTO {table['table']} ({columns}) "
+                f"SELECT {columns} FROM {staging} ON CONFLICT DO NOTHING"
+            )
+            return copy_status_rows(status)
+    finally:
+        await conn.close()
+
+
+async def load_tables(
+    dsn: str, directory: Path, manifest: dict, jobs: int
+) -> Dict[str, int]:
+    incremental = manifest["since_id"] is not None
+    slots = asyncio.Semaphore(jobs)
+
+    async def run(table: dict) -> int:
+        async with slots:
+            rows = await load_table(dsn, directory, table, incremental)
+            logger.info("%s: %d rows", table["table"], rows)
+            return rows
+
+    # без удалённых внешних ключей связи грузятся после фильмов и справочников
+    groups = [manifest["tables"]]
+    if incremental:
+        groups = [
+            [t for t in manifest["tables"] if t["table"] not in DEPENDENT_TABLES],
+            [t for t in manifest["tables"] if t["table"] in DEPENDENT_TABLES],
+        ]
+    counts: Dict[str, int] = {}
+    for group in groups:
+        rows = await asyncio.gather(*(run(table) for table in group))
+        counts.update(zip((t["table"] for t in group), rows, strict=True))
+    return counts
+
+
+async def set_sync_triggers(conn: asyncpg.Connection, enabled: bool) -> None:
+    """Включает или отключает пользовательские триггеры таблиц связей."""
+    action = "ENABLE" if enabled else "DISABLE"
+    for table in SYNC_TRIGGER_TABLES:
+        await conn.execute(f"ALTER TABLE {table} {action} TRIGGER USER")
+
+
+async def reset_sequences(conn: asyncpg.Connection, tables: Sequence[str]) -> None:
+    for table in tables:
+        sequence = await conn.fetchval("SELECT pg_get_serial_sequence($1, 'id')", table)
+        if sequence:
+            await conn.execute(
+                f"SELECT setval('{sequence}', coalesce(max(id), 1), max(id) IS NOT NULL) "
+                f"FROM {table}"
+            )
+
+
+def recreate_statements(objects: dict) -> List[List[str]]:
+    """
+    Группы SQL для возврата удалённых объектов схемы: индексы и уникальные
+    ограничения можно создавать параллельно, внешние ключи — после них.
+    """
+    return [
+        [index["definition"] for index in objects["indexes"]]
+        + [
+            f'ALTER TABLE {unique["relation"]} ADD CONSTRAINT "{unique["name"]}" '
+            f"{unique['definition']}"
+            for unique in objects["unique"]
+        ],
+        [
+            f'ALTER TABLE {fk["relation"]} ADD CONSTRAINT "{fk["name"]}" '
+            f"{fk['definition']}"
+            for fk in objects["foreign_keys"]
+        ],
+    ]
+
+
+def write_recovery_script(directory: Path, objects: dict) -> Path:
+    """Сохраняет SQL возврата объектов схемы до того, как они будут удалены."""
+    statements = [
+        statement for group in recreate_statements(objects) for statement in group
+    ]
+    statements += [f"ALTER TABLE {t} ENABLE TRIGGER USER" for t in SYNC_TRIGGER_TABLES]
+    path = directory / RECOVERY_SCRIPT
+    path.write_text("".join(f"{statement};\n" for statement in statements))
+    return path
+
+
+async def drop_schema_objects(
+    conn: asyncpg.Connection, objects: dict, tables: Sequence[str]
+) -> None:
+    async with conn.transaction():
+        for fk in objects["foreign_keys"]:
+            await conn.execute(
+                f'ALTER TABLE {fk["relation"]} DROP CONSTRAINT "{fk["name"]}"'
+            )
+        for unique in objects["unique"]:
+            await conn.execute(
+                f'ALTER TABLE {unique["relation"]} DROP CONSTRAINT "{unique["name"]}"'
+            )
+        for index in objects["indexes"]:
+            await conn.execute(f"DROP INDEX {index['name']}")
+        await conn.execute(f"TRUNCATE {', '.join(tables)}")
+
+
+async def recreate_schema_objects(dsn: str, jobs: int, objects: dict) -> None:
+    for group in recreate_statements(objects):
+        await run_parallel(dsn, jobs, group)
+
+
+async def load_full(
+    conn: asyncpg.Connection,
+    dsn: str,
+    directory: Path,
+    manifest: dict,
+    jobs: int,
+    tables: Sequence[str],
+) -> Dict[str, int]:
+    """
+    Полная загрузка без вторичных индексов, ограничений и триггеров связей.
+    Если загрузка не удалась, частично загруженные таблицы очищаются,
+    а индексы и ограничения всё равно создаются заново: схема не остаётся
+    без них. Если не удалось и это, SQL для ручного восстановления лежит
+    в RECOVERY_SCRIPT рядом с дампом.
+    """
+    objects = await schema_objects(conn, tables)
+    script = write_recovery_script(directory, objects)
+    logger.info("Schema recovery script: %s", script)
+    await drop_schema_objects(conn, objects, tables)
+
+    await set_sync_triggers(conn, enabled=False)
+    try:
+        counts = await load_tables(dsn, directory, manifest, jobs)
+    except BaseException:
+        logger.error("Restore failed, truncating partially loaded tables")
+        await conn.execute(f"TRUNCATE {', '.join(tables)}")
+        raise
+    finally:
+        await set_sync_triggers(conn, enabled=True)
+        try:
+            await recreate_schema_objects(dsn, jobs, objects)
+        except Exception:
+            logger.error("Could not recreate indexes and constraints, run %s", script)
+            raise
+    return counts
+
+
+async def restore(dsn: str, directory: Path, jobs: int) -> Dict[str, int]:
+    """
+    Загружает дамп в базу.
+    Полный дамп заменяет данные: таблицы очищаются, вторичные индексы
+    и ограничения удаляются, все таблицы грузятся параллельно, затем индексы
+    и ограничения создаются заново. Инкрементальный дамп дописывается
+    к существующим данным, индексы при этом не трогаются. При полной
+    загрузке отключаются и триггеры таблиц связей: массивы films.genre_ids
+    и country_ids приходят из дампа готовыми. Инкрементальный дамп грузит
+    связи после фильмов, и триггеры пересчитывают массивы по ходу загрузки.
+    Returns:
+        Число загруженных строк по таблицам
+    Raises:
+        ValueError: Если дамп повреждён или снят с другой ревизии схемы
+    """
+    manifest = json.loads((directory / MANIFEST).read_text())
+    await verify_checksums(directory, manifest)
+    incremental = manifest["since_id"] is not None
+    tables = [table["table"] for table in manifest["tables"]]
+    started = time.perf_counter()
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        revision = await conn.fetchval("SELECT version_num FROM alembic_version")
+        if revision != manifest["alembic_revision"]:
+            raise ValueError(
+                f"Дамп снят с ревизии {manifest['alembic_revision']}, "
+                f"а схема базы — {revision}"
+            )
+
+        if incremental:
+            counts = await load_tables(dsn, directory, manifest, jobs)
+        else:
+            counts = await load_full(conn, dsn, directory, manifest, jobs, tables)
+
+        await reset_sequences(conn, tables)
+        await conn.execute(f"ANALYZE {', '.join(tables)}")
+    finally:
+        await conn.close()
+    logger.info("Restore finished in %.1fs", time.perf_counter() - started)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m movielibrary.backup")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    dump_parser = sub.add_parser("dump", help="Выгрузить каталог")
+    dump_parser.add_argument("directory", type=Path)
+    dump_parser.add_argument(
+        "--since-id", type=int, help="Инкрементальный дамп: фильмы с id больше"
+    )
+    restore_parser = sub.add_parser("restore", help="Загрузить дамп")
+    restore_parser.add_argument("directory", type=Path)
+    for p in (dump_parser, restore_parser):
+        p.add_argument("--jobs", type=int, default=4, help="Параллельных соединений")
+        p.add_argument("--dsn", default=None, help="По умолчанию собирается из .env")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    dsn = args.dsn or get_settings().postgres_dsn
+    if args.command == "dump":
+        manifest = asyncio.run(dump(dsn, args.directory, args.jobs, args.since_id))
+        print(f"max_film_id={manifest['max_film_id']}")
+    else:
+        asyncio.run(restore(dsn, args.directory, args.jobs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from movielibrary.cache import apply_change, catalog_versions
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "catalog_changed"
+# id в уведомлении о массовом изменении: затронутые записи не перечисляются
+ALL = "*"
+
+# Как часто проверять, что LISTEN-соединение живо, секунды
+KEEPALIVE_INTERVAL = 30
+MAX_RECONNECT_DELAY = 30
+
+
+@dataclass(frozen=True)
+class CatalogChange:
+    """
+    Уведомление '<entity>:<id>:<version>[:<action>]',
+    version — txid изменившей транзакции, action — created/updated/deleted.
+    """
+
+    entity: str
+    entity_id: Optional[int]
+    version: int
+    action: str = "updated"
+
+    @classmethod
+    def parse(cls, payload: str) -> "CatalogChange":
+        """
+        Raises:
+            ValueError: Если payload не в формате '<entity>:<id>:<version>[:<action>]'
+        """
+        parts = payload.split(":")
+        if len(parts) not in (3, 4):
+            raise ValueError(f"Некорректное уведомление: {payload}")
+        entity, entity_id, version, *action = parts
+        return cls(
+            entity=entity,
+            entity_id=None if entity_id == ALL else int(entity_id),
+            version=int(version),
+            action=action[0] if action else "updated",
+        )
+
+
+# None вместо изменения означает, что часть уведомлений могла быть пропущена
+ChangeHandler = Callable[[Optional[CatalogChange]], None]
+
+
+async def publish_change(
+    db: AsyncSession,
+    entity: str,
+    entity_id: Optional[int] = None,
+    action: str = "updated",
+) -> None:
+    """
+    Ставит уведомление catalog_changed в текущую транзакцию.
+    Postgres доставит его слушателям только после commit, а при rollback
+    уведомление пропадёт вместе с изменениями.
+    Args:
+        db: Асинхронная сессия базы данных
+        entity: Тип изменённой записи
+        entity_id: id записи; None для массовых изменений
+        action: created, updated или deleted
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    prefix = f"{entity}:{ALL if entity_id is None else entity_id}:"
+    await db.execute(
+        text("SELECT pg_notify(:channel, :prefix || txid_current() || :suffix)"),
+        {"channel": CHANNEL, "prefix": prefix, "suffix": f":{action}"},
+    )
+
+
+def invalidate_local_caches(change: Optional[CatalogChange]) -> None:
+    if change is None:
+        catalog_versions.flush()
+    else:
+        apply_change(change.entity, change.entity_id)
+
+
+class CatalogListener:
+    """
+    Держит отдельное asyncpg-соединение с LISTEN catalog_changed и передаёт
+    уведомления подписчикам. После разрыва переподключается с растущей
+    задержкой; всё, что пришло бы за время разрыва, потеряно, поэтому
+    подписчики получают None и сбрасывают кэши целиком.
+    """
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._handlers: List[ChangeHandler] = []
+        self._task: Optional[asyncio.Task] = None
+        self._conn: Optional[asyncpg.Connection] = None
+
+    def subscribe(self, handler: ChangeHandler) -> None:
+        self._handlers.append(handler)
+
+    def _dispatch(self, change: Optional[CatalogChange]) -> None:
+        for handler in self._handlers:
+            try:
+                handler(change)
+            except Exception:
+                logger.exception("Catalog change handler failed")
+
+    def _on_notification(self, conn, pid, channel, payload: str) -> None:
+        try:
+            change = CatalogChange.parse(payload)
+        except ValueError:
+            logger.warning("Malformed catalog notification: %r", payload)
+            change = None
+        self._dispatch(change)
+
+    async def _listen(self) -> None:
+        lost = asyncio.Event()
+        self._conn = await asyncpg.connect(self.dsn)
+        self._conn.add_termination_listener(lambda conn: lost.set())
+        await self._conn.add_listener(CHANNEL, self._on_notification)
+        # пока соединения не было, уведомления не доставлялись
+        self._dispatch(None)
+        logger.info("Listening for %s", CHANNEL)
+        while not lost.is_set():
+            try:
+                await asyncio.wait_for(lost.wait(), timeout=KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                await self._conn.execute("SELECT 1")
+
+    async def _run(self) -> None:
+        delay = 1
+        while True:
+            try:
+                await self._listen()
+                delay = 1
+            except (
+                OSError,
+                asyncpg.PostgresError,
+                asyncpg.InterfaceError,
+                asyncio.TimeoutError,
+            ) as e:
+                logger.warning("Catalog listener disconnected: %r", e)
+            finally:
+                await self._close_connection()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _close_connection(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            await conn.close()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,344 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from typing import (
+    Any,
+    AsyncContextManager,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Пространства версий: любые изменения каталога и агрегаты статистики
+CATALOG = "catalog"
+STATISTICS = "statistics"
+# Сущности, изменения которых рассылаются через catalog_changed
+FILM = "film"
+
+
+Version = Union[int, Tuple[int, int]]
+
+# Сколько изменённых записей каталога помнит CatalogVersions
+MAX_ENTITY_VERSIONS = 100_000
+
+
+class CatalogVersions:
+    """
+    Счётчики версий данных каталога.
+    Кэши хранят значения вместе с версией, при которой они посчитаны;
+    после изменения данных версия увеличивается, и старые записи
+    перестают совпадать без явной инвалидации.
+    """
+
+    def __init__(self, max_entities: int = MAX_ENTITY_VERSIONS):
+        self.max_entities = max_entities
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._entities: "OrderedDict[Tuple[str, Hashable], int]" = OrderedDict()
+        # версия записей, изменения которых забыты или не было вовсе
+        self._floor = 0
+        self._clock = 0
+        self._flushes = 0
+
+    def get(self, name: str) -> int:
+        return self._versions[name]
+
+    @property
+    def generation(self) -> int:
+        """Номер полного сброса; меняется только во flush."""
+        return self._flushes
+
+    def entity(self, entity: str, entity_id: Hashable) -> Tuple[int, int]:
+        """Версия отдельной записи; меняется при её изменении и при полном сбросе."""
+        return self._flushes, self._entities.get((entity, entity_id), self._floor)
+
+    def bump(self, *names: str) -> Dict[str, int]:
+        """
+        Увеличивает версии один раз, сколько бы строк ни затронуло изменение.
+        Returns:
+            Новые значения версий
+        """
+        for name in names:
+            self._versions[name] += 1
+        return {name: self._versions[name] for name in names}
+
+    def invalidate(self, entity: str, entity_id: Hashable) -> None:
+        """
+        Отмечает изменение одной записи каталога. Когда изменённых записей
+        больше max_entities, самые давние изменения забываются до половины
+        лимита, а _floor поднимается до последней забытой версии: записи
+        кэшей, посчитанные раньше, перестают совпадать, и устаревшие
+        значения не оживают.
+        """
+        self._clock += 1
+        key = (entity, entity_id)
+        self._entities.pop(key, None)
+        self._entities[key] = self._clock
+        if len(self._entities) > self.max_entities:
+            while len(self._entities) > self.max_entities // 2:
+                _, self._floor = self._entities.popitem(last=False)
+        self.bump(CATALOG, STATISTICS)
+
+    def flush(self) -> None:
+        """Сбрасывает все кэши, когда неизвестно, что именно изменилось."""
+        self._flushes += 1
+        self._entities.clear()
+        self._floor = 0
+        self.bump(*{*self._versions, CATALOG, STATISTICS})
+
+
+class VersionedCache:
+    """Кэш значений, действительных только для определённой версии данных."""
+
+    def __init__(self, versions: CatalogVersions, name: str):
+        self.versions = versions
+        self.name = name
+        self._entries: Dict[Hashable, Tuple[Version, Any]] = {}
+
+    def version(self, key: Hashable = None) -> Version:
+        return self.versions.get(self.name)
+
+    def get(self, key: Hashable = None) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != self.version(key):
+            return None
+        return entry[1]
+
+    def put(
+        self, value: Any, key: Hashable = None, version: Optional[Version] = None
+    ) -> Any:
+        """
+        Сохраняет значение. version — версия, прочитанная до начала расчёта:
+        если данные успели измениться, запись сразу окажется устаревшей.
+        """
+        if version is None:
+            version = self.version(key)
+        self._entries[key] = (version, value)
+        return value
+
+
+class EntityCache(VersionedCache):
+    """
+    Кэш отдельных записей (например, фильма по id): изменение одной записи
+    не сбрасывает остальные. Давно не запрашивавшиеся записи вытесняются.
+    """
+
+    def __init__(self, versions: CatalogVersions, name: str, max_entries: int = 10_000):
+        super().__init__(versions, name)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Version, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def version(self, key: Hashable = None) -> Version:
+        return self.versions.entity(self.name, key)
+
+    def get(self, key: Hashable = None) -> Optional[Any]:
+        value = super().get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(
+        self, value: Any, key: Hashable = None, version: Optional[Version] = None
+    ) -> Any:
+        super().put(value, key, version)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+
+class FilmJsonCache:
+    """
+    Готовые JSON-представления фильмов (FilmRead) в байтах, по одному на
+    фильм, с версией films.version. Версию увеличивает триггер базы при
+    любом изменении фильма, в том числе его жанров и стран, поэтому
+    запись проверяется по версии из того же запроса, что и список id,
+    и межпроцессная инвалидация не нужна. Полный сброс каталога (flush)
+    делает записи недействительными: так учитываются переименования
+    жанров и стран. Давно не запрашивавшиеся фильмы вытесняются.
+    """
+
+    def __init__(self, versions: CatalogVersions, max_entries: int = 50_000):
+        self.versions = versions
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[Tuple[int, int], bytes]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, film_id: int, version: int) -> Optional[bytes]:
+        entry = self._entries.get(film_id)
+        if entry is None or entry[0] != (self.versions.generation, version):
+            return None
+        self._entries.move_to_end(film_id)
+        return entry[1]
+
+    def put(
+        self,
+        film_id: int,
+        version: int,
+        body: bytes,
+        generation: Optional[int] = None,
+    ) -> bytes:
+        """
+        generation — номер сброса, прочитанный до загрузки фильма:
+        если каталог успели сбросить, запись сразу окажется устаревшей.
+        """
+        if generation is None:
+            generation = self.versions.generation
+        self._entries[film_id] = ((generation, version), body)
+        self._entries.move_to_end(film_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return body
+
+
+Loader = Callable[[AsyncSession], Awaitable[Any]]
+Sessions = Callable[[], AsyncContextManager[AsyncSession]]
+
+# Ошибки, при которых вместо ответа 500 отдаётся последнее известное значение
+UNAVAILABLE = (
+    OSError,
+    asyncio.TimeoutError,
+    exc.OperationalError,
+    exc.InterfaceError,
+    exc.TimeoutError,
+)
+
+
+def query_key(name: str, **params: Any) -> Hashable:
+    """Ключ запроса, не зависящий от порядка параметров."""
+    return name, tuple(sorted(params.items()))
+
+
+class HotReadCache(VersionedCache):
+    """
+    Кэш популярных чтений с объединением одновременных загрузок.
+    Пока значение грузится, остальные запросы с тем же ключом ждут ту же
+    задачу, а не повторяют запросы к базе. Значение старше ttl отдаётся
+    как есть, а обновляется в фоне (stale-while-revalidate); после
+    изменения каталога запросы ждут свежую загрузку. Если база недоступна,
+    отдаётся последнее загруженное значение, даже устаревшее.
+    Загрузки идут в собственной сессии из sessions: фоновое обновление
+    переживает запрос, который его начал. Фабрику сессий задаёт
+    приложение при создании (configure_hot_reads).
+    """
+
+    def __init__(
+        self,
+        versions: CatalogVersions,
+        name: str,
+        ttl: float = 30.0,
+        max_stale: float = 300.0,
+        max_entries: int = 1000,
+        sessions: Optional[Sessions] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(versions, name)
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.sessions = sessions
+        self.clock = clock
+        self._loaded_at: Dict[Hashable, float] = {}
+        self._inflight: Dict[Tuple[Hashable, Version], asyncio.Task] = {}
+
+    def put(
+        self, value: Any, key: Hashable = None, version: Optional[Version] = None
+    ) -> Any:
+        # при переполнении вытесняется запись, обновлявшаяся раньше всех
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.max_entries:
+            oldest = next(iter(self._entries))
+            del self._entries[oldest]
+            self._loaded_at.pop(oldest, None)
+        self._loaded_at[key] = self.clock()
+        return super().put(value, key, version)
+
+    async def load(self, key: Hashable, loader: Loader) -> Any:
+        """
+        Returns:
+            Значение из кэша или результат loader(db)
+        Raises:
+            Ошибку загрузки, если подменить её нечем
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == self.version(key):
+            age = self.clock() - self._loaded_at[key]
+            if age < self.ttl:
+                return entry[1]
+            if age < self.max_stale:
+                self._refresh(key, loader)
+                return entry[1]
+        try:
+            # shield: отмена одного запроса не прерывает загрузку для остальных
+            return await asyncio.shield(self._refresh(key, loader))
+        except UNAVAILABLE:
+            if entry is None:
+                raise
+            logger.warning("Serving stale %s %r: database unavailable", self.name, key)
+            return entry[1]
+
+    def _refresh(self, key: Hashable, loader: Loader) -> asyncio.Task:
+        # версия в ключе: после изменения каталога не присоединяемся
+        # к загрузке, начатой до него
+        version = self.version(key)
+        flight = (key, version)
+        task = self._inflight.get(flight)
+        if task is None:
+            task = asyncio.create_task(self._run(key, version, loader))
+            self._inflight[flight] = task
+            task.add_done_callback(lambda done: self._finish(flight, done))
+        return task
+
+    async def _run(self, key: Hashable, version: Version, loader: Loader) -> Any:
+        async with self.sessions() as db:
+            value = await loader(db)
+        return self.put(value, key, version)
+
+    def _finish(self, flight: Tuple[Hashable, Version], task: asyncio.Task) -> None:
+        self._inflight.pop(flight, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(
+                "Loading %s %r failed: %r", self.name, flight[0], task.exception()
+            )
+
+
+catalog_versions = CatalogVersions()
+
+
+def apply_change(entity: str, entity_id: Optional[int]) -> None:
+    """
+    Применяет изменение к локальным кэшам процесса.
+    entity_id=None означает массовое изменение: сбрасывается всё.
+    """
+    if entity_id is None:
+        catalog_versions.flush()
+    else:
+        catalog_versions.invalidate(entity, entity_id)
+
+
+statistics_cache = HotReadCache(catalog_versions, STATISTICS)
+# Страницы каталога: главная, списки по жанрам, меню жанров
+catalog_reads = HotReadCache(catalog_versions, CATALOG)
+film_cache = EntityCache(catalog_versions, FILM)
+film_json_cache = FilmJsonCache(catalog_versions)
+
+
+def configure_hot_reads(ttl: float, max_stale: float, sessions: Sessions) -> None:
+    for cache in (statistics_cache, catalog_reads):
+        cache.ttl = ttl
+        cache.max_stale = max_stale
+        cache.sessions = sessions
@@ -1,29 +1,57 @@
-from typing import AsyncGenerator
+from functools import cached_property
+from typing import AsyncGenerator, Callable, List
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from starlette.requests import Request
 
-from settings import settings
+from settings import Settings
 
-DATABASE_URL = settings.database_url
-DB_POOL_SIZE = int(settings.db_pool_size)
-DB_MAX_OVERFLOW = int(settings.db_max_overflow)
+EngineHook = Callable[[AsyncEngine], None]
 
-async_engine = create_async_engine(
-    DATABASE_URL,
-    pool_size=DB_POOL_SIZE,
-    max_overflow=DB_MAX_OVERFLOW,
-)
 
-AsyncSessionLocal = async_sessionmaker(
-    bind=async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,
-)
+class Database:
+    """
+    Движок и фабрика сессий, создаются при первом обращении.
+    Хуки on_engine (журнал медленных запросов, трассировка) подключаются
+    к движку сразу после создания.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.on_engine: List[EngineHook] = []
+
+    @cached_property
+    def engine(self) -> AsyncEngine:
+        engine = create_async_engine(
+            self.settings.database_url,
+            pool_size=int(self.settings.db_pool_size),
+            max_overflow=int(self.settings.db_max_overflow),
+        )
+        for hook in self.on_engine:
+            hook(engine)
+        return engine
+
+    @cached_property
+    def sessions(self) -> async_sessionmaker[AsyncSession]:
+        return async_sessionmaker(
+            bind=self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autoflush=False,
+        )
+
+    async def dispose(self) -> None:
+        if "engine" in self.__dict__:
+            await self.engine.dispose()
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with AsyncSessionLocal() as db:
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with request.app.state.database.sessions() as db:
         try:
             yield db
         finally:
@@ -0,0 +1,70 @@
+import hashlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class ETagMiddleware:
+    """
+    Добавляет ETag к JSON-ответам GET-запросов API и отвечает 304 Not Modified,
+    если клиент прислал совпадающий If-None-Match.
+    Потоковые ответы (из нескольких частей тела) пропускаются без изменений.
+    """
+
+    def __init__(self, app: ASGIApp, prefix: str = "/api"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].startswith(self.prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start_message: Message | None = None
+        passthrough = False
+
+        async def send_with_etag(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] != 200
+                    or "etag" in headers
+                    or headers.get("content-type", "").startswith("text/event-stream")
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if message.get("more_body", False):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["ETag"] = etag
+
+            if if_none_match == etag:
+                del headers["content-length"]
+                await send({**start_message, "status": 304})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+from sqlalchemy import Boolean, ColumnElement, bindparam, select
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.visitors import InternalTraversal
+
+from movielibrary.models import Country, Film, Genre
+from movielibrary.models.enums import MediaType
+from movielibrary.models.film import IntArray
+
+# Порядок списков: сначала новые (по id) или по рейтингу
+SORT_NEWEST = "newest"
+SORT_RATING = "rating"
+
+
+class AnyOf(ColumnElement[bool]):
+    """
+    column = ANY(:ids) с одним параметром-массивом: текст запроса
+    не зависит от числа id, и подготовленный запрос переиспользуется.
+    """
+
+    inherit_cache = True
+    type = Boolean()
+    _traverse_internals = [
+        ("column", InternalTraversal.dp_clauseelement),
+        ("ids", InternalTraversal.dp_clauseelement),
+    ]
+
+    def __init__(self, column: ColumnElement, ids: Iterable[int]):
+        self.column = column
+        self.ids = bindparam(None, list(ids), type_=IntArray)
+
+
+@compiles(AnyOf)
+def _compile_any_of(element: AnyOf, compiler, **kw) -> str:
+    column = compiler.process(element.column, **kw)
+    return f"{column} = ANY({compiler.process(element.ids, **kw)})"
+
+
+@compiles(AnyOf, "sqlite")
+def _compile_any_of_sqlite(element: AnyOf, compiler, **kw) -> str:
+    # в тестах на SQLite массив передаётся JSON-строкой
+    column = compiler.process(element.column, **kw)
+    return f"{column} IN (SELECT value FROM json_each({compiler.process(element.ids, **kw)}))"
+
+
+def any_of(column: ColumnElement, ids: Iterable[int]) -> ColumnElement[bool]:
+    return AnyOf(column, ids)
+
+
+def ids_array(model: Union[Type[Genre], Type[Country]], names: Sequence[str]):
+    """
+    ARRAY[(SELECT id ...), ...] по названиям. Неизвестное название даёт
+    NULL в массиве, и @> с ним не выполняется ни для одного фильма.
+    """
+    return array(
+        [select(model.id).where(model.name == name).scalar_subquery() for name in names]
+    )
+
+
+def has_genres(*names: str) -> ColumnElement[bool]:
+    """
+    Фильм относится ко всем жанрам: films.genre_ids @> ARRAY[...].
+    Условие по одной таблице обслуживает GIN-индекс idx_films_genre_ids,
+    а счётчикам не нужен DISTINCT.
+    """
+    return Film.genre_ids.contains(ids_array(Genre, names))
+
+
+def has_countries(*names: str) -> ColumnElement[bool]:
+    """Фильм снят во всех странах: films.country_ids @> ARRAY[...]."""
+    return Film.country_ids.contains(ids_array(Country, names))
+
+
+@dataclass(frozen=True)
+class FilmFilter:
+    """
+    Условия выборки фильмов для списков. Одни и те же условия
+    проверяет SQL (criteria) и колоночный снимок каталога.
+    """
+
+    genres: Tuple[str, ...] = ()
+    countries: Tuple[str, ...] = ()
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    rating_from: Optional[float] = None
+    rating_to: Optional[float] = None
+    type: Optional[MediaType] = None
+
+    def criteria(self) -> List[ColumnElement[bool]]:
+        criteria = []
+        if self.genres:
+            criteria.append(has_genres(*self.genres))
+        if self.countries:
+            criteria.append(has_countries(*self.countries))
+        if self.year_from is not None:
+            criteria.append(Film.year >= self.year_from)
+        if self.year_to is not None:
+            criteria.append(Film.year <= self.year_to)
+        if self.rating_from is not None:
+            criteria.append(Film.rating >= self.rating_from)
+        if self.rating_to is not None:
+            criteria.append(Film.rating <= self.rating_to)
+        if self.type is not None:
+            criteria.append(Film.type == self.type)
+        return criteria
@@ -0,0 +1,205 @@
+import hashlib
+import os
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+
+from PIL import Image, ImageOps, features
+
+# Ширина варианта постера в пикселях. Высота считается по пропорциям оригинала.
+POSTER_VARIANTS: dict[str, int] = {
+    "card": 300,
+    "card@2x": 600,
+    "details": 450,
+    "details@2x": 900,
+}
+
+# Пары "1x / 2x" для srcset в шаблонах
+POSTER_SRCSET: dict[str, tuple[str, str]] = {
+    "card": ("card", "card@2x"),
+    "details": ("details", "details@2x"),
+}
+
+POSTER_MEDIA_TYPES: dict[str, str] = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+}
+
+# Воркер пересчитывает размер дискового кэша после записи такой доли лимита
+RESCAN_FRACTION = 16
+
+# Увеличивается при изменении алгоритма ресайза, чтобы старые файлы не отдавались
+RENDER_VERSION = 1
+
+POSTER_QUALITY = {"avif": 55, "webp": 80}
+
+
+def supported_formats() -> list[str]:
+    """
+    Возвращает форматы вариантов, которые умеет кодировать установленный Pillow,
+    в порядке предпочтения.
+    """
+    return [fmt for fmt in ("avif", "webp") if features.check(fmt)]
+
+
+def choose_format(accept: str) -> str:
+    """
+    Выбирает формат варианта по заголовку Accept.
+    Args:
+        accept: Значение заголовка Accept запроса
+    Returns:
+        "avif", если клиент и Pillow его поддерживают, иначе "webp"
+    """
+    if "image/avif" in accept and "avif" in supported_formats():
+        return "avif"
+    return "webp"
+
+
+def render_variant(source: bytes, width: int, fmt: str) -> bytes:
+    """
+    Уменьшает постер до заданной ширины и кодирует его в WebP/AVIF.
+    Выполняется в пуле процессов, поэтому не должна зависеть от состояния приложения.
+    Args:
+        source: Байты оригинального изображения
+        width: Целевая ширина в пикселях
+        fmt: "webp" или "avif"
+    Returns:
+        Байты закодированного варианта
+    """
+    with Image.open(BytesIO(source)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+        output = BytesIO()
+        image.save(output, format=fmt.upper(), quality=POSTER_QUALITY[fmt])
+    return output.getvalue()
+
+
+def poster_url(photo: str, variant: str) -> str:
+    """
+    URL варианта постера, который отдаёт роутер /posters.
+    """
+    return f"/posters/{variant}/{quote(photo)}"
+
+
+def poster_srcset(photo: str, variant: str) -> str:
+    """
+    Значение атрибута srcset с вариантами постера для обычных и плотных экранов.
+    """
+    one_x, two_x = POSTER_SRCSET[variant]
+    return f"{poster_url(photo, one_x)} 1x, {poster_url(photo, two_x)} 2x"
+
+
+def variant_key(photo: str, variant: str, fmt: str) -> str:
+    """
+    Ключ варианта в кэше: хэш от имени оригинала и параметров преобразования.
+    """
+    raw = f"{photo}|{POSTER_VARIANTS[variant]}|{fmt}|{RENDER_VERSION}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def touch(path: Path) -> None:
+    """
+    Ставит mtime по точным часам: время записи, которое ставит ядро,
+    огрублено до тика, и файлы одной миллисекунды неразличимы для LRU.
+    """
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+
+class PosterCache:
+    """
+    Дисковый кэш вариантов постеров с адресацией по хэшу и ограничением размера.
+    Кэш общий для всех воркеров: индексом служит сам каталог, а временем
+    последнего обращения — mtime файла, который обновляет get. Размер
+    пересчитывается по каталогу, когда воркер превысил лимит по своей оценке
+    или записал очередную 1/RESCAN_FRACTION лимита; тогда удаляются давно
+    не запрашивавшиеся файлы (LRU). Между пересчётами каталог может
+    превысить лимит не больше чем на число воркеров × лимит / RESCAN_FRACTION.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._written_bytes = 0
+        self._lock = threading.Lock()
+        self._total_bytes = self._evict()
+
+    @property
+    def total_bytes(self) -> int:
+        """Размер кэша на момент последнего пересчёта плюс записи этого воркера."""
+        return self._total_bytes
+
+    def path_for(self, key: str, fmt: str) -> Path:
+        return self.directory / key[:2] / f"{key}.{fmt}"
+
+    def get(self, key: str, fmt: str) -> Optional[Path]:
+        """
+        Возвращает путь к закэшированному варианту и помечает его как использованный.
+        Находит и файлы, записанные другими воркерами.
+        """
+        path = self.path_for(key, fmt)
+        try:
+            touch(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, fmt: str, data: bytes) -> Path:
+        """
+        Атомарно записывает вариант на диск и вытесняет старые файлы сверх лимита.
+        """
+        path = self.path_for(key, fmt)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        touch(path)
+
+        with self._lock:
+            self._total_bytes += len(data)
+            self._written_bytes += len(data)
+            if (
+                self._total_bytes > self.max_bytes
+                or self._written_bytes * RESCAN_FRACTION >= self.max_bytes
+            ):
+                self._total_bytes = self._evict()
+                self._written_bytes = 0
+        return path
+
+    def _scan(self) -> list[tuple[float, Path, int]]:
+        files = []
+        for path in self.directory.glob("*/*"):
+            if path.suffix.lstrip(".") not in POSTER_MEDIA_TYPES:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # файл удалил другой воркер
+                continue
+            files.append((stat.st_mtime, path, stat.st_size))
+        return sorted(files)
+
+    def _evict(self) -> int:
+        """
+        Удаляет самые старые по mtime файлы, пока каталог больше лимита.
+        Returns:
+            Размер оставшихся файлов в байтах
+        """
+        if not self.directory.exists():
+            return 0
+        files = self._scan()
+        total = sum(size for _, _, size in files)
+        for _, path, size in files[:-1]:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        return total
@@ -0,0 +1,125 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Union
+
+from fastapi import Request, Response
+from sqlalchemy import desc, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from movielibrary.facets import SORT_RATING, FilmFilter, any_of
+from movielibrary.models import Film
+from movielibrary.pagination import (
+    decode_cursor,
+    decode_rating_cursor,
+    encode_cursor,
+    encode_rating_cursor,
+)
+from movielibrary.projections import (
+    FILM_FIELDS,
+    Fields,
+    dump_films,
+    film_query,
+    film_versions_query,
+    films_json,
+)
+
+if TYPE_CHECKING:
+    from movielibrary.snapshot import CatalogSnapshot
+
+
+def catalog_snapshot(request: Request) -> Optional["CatalogSnapshot"]:
+    """Зависимость: снимок каталога, если он включён (CATALOG_SNAPSHOT)."""
+    return request.app.state.snapshot
+
+
+def next_cursor(row: Any, sort: str) -> str:
+    if sort == SORT_RATING:
+        return encode_rating_cursor(row.rating, row.id)
+    return encode_cursor(row.id)
+
+
+async def select_rows(
+    db: AsyncSession,
+    flt: FilmFilter,
+    fields: Fields,
+    sort: str,
+    cursor: Optional[str],
+    limit: Optional[int],
+) -> Sequence[Any]:
+    """
+    Выбирает фильмы страницы в базе: для полной проекции — только id,
+    версии и рейтинги, для остальных — сами фильмы с нужными колонками.
+    """
+    full = fields == FILM_FIELDS
+    stmt = film_versions_query() if full else film_query(fields, Film.rating)
+    stmt = stmt.filter(*flt.criteria())
+    if sort == SORT_RATING:
+        stmt = stmt.order_by(desc(Film.rating), desc(Film.id))
+        if cursor:
+            stmt = stmt.filter(
+                tuple_(Film.rating, Film.id) < tuple_(*decode_rating_cursor(cursor))
+            )
+    else:
+        stmt = stmt.order_by(desc(Film.id))
+        if cursor:
+            stmt = stmt.filter(Film.id < decode_cursor(cursor))
+    if limit:
+        stmt = stmt.limit(limit)
+
+    result = await db.execute(stmt)
+    return result.all() if full else result.scalars().all()
+
+
+async def load_projection(
+    db: AsyncSession, ids: List[int], fields: Fields
+) -> List[Film]:
+    """Фильмы с колонками проекции по id из снимка, в порядке ids."""
+    if not ids:
+        return []
+    stmt = film_query(fields).filter(any_of(Film.id, ids))
+    result = await db.execute(stmt)
+    by_id = {film.id: film for film in result.scalars().all()}
+    return [by_id[film_id] for film_id in ids if film_id in by_id]
+
+
+async def fetch_films_page(
+    db: AsyncSession,
+    snapshot: Optional["CatalogSnapshot"],
+    flt: FilmFilter,
+    response: Response,
+    fields: Fields,
+    cursor: Optional[str],
+    limit: Optional[int],
+    sort: str,
+) -> Union[List[Dict[str, Any]], Response]:
+    """
+    Выбирает фильмы по фильтру с keyset-пагинацией: по убыванию id
+    или по убыванию рейтинга. Если после страницы остались фильмы, курсор
+    следующей страницы возвращается в заголовке X-Next-Cursor.
+    Со снимком каталога фильтр и сортировка считаются в памяти, иначе
+    в базе. Полная проекция собирается из готовых JSON-фрагментов фильмов.
+    """
+    page_size = limit + 1 if limit else None
+    if snapshot is not None:
+        if cursor:
+            key = (
+                decode_rating_cursor(cursor)
+                if sort == SORT_RATING
+                else decode_cursor(cursor)
+            )
+        else:
+            key = None
+        rows = (await snapshot.get()).select(flt, sort, key, page_size)
+    else:
+        rows = await select_rows(db, flt, fields, sort, cursor, page_size)
+
+    headers = {}
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = next_cursor(rows[-1], sort)
+
+    if fields == FILM_FIELDS:
+        body = await films_json(db, [(row.id, row.version) for row in rows])
+        return Response(body, media_type="application/json", headers=headers)
+    response.headers.update(headers)
+    if snapshot is not None:
+        rows = await load_projection(db, [row.id for row in rows], fields)
+    return dump_films(rows, fields)
@@ -1,17 +1,131 @@
-import uvicorn
+from contextlib import asynccontextmanager
+from typing import Optional
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 
-from movielibrary.routers import films, filters, pages
+from movielibrary import tracing
+from movielibrary.bus import CatalogListener, invalidate_local_caches
+from movielibrary.cache import (
+    catalog_versions,
+    configure_hot_reads,
+    film_cache,
+    film_json_cache,
+)
+from movielibrary.database import Database
+from movielibrary.etag import ETagMiddleware
+from movielibrary.overload import LoadSheddingMiddleware, default_limits
+from movielibrary.profiling import ProfilerMiddleware, profiles
+from movielibrary.routers import admin, diagnostics, films, filters, pages, posters
+from movielibrary.slowlog import QueryRouteMiddleware, SlowQueryLog, instrument_engine
+from movielibrary.sse import EventBroker
+from settings import Settings, get_settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    state = app.state
+    # у каждого воркера своё LISTEN-соединение для сброса локальных кэшей
+    listener = CatalogListener(state.settings.postgres_dsn)
+    listener.subscribe(invalidate_local_caches)
+    listener.subscribe(state.broker.on_catalog_change)
+    listener.start()
+    yield
+    state.broker.close()
+    await listener.stop()
+    state.posters.shutdown()
+    await state.slow_queries.close()
+    await state.database.dispose()
+
 
-app = FastAPI(title="Movie Library API", version="0.1.0")
-app.add_middleware(SessionMiddleware, secret_key="your-secret-key")
-app.mount("/static", StaticFiles(directory="movielibrary/static"), name="static")
-app.include_router(films.router, prefix="/api/films", tags=["Films"])
-app.include_router(filters.router, prefix="/api/filters", tags=["Filters"])
-app.include_router(pages.router, tags=["Web Pages"], include_in_schema=False)
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Собирает приложение. Все модули читают настройки из app.state.settings
+    или получают их от объектов, созданных здесь. Движок базы, окружения
+    Jinja, кэш и пул рендеринга постеров создаются при первом обращении,
+    поэтому импорт модулей проекта не требует ни .env, ни доступной базы.
+    Args:
+        settings: Настройки; по умолчанию читаются из окружения
+    Returns:
+        Приложение для uvicorn --factory
+    """
+    settings = settings or get_settings()
+    app = FastAPI(title="Movie Library API", version="0.1.0", lifespan=lifespan)
+
+    app.state.settings = settings
+    app.state.database = database = Database(settings)
+    app.state.templates = pages.create_templates()
+    app.state.posters = posters.Posters(settings)
+    app.state.broker = EventBroker(
+        settings.sse_history_size, settings.sse_max_subscribers
+    )
+    app.state.slow_queries = SlowQueryLog(
+        settings.slow_query_ms,
+        settings.slow_query_log_size,
+        settings.slow_query_explain_ratio,
+        settings.postgres_dsn,
+    )
+    configure_hot_reads(
+        settings.hot_cache_ttl_seconds,
+        settings.hot_cache_max_stale_seconds,
+        lambda: database.sessions(),
+    )
+    film_json_cache.max_entries = settings.film_json_cache_size
+    film_cache.max_entries = settings.film_cache_size
+    app.state.snapshot = None
+    if settings.catalog_snapshot:
+        # numpy — необязательная зависимость: без снимка она не импортируется
+        try:
+            from movielibrary.snapshot import CatalogSnapshot
+        except ImportError as e:
+            raise RuntimeError(
+                "CATALOG_SNAPSHOT требует numpy: poetry install -E snapshot"
+            ) from e
+        app.state.snapshot = CatalogSnapshot(
+            catalog_versions, lambda: database.sessions()
+        )
+
+    app.add_middleware(SessionMiddleware, secret_key="your-secret-key")
+    app.add_middleware(ETagMiddleware)
+    app.add_middleware(ProfilerMiddleware, store=profiles, settings=settings)
+    if settings.slow_query_ms > 0:
+        database.on_engine.append(
+            lambda engine: instrument_engine(engine, app.state.slow_queries)
+        )
+        app.add_middleware(QueryRouteMiddleware)
+    if settings.tracing_exporter:
+        exporter = (
+            tracing.file_exporter(settings.tracing_file)
+            if settings.tracing_exporter == "file"
+            else tracing.console_exporter()
+        )
+        database.on_engine.append(tracing.instrument_engine)
+        app.add_middleware(
+            tracing.TracingMiddleware,
+            exporter=exporter,
+            sample_ratio=settings.tracing_sample_ratio,
+        )
+    # внешний слой: лишние запросы отсекаются до сессий и обращений к базе
+    app.add_middleware(LoadSheddingMiddleware, limits=default_limits(settings))
+
+    app.mount("/static", StaticFiles(directory="movielibrary/static"), name="static")
+    app.include_router(films.router, prefix="/api/films", tags=["Films"])
+    app.include_router(filters.router, prefix="/api/filters", tags=["Filters"])
+    app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+    app.include_router(diagnostics.router, prefix="/api/admin", tags=["Admin"])
+    app.include_router(posters.router, prefix="/posters", tags=["Posters"])
+    app.include_router(pages.router, tags=["Web Pages"], include_in_schema=False)
+    return app
 
 
 if __name__ == "__main__":
-    uvicorn.run("movielibrary.main:app", host="0.0.0.0", port=8002, reload=True)
+    import uvicorn
+
+    uvicorn.run(
+        "movielibrary.main:create_app",
+        factory=True,
+        host="0.0.0.0",
+        port=8002,
+        reload=True,
+    )
@@ -2,6 +2,15 @@ from .associations import FilmCountry, FilmGenre
 from .country import Country
 from .film import Film
 from .genre import Genre
+from .outbox import OutboxEvent
 from .user import User
 
-__all__ = ["Film", "Genre", "Country", "FilmGenre", "FilmCountry", "User"]
+__all__ = [
+    "Film",
+    "Genre",
+    "Country",
+    "FilmGenre",
+    "FilmCountry",
+    "User",
+    "OutboxEvent",
+]
@@ -15,8 +15,8 @@ class FilmGenre(Base):
     __tablename__ = "film_genre"
 
     film_id: Mapped[int] = mapped_column(
-        ForeignKey("films.id"), primary_key=True
-    )  # добавить ondelete="CASCADE", чтобы работало каскадное удаление
+        ForeignKey("films.id", ondelete="CASCADE"), primary_key=True
+    )
     genre_id: Mapped[int] = mapped_column(ForeignKey("genres.id"), primary_key=True)
 
     film: Mapped["Film"] = relationship(back_populates="genres")
@@ -26,7 +26,9 @@ class FilmGenre(Base):
 class FilmCountry(Base):
     __tablename__ = "film_country"
 
-    film_id: Mapped[int] = mapped_column(ForeignKey("films.id"), primary_key=True)
+    film_id: Mapped[int] = mapped_column(
+        ForeignKey("films.id", ondelete="CASCADE"), primary_key=True
+    )
     country_id: Mapped[int] = mapped_column(
         ForeignKey("countries.id"), primary_key=True
     )
@@ -1,5 +1,42 @@
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, TypeDecorator
 from sqlalchemy.orm import DeclarativeBase
 
 
 class Base(DeclarativeBase):
     pass
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class UTCDateTime(TypeDecorator):
+    """
+    TIMESTAMP WITH TIME ZONE, который принимает и возвращает время в UTC
+    с tzinfo. SQLite хранит время без зоны, поэтому прочитанные из него
+    наивные значения считаются UTC.
+    """
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(
+        self, value: Optional[datetime], dialect: Any
+    ) -> Optional[datetime]:
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            raise ValueError(f"Время без часового пояса: {value!r}")
+        return value.astimezone(timezone.utc)
+
+    def process_result_value(
+        self, value: Optional[datetime], dialect: Any
+    ) -> Optional[datetime]:
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
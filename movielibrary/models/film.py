@@ -1,12 +1,16 @@
 from typing import List
 
+from sqlalchemy import JSON, Float, Index, Integer, String
 from sqlalchemy import Enum as SQLEnum
-from sqlalchemy import Float, Index, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .associations import FilmCountry, FilmGenre
 from .base import Base
 
+# SQLite в тестах не знает массивов
+IntArray = ARRAY(Integer).with_variant(JSON(), "sqlite")
+
 
 class Film(Base):
     __tablename__ = "films"
@@ -20,6 +24,17 @@ class Film(Base):
     description: Mapped[str | None] = mapped_column(String, nullable=True)
     rating: Mapped[float] = mapped_column(Float, nullable=False)
     photo: Mapped[str] = mapped_column(String, nullable=False)
+    # Увеличивается триггером базы при каждом изменении строки,
+    # в том числе при пересчёте genre_ids и country_ids
+    version: Mapped[int] = mapped_column(Integer, server_default="1", nullable=False)
+    # Копии id из film_genre и film_country для фильтров без JOIN;
+    # заполняются триггерами базы, приложение их не пишет
+    genre_ids: Mapped[List[int]] = mapped_column(
+        IntArray, server_default="{}", nullable=False
+    )
+    country_ids: Mapped[List[int]] = mapped_column(
+        IntArray, server_default="{}", nullable=False
+    )
 
     genres: Mapped[List["FilmGenre"]] = relationship(
         back_populates="film", cascade="all, delete-orphan", passive_deletes=True
@@ -43,4 +58,6 @@ class Film(Base):
             postgresql_using="gin",
             postgresql_ops={"title": "gin_trgm_ops"},
         ),
+        Index("idx_films_genre_ids", "genre_ids", postgresql_using="gin"),
+        Index("idx_films_country_ids", "country_ids", postgresql_using="gin"),
     )
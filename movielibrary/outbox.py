@@ -0,0 +1,301 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from movielibrary.database import Database
+from movielibrary.models import OutboxEvent
+from movielibrary.models.base import utcnow
+from movielibrary.send_email import (
+    close_mailer,
+    configure_mailer,
+    send_films_email_async,
+)
+from settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+Payload = Dict[str, Any]
+# Событие, которое batch-обработчик ставит в outbox вместо части пачки
+FollowUp = Tuple[str, Payload]
+Handler = Callable[[Payload], Awaitable[None]]
+BatchHandler = Callable[[List[Payload]], Awaitable[Optional[List[FollowUp]]]]
+
+HANDLERS: Dict[str, Handler] = {}
+# Обработчики, которые получают сразу несколько событий одного типа (дайджесты)
+BATCH_HANDLERS: Dict[str, BatchHandler] = {}
+
+MAX_BACKOFF_SECONDS = 3600
+# Аренда захваченных событий: если воркер за это время не записал
+# результат (упал), события снова станут доступны другим воркерам
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def handler(event_type: str) -> Callable[[Handler], Handler]:
+    """
+    Регистрирует обработчик событий outbox заданного типа.
+    """
+
+    def decorator(func: Handler) -> Handler:
+        HANDLERS[event_type] = func
+        return func
+
+    return decorator
+
+
+def batch_handler(event_type: str) -> Callable[[BatchHandler], BatchHandler]:
+    """
+    Регистрирует обработчик, который получает накопленные события типа пачкой.
+    """
+
+    def decorator(func: BatchHandler) -> BatchHandler:
+        BATCH_HANDLERS[event_type] = func
+        return func
+
+    return decorator
+
+
+def add_event(db: AsyncSession, event_type: str, payload: Payload) -> OutboxEvent:
+    """
+    Добавляет событие в outbox в текущей транзакции.
+    Событие будет обработано воркером только после commit.
+    Args:
+        db: Асинхронная сессия базы данных
+        event_type: Тип события, по которому выбирается обработчик
+        payload: JSON-совместимые данные события
+    Returns:
+        Добавленный в сессию объект OutboxEvent
+    """
+    event = OutboxEvent(event_type=event_type, payload=payload)
+    db.add(event)
+    return event
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(2**attempts, MAX_BACKOFF_SECONDS))
+
+
+def record_failure(
+    event: OutboxEvent, error: Exception, max_attempts: int, now: datetime
+) -> None:
+    event.attempts += 1
+    event.last_error = repr(error)
+    if event.attempts >= max_attempts:
+        event.failed_at = now
+        logger.error("Outbox event %s failed permanently: %r", event.id, error)
+    else:
+        event.available_at = now + retry_delay(event.attempts)
+        logger.warning(
+            "Outbox event %s failed (attempt %d): %r", event.id, event.attempts, error
+        )
+
+
+def claim(events: Sequence[OutboxEvent], timeout: timedelta) -> None:
+    """
+    Откладывает захваченные события на время аренды. После commit
+    блокировки FOR UPDATE сняты, и от повторного захвата события
+    защищает только available_at, поэтому обработчики с сетевыми
+    вызовами не держат транзакцию и соединение пула.
+    """
+    available_at = utcnow() + timeout
+    for event in events:
+        event.available_at = available_at
+
+
+async def dispatch(event: OutboxEvent, max_attempts: int) -> None:
+    """Вызывает обработчик события и записывает результат в саму строку outbox."""
+    now = utcnow()
+    try:
+        func = HANDLERS.get(event.event_type)
+        if func is None:
+            raise LookupError(f"Нет обработчика для события {event.event_type}")
+        await func(event.payload)
+    except Exception as e:
+        record_failure(event, e, max_attempts, now)
+    else:
+        event.processed_at = now
+
+
+async def dispatch_batch(
+    events: Sequence[OutboxEvent], max_attempts: int
+) -> List[FollowUp]:
+    """
+    Передаёт пачку событий одного типа batch-обработчику.
+    Returns:
+        События, которые нужно добавить в той же транзакции,
+        что отмечает пачку обработанной
+    """
+    now = utcnow()
+    try:
+        follow_ups = await BATCH_HANDLERS[events[0].event_type](
+            [e.payload for e in events]
+        )
+    except Exception as e:
+        for event in events:
+            record_failure(event, e, max_attempts, now)
+        return []
+    for event in events:
+        event.processed_at = now
+    return follow_ups or []
+
+
+def pending_events(*criteria):
+    return (
+        select(OutboxEvent)
+        .filter(
+            OutboxEvent.processed_at.is_(None),
+            OutboxEvent.failed_at.is_(None),
+            OutboxEvent.available_at <= utcnow(),
+            *criteria,
+        )
+        .order_by(OutboxEvent.id)
+        .with_for_update(skip_locked=True)
+    )
+
+
+async def process_batch(
+    session_factory: async_sessionmaker[AsyncSession],
+    batch_size: int,
+    max_attempts: int,
+    claim_timeout: timedelta = CLAIM_TIMEOUT,
+) -> int:
+    """
+    Захватывает пачку готовых событий через SELECT ... FOR UPDATE SKIP LOCKED
+    и арендует их короткой транзакцией, затем обрабатывает вне транзакции
+    и фиксирует результат второй. Несколько воркеров могут работать
+    параллельно, не мешая друг другу.
+    Returns:
+        Число обработанных событий
+    """
+    async with session_factory() as db, db.begin():
+        stmt = pending_events(OutboxEvent.event_type.not_in(BATCH_HANDLERS)).limit(
+            batch_size
+        )
+        result = await db.execute(stmt)
+        events = result.scalars().all()
+        claim(events, claim_timeout)
+    if not events:
+        return 0
+
+    for event in events:
+        await dispatch(event, max_attempts)
+    async with session_factory() as db, db.begin():
+        db.add_all(events)
+    return len(events)
+
+
+async def process_digest(
+    session_factory: async_sessionmaker[AsyncSession],
+    event_type: str,
+    window: timedelta,
+    max_size: int,
+    max_attempts: int,
+    claim_timeout: timedelta = CLAIM_TIMEOUT,
+) -> int:
+    """
+    Накапливает события типа event_type и отдаёт их batch-обработчику одной пачкой.
+    Пачка отправляется, когда набралось max_size событий или самое старое
+    ждёт дольше window. Если за последнее окно ничего не отправлялось,
+    событие уходит сразу, так что одиночные добавления не задерживаются.
+    Returns:
+        Число обработанных событий
+    """
+    async with session_factory() as db, db.begin():
+        stmt = pending_events(OutboxEvent.event_type == event_type).limit(max_size)
+        result = await db.execute(stmt)
+        events = result.scalars().all()
+        if not events:
+            return 0
+
+        now = utcnow()
+        last_sent = await db.scalar(
+            select(func.max(OutboxEvent.processed_at)).filter(
+                OutboxEvent.event_type == event_type
+            )
+        )
+        due = (
+            len(events) >= max_size
+            or min(event.created_at for event in events) <= now - window
+            or last_sent is None
+            or last_sent <= now - window
+        )
+        if not due:
+            return 0
+        claim(events, claim_timeout)
+
+    follow_ups = await dispatch_batch(events, max_attempts)
+    async with session_factory() as db, db.begin():
+        db.add_all(events)
+        for event_type, payload in follow_ups:
+            add_event(db, event_type, payload)
+    return len(events)
+
+
+@batch_handler("film_created")
+async def notify_films_created(payloads: List[Payload]) -> List[FollowUp]:
+    """
+    Рассылает дайджест. Если письмо не ушло никому, пачка повторяется
+    целиком; если только части получателей, для каждого из них ставится
+    отдельное событие film_email со своими повторами.
+    """
+    titles = [payload["title"] for payload in payloads]
+    report = await send_films_email_async(titles)
+    if report.failed and not report.sent:
+        raise RuntimeError(f"Не удалось отправить письма: {report.failed}")
+    return [
+        ("film_email", {"titles": titles, "recipient": recipient})
+        for recipient in report.failed
+    ]
+
+
+@handler("film_email")
+async def send_film_email(payload: Payload) -> None:
+    """Повтор дайджеста одному получателю, которому он не ушёл."""
+    report = await send_films_email_async(payload["titles"], [payload["recipient"]])
+    if report.failed:
+        raise RuntimeError(f"Не удалось отправить письмо: {report.failed}")
+
+
+async def run_worker(settings: Optional[Settings] = None) -> None:
+    """
+    Args:
+        settings: Настройки; по умолчанию читаются из окружения
+    """
+    settings = settings or get_settings()
+    configure_mailer(settings)
+    database = Database(settings)
+    claim_timeout = timedelta(seconds=settings.outbox_claim_timeout_seconds)
+    logger.info("Outbox worker started")
+    try:
+        while True:
+            try:
+                processed = await process_batch(
+                    database.sessions,
+                    settings.outbox_batch_size,
+                    settings.outbox_max_attempts,
+                    claim_timeout,
+                )
+                await process_digest(
+                    database.sessions,
+                    "film_created",
+                    timedelta(seconds=settings.notify_digest_window_seconds),
+                    settings.notify_digest_max_films,
+                    settings.outbox_max_attempts,
+                    claim_timeout,
+                )
+            except Exception:
+                logger.exception("Outbox batch failed")
+                processed = 0
+            if processed < settings.outbox_batch_size:
+                await asyncio.sleep(settings.outbox_poll_interval)
+    finally:
+        await close_mailer()
+        await database.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker())
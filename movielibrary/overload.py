@@ -0,0 +1,225 @@
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from settings import Settings
+
+# Классы маршрутов: у каждого свой лимит одновременных запросов,
+# чтобы поиск или bcrypt не занимали соединения пула, нужные каталогу
+CACHED = "cached"
+LISTING = "listing"
+SEARCH = "search"
+AUTH = "auth"
+
+# Лимитируются только маршруты, которые ходят в базу. Остальные (статика,
+# постеры, формы, админка, документация) не занимают соединений пула,
+# а лента событий держит соединение часами и заняла бы слот навсегда
+CACHED_PATH = re.compile(r"^/(api/films/(\d+|statistics)|film/\d+)$")
+LISTING_PATH = re.compile(
+    r"^/(api/films(/batch)?|api/filters/.+|series|(genres|countries|years)/.+)?$"
+)
+SEARCH_PATHS = ("/search", "/api/films/search")
+AUTH_PATHS = ("/login", "/register")
+
+SHED_RETRY_AFTER = 1
+# Сколько IP держать в памяти для ограничения частоты запросов
+MAX_TRACKED_CLIENTS = 10000
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """
+    Returns:
+        Класс маршрута или None, если запрос не ограничивается
+    """
+    if method == "POST" and path in AUTH_PATHS:
+        return AUTH
+    if path in SEARCH_PATHS:
+        return SEARCH
+    if method == "GET" and CACHED_PATH.match(path):
+        return CACHED
+    if LISTING_PATH.match(path):
+        return LISTING
+    return None
+
+
+class AdaptiveLimit:
+    """
+    Лимит одновременных запросов, подстраиваемый по принципу AIMD.
+    Пока запросы укладываются в целевую задержку, лимит растёт на единицу
+    за каждые limit завершённых запросов; когда задержка превышает цель,
+    лимит умножается на backoff — не чаще раза за целевую задержку,
+    чтобы пачка медленных ответов одной волны не обрушила его до минимума.
+    """
+
+    def __init__(
+        self,
+        target_latency: float,
+        max_limit: int,
+        min_limit: int = 1,
+        backoff: float = 0.9,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.target_latency = target_latency
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.backoff = backoff
+        self.clock = clock
+        self.limit = float(max_limit)
+        self.inflight = 0
+        self._last_decrease = -math.inf
+
+    def try_acquire(self) -> bool:
+        if self.inflight >= int(self.limit):
+            return False
+        self.inflight += 1
+        return True
+
+    def release(self, latency: float) -> None:
+        self.inflight -= 1
+        if latency > self.target_latency:
+            now = self.clock()
+            if now - self._last_decrease >= self.target_latency:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+
+class TokenBucket:
+    """
+    Ограничение частоты запросов по IP: rate токенов в секунду,
+    не больше burst подряд. Давно не приходившие клиенты вытесняются.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._clients: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, client: str) -> float:
+        """
+        Returns:
+            0, если запрос разрешён, иначе сколько секунд ждать следующего токена
+        """
+        now = self.clock()
+        tokens, updated = self._clients.pop(client, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._clients[client] = (tokens, now)
+        if len(self._clients) > MAX_TRACKED_CLIENTS:
+            self._clients.popitem(last=False)
+        return wait
+
+
+@dataclass
+class RouteLimits:
+    concurrency: Dict[str, AdaptiveLimit]
+    rates: Dict[str, TokenBucket]
+
+
+def default_limits(settings: Settings) -> RouteLimits:
+    """
+    Лимиты по умолчанию: каталогу и поиску вместе не больше соединений,
+    чем есть в пуле, поиску — не больше половины, чтобы запросы не
+    простаивали в очереди за соединением до таймаута.
+    """
+    pool = int(settings.db_pool_size) + int(settings.db_max_overflow)
+    return RouteLimits(
+        concurrency={
+            CACHED: AdaptiveLimit(target_latency=0.05, max_limit=200),
+            LISTING: AdaptiveLimit(target_latency=0.5, max_limit=pool),
+            SEARCH: AdaptiveLimit(target_latency=1.0, max_limit=max(1, pool // 2)),
+            # bcrypt занимает процессор, а не соединения
+            AUTH: AdaptiveLimit(target_latency=1.0, max_limit=4),
+        },
+        rates={
+            SEARCH: TokenBucket(
+                settings.search_rate_per_minute / 60, settings.search_rate_burst
+            ),
+            AUTH: TokenBucket(
+                settings.login_rate_per_minute / 60, settings.login_rate_burst
+            ),
+        },
+    )
+
+
+def rejection(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class LoadSheddingMiddleware:
+    """
+    Отсекает лишние запросы до того, как они встанут в очередь за
+    соединением пула: 429 при превышении частоты с одного IP и 503, если
+    у класса маршрута нет свободных слотов. Оба ответа с Retry-After.
+    """
+
+    def __init__(self, app: ASGIApp, limits: RouteLimits):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        name = route_class(scope["method"], scope["path"])
+        limit = self.limits.concurrency.get(name)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        bucket = self.limits.rates.get(name)
+        if bucket is not None:
+            # за обратным прокси uvicorn подставляет сюда адрес из
+            # X-Forwarded-For, если прокси указан в FORWARDED_ALLOW_IPS
+            client = scope["client"][0] if scope.get("client") else ""
+            wait = bucket.take(client)
+            if wait:
+                response = rejection(429, "Слишком много запросов", wait)
+                await response(scope, receive, send)
+                return
+
+        if not limit.try_acquire():
+            response = rejection(
+                503, "Сервер перегружен, повторите позже", SHED_RETRY_AFTER
+            )
+            await response(scope, receive, send)
+            return
+
+        # задержка для AIMD считается до начала ответа: тело отдаётся
+        # со скоростью клиента, и медленные клиенты не должны снижать лимит
+        started = time.perf_counter()
+        latency: Optional[float] = None
+
+        async def send_and_measure(message: Message) -> None:
+            nonlocal latency
+            if message["type"] == "http.response.start":
+                latency = time.perf_counter() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            if latency is None:
+                latency = time.perf_counter() - started
+            limit.release(latency)
@@ -0,0 +1,54 @@
+import base64
+import binascii
+from typing import Tuple
+
+from fastapi import HTTPException
+
+
+def encode_cursor(film_id: int) -> str:
+    """
+    Кодирует id последнего фильма страницы в непрозрачный курсор.
+    Курсор короткий, чтобы помещаться в callback_data Telegram (64 байта).
+    """
+    return encode_text(str(film_id))
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Декодирует курсор, полученный от encode_cursor.
+    Raises:
+        HTTPException: 400 если курсор повреждён
+    """
+    try:
+        return int(_decode(cursor))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некорректный курсор") from None
+
+
+def encode_rating_cursor(rating: float, film_id: int) -> str:
+    """Курсор списка по рейтингу: рейтинг и id последнего фильма страницы."""
+    return encode_text(f"{rating!r}:{film_id}")
+
+
+def decode_rating_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    Raises:
+        HTTPException: 400 если курсор повреждён
+    """
+    try:
+        rating, film_id = _decode(cursor).split(":")
+        return float(rating), int(film_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некорректный курсор") from None
+
+
+def encode_text(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).rstrip(b"=").decode()
+
+
+def _decode(cursor: str) -> str:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        return base64.urlsafe_b64decode(padded.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError(cursor) from None
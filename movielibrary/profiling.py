@@ -0,0 +1,221 @@
+import itertools
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from movielibrary.auth_utils import is_admin_token
+from settings import Settings
+
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY = "_profile"
+# Интервал сэмплирования стека, секунды
+SAMPLE_INTERVAL = 0.005
+MAX_PROFILES = 20
+MAX_SNAPSHOTS = 5
+# Стек цикла событий, ждущего ввода-вывода, сворачивается в один кадр
+IDLE = "(idle)"
+
+
+def folded_stack(frame) -> str:
+    """Стек от корня к листу в формате folded (flamegraph.pl, speedscope)."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_qualname} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def is_idle(frame) -> bool:
+    return frame.f_code.co_filename.endswith("selectors.py")
+
+
+class StackSampler:
+    """
+    Фоновый поток, который раз в interval снимает стек потока цикла
+    событий. Пока запрос выполняется, цикл обслуживает и другие запросы,
+    поэтому их работа тоже попадает в профиль: профилировать лучше
+    на малонагруженном воркере.
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[IDLE if is_idle(frame) else folded_stack(frame)] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+
+@dataclass
+class Profile:
+    id: int
+    method: str
+    path: str
+    started_at: float
+    duration: float = 0.0
+    samples: Counter = field(default_factory=Counter)
+
+    def folded(self) -> str:
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.samples.most_common()
+        )
+
+
+class ProfileStore:
+    """Последние профили запросов в памяти воркера."""
+
+    def __init__(self, maxlen: int = MAX_PROFILES):
+        self._profiles: Deque[Profile] = deque(maxlen=maxlen)
+        self._ids = itertools.count(1)
+
+    def __iter__(self):
+        return iter(reversed(self._profiles))
+
+    def create(self, method: str, path: str) -> Profile:
+        profile = Profile(next(self._ids), method, path, time.time())
+        self._profiles.append(profile)
+        return profile
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        return next((p for p in self._profiles if p.id == profile_id), None)
+
+
+def wants_profile(scope: Scope) -> bool:
+    """Запрос просит профиль заголовком X-Profile или ровно параметром _profile=1."""
+    if PROFILE_HEADER in Headers(scope=scope):
+        return True
+    query = parse_qs(scope["query_string"].decode("latin-1"))
+    return "1" in query.get(PROFILE_QUERY, [])
+
+
+class ProfilerMiddleware:
+    """
+    Профилирует запрос, если администратор (ADMIN_EMAILS из settings)
+    прислал заголовок X-Profile или параметр _profile=1. Профиль сохраняется в store, его id
+    возвращается в заголовке X-Profile-Id, а стеки в формате folded
+    отдаёт GET /api/admin/profiles/{id}. Остальные запросы проходят
+    с единственной проверкой заголовков.
+    """
+
+    def __init__(self, app: ASGIApp, store: "ProfileStore", settings: Settings):
+        self.app = app
+        self.store = store
+        self.settings = settings
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not wants_profile(scope)
+            or not is_admin_token(
+                Request(scope).cookies.get("access_token"), self.settings
+            )
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile = self.store.create(scope["method"], scope["path"])
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(raw=message["headers"])["X-Profile-Id"] = str(profile.id)
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident())
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.samples = sampler.stop()
+            profile.duration = time.perf_counter() - started
+
+
+class MemorySnapshots:
+    """
+    Снимки tracemalloc для поиска того, что растёт между запросами.
+    Трассировка выделений включается только по запросу администратора:
+    пока она выключена, накладных расходов нет.
+    """
+
+    def __init__(self, maxlen: int = MAX_SNAPSHOTS):
+        self._snapshots: Dict[int, tracemalloc.Snapshot] = {}
+        self._ids = itertools.count(1)
+        self.maxlen = maxlen
+
+    def start(self, frames: int) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self._snapshots.clear()
+
+    def take(self) -> int:
+        """
+        Raises:
+            RuntimeError: Если трассировка выделений не включена
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc не запущен")
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            )
+        )
+        snapshot_id = next(self._ids)
+        self._snapshots[snapshot_id] = snapshot
+        while len(self._snapshots) > self.maxlen:
+            del self._snapshots[next(iter(self._snapshots))]
+        return snapshot_id
+
+    def get(self, snapshot_id: int) -> Optional[tracemalloc.Snapshot]:
+        return self._snapshots.get(snapshot_id)
+
+    def top(self, snapshot_id: int, group_by: str, limit: int) -> List[Dict]:
+        stats = self._snapshots[snapshot_id].statistics(group_by)
+        return [stat_dict(stat) for stat in stats[:limit]]
+
+    def diff(self, base: int, target: int, group_by: str, limit: int) -> List[Dict]:
+        """Места выделений, отсортированные по приросту памяти от base к target."""
+        stats = self._snapshots[target].compare_to(self._snapshots[base], group_by)
+        return [
+            stat_dict(stat, size_diff=stat.size_diff, count_diff=stat.count_diff)
+            for stat in stats[:limit]
+        ]
+
+
+def stat_dict(stat, **diff: int) -> Dict:
+    return {
+        "trace": [str(frame) for frame in stat.traceback],
+        "size": stat.size,
+        "count": stat.count,
+        **diff,
+    }
+
+
+profiles = ProfileStore()
+memory_snapshots = MemorySnapshots()
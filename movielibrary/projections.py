@@ -0,0 +1,168 @@
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Type
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+
+from movielibrary.cache import film_json_cache
+from movielibrary.facets import any_of
+from movielibrary.models import Film, FilmCountry, FilmGenre
+from movielibrary.schemas.film import FilmRead
+from movielibrary.tracing import span
+
+Fields = Tuple[str, ...]
+
+# Поля FilmRead в порядке вывода; genres и countries — связи, остальное колонки
+FILM_FIELDS: Fields = (
+    "id",
+    "title",
+    "year",
+    "description",
+    "rating",
+    "photo",
+    "genres",
+    "countries",
+)
+RELATION_LOADS = {
+    "genres": selectinload(Film.genres).selectinload(FilmGenre.genre),
+    "countries": selectinload(Film.countries).selectinload(FilmCountry.country),
+}
+PROJECTIONS: Dict[str, Fields] = {
+    "slim": ("id", "title"),
+    "card": ("id", "title", "year", "rating", "photo"),
+    "full": FILM_FIELDS,
+}
+CARD = PROJECTIONS["card"]
+
+
+def parse_fields(raw: str) -> Fields:
+    """
+    Разбирает fields= : имя проекции (slim, card, full) или список полей
+    через запятую. id добавляется всегда — на нём держится пагинация.
+    Raises:
+        HTTPException: 400 если указано неизвестное поле
+    """
+    if raw in PROJECTIONS:
+        return PROJECTIONS[raw]
+    requested = {part.strip() for part in raw.split(",") if part.strip()}
+    unknown = requested - set(FILM_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Неизвестные поля: {', '.join(sorted(unknown))}",
+        )
+    requested.add("id")
+    return tuple(field for field in FILM_FIELDS if field in requested)
+
+
+def fields_dependency(default: str) -> Callable[..., Fields]:
+    """Зависимость FastAPI, возвращающая разобранный параметр fields."""
+
+    def dependency(
+        fields: str = Query(
+            default,
+            description="Проекция (slim, card, full) или поля через запятую: "
+            + ", ".join(FILM_FIELDS),
+        ),
+    ) -> Fields:
+        return parse_fields(fields)
+
+    return dependency
+
+
+def film_versions_query() -> Select:
+    """
+    SELECT только id, версий и рейтингов (для курсора) фильмов: полная
+    проекция собирается из film_json_cache, и строки фильмов нужны
+    лишь для промахов.
+    """
+    return select(Film.id, Film.version, Film.rating)
+
+
+def film_query(fields: Fields, *extra: Any) -> Select:
+    """
+    SELECT фильмов только с нужными колонками; жанры и страны
+    догружаются отдельными запросами, только если они запрошены.
+    extra — колонки, нужные не ответу, а самому запросу (ключ курсора).
+    """
+    columns = [getattr(Film, f) for f in fields if f not in RELATION_LOADS]
+    columns.extend(extra)
+    relations = [RELATION_LOADS[f] for f in fields if f in RELATION_LOADS]
+    return select(Film).options(load_only(*columns), *relations)
+
+
+@lru_cache(maxsize=256)
+def projection_model(fields: Fields) -> Type[BaseModel]:
+    """Урезанная схема FilmRead только с полями проекции."""
+    if fields == FILM_FIELDS:
+        return FilmRead
+    return create_model(
+        f"FilmProjection_{'_'.join(fields)}",
+        __config__=ConfigDict(from_attributes=True, populate_by_name=True),
+        **{
+            name: (FilmRead.model_fields[name].annotation, FilmRead.model_fields[name])
+            for name in fields
+        },
+    )
+
+
+def project_films(films: Sequence[Film], fields: Fields) -> List[BaseModel]:
+    model = projection_model(fields)
+    with span(f"validate {model.__name__}", **{"films.count": len(films)}):
+        return [model.model_validate(film) for film in films]
+
+
+def dump_films(films: Sequence[Film], fields: Fields) -> List[Dict[str, Any]]:
+    """Готовит фильмы к ответу API с теми же именами полей, что у FilmRead."""
+    return [
+        film.model_dump(mode="json", by_alias=True)
+        for film in project_films(films, fields)
+    ]
+
+
+def film_json(film: Film) -> bytes:
+    return FilmRead.model_validate(film).model_dump_json(by_alias=True).encode()
+
+
+async def films_json(db: AsyncSession, rows: Sequence[Tuple[int, int]]) -> bytes:
+    """
+    Тело ответа со списком фильмов в полной проекции, склеенное из
+    JSON-фрагментов film_json_cache. Фильмы, которых нет в кэше или
+    которые изменились, загружаются одним запросом, поэтому валидация
+    и сериализация идут только для промахов.
+    Args:
+        db: Сессия базы
+        rows: (id, version) фильмов в порядке ответа
+    Returns:
+        JSON-массив фильмов; удалённые за это время фильмы пропускаются
+    """
+    generation = film_json_cache.versions.generation
+    parts: Dict[int, bytes] = {}
+    misses = []
+    for film_id, version in rows:
+        body = film_json_cache.get(film_id, version)
+        if body is None:
+            misses.append(film_id)
+        else:
+            parts[film_id] = body
+
+    if misses:
+        stmt = (
+            select(Film)
+            .options(*RELATION_LOADS.values())
+            .filter(any_of(Film.id, misses))
+        )
+        result = await db.execute(stmt)
+        films = result.scalars().all()
+        with span("serialize films", **{"films.count": len(films)}):
+            for film in films:
+                # версия из этого запроса: фильм мог измениться после списка id
+                parts[film.id] = film_json_cache.put(
+                    film.id, film.version, film_json(film), generation
+                )
+
+    body = b",".join(parts[film_id] for film_id, _ in rows if film_id in parts)
+    return b"[" + body + b"]"
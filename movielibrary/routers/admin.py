@@ -0,0 +1,175 @@
+from typing import Dict, List, Type, Union
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import ColumnElement, delete, exists, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from movielibrary.auth_utils import get_current_admin
+from movielibrary.bus import publish_change
+from movielibrary.cache import FILM, apply_change
+from movielibrary.database import get_db
+from movielibrary.models import Country, Film, FilmCountry, FilmGenre, Genre
+from movielibrary.schemas.admin import (
+    BulkDeleteResult,
+    FilmSelector,
+    LinksUpdate,
+    LinksUpdateResult,
+)
+
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+LinkModel = Union[Type[FilmGenre], Type[FilmCountry]]
+TargetModel = Union[Type[Genre], Type[Country]]
+
+
+def film_criteria(selector: FilmSelector) -> List[ColumnElement[bool]]:
+    """
+    Условия WHERE по таблице films для селектора.
+    Используются прямо в DELETE/INSERT ... SELECT, поэтому фильмы
+    не загружаются в ORM.
+    """
+    # алиасы не дают подзапросам скоррелироваться с теми же таблицами
+    # во внешнем INSERT/DELETE
+    film_genre, genre = aliased(FilmGenre), aliased(Genre)
+    film_country, country = aliased(FilmCountry), aliased(Country)
+    criteria = []
+    if selector.ids is not None:
+        criteria.append(Film.id.in_(selector.ids))
+    if selector.genre is not None:
+        criteria.append(
+            exists().where(
+                film_genre.film_id == Film.id,
+                film_genre.genre_id == genre.id,
+                genre.name == selector.genre,
+            )
+        )
+    if selector.country is not None:
+        criteria.append(
+            exists().where(
+                film_country.film_id == Film.id,
+                film_country.country_id == country.id,
+                country.name == selector.country,
+            )
+        )
+    if selector.year is not None:
+        criteria.append(Film.year == selector.year)
+    if selector.type is not None:
+        criteria.append(Film.type == selector.type)
+    return criteria
+
+
+async def resolve_names(
+    db: AsyncSession, model: TargetModel, names: List[str], not_found: str
+) -> Dict[str, int]:
+    """
+    Находит id жанров или стран по названиям.
+    Raises:
+        HTTPException: 404 если какого-то названия нет в справочнике
+    """
+    if not names:
+        return {}
+    result = await db.execute(
+        select(model.name, model.id).filter(model.name.in_(names))
+    )
+    found = dict(result.all())
+    missing = [name for name in names if name not in found]
+    if missing:
+        raise HTTPException(
+            status_code=404, detail=f"{not_found}: {', '.join(missing)}"
+        )
+    return found
+
+
+async def update_links(
+    db: AsyncSession,
+    body: LinksUpdate,
+    link: LinkModel,
+    link_column: str,
+    target: TargetModel,
+    not_found: str,
+) -> LinksUpdateResult:
+    """
+    Добавляет и удаляет связи фильмов с жанрами или странами.
+    Каждая операция — один INSERT ... SELECT или DELETE по всему набору фильмов.
+    """
+    add_ids = list((await resolve_names(db, target, body.add, not_found)).values())
+    remove_ids = list(
+        (await resolve_names(db, target, body.remove, not_found)).values()
+    )
+    criteria = film_criteria(body.films)
+    target_id = getattr(link, link_column)
+    added = removed = 0
+
+    if add_ids:
+        candidates = (
+            select(Film.id, target.id)
+            .join(target, target.id.in_(add_ids))
+            .filter(*criteria)
+            .filter(~exists().where(link.film_id == Film.id, target_id == target.id))
+        )
+        result = await db.execute(
+            insert(link).from_select(["film_id", link_column], candidates)
+        )
+        added = result.rowcount
+
+    if remove_ids:
+        result = await db.execute(
+            delete(link)
+            .where(
+                link.film_id.in_(select(Film.id).filter(*criteria)),
+                target_id.in_(remove_ids),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        removed = result.rowcount
+
+    if added or removed:
+        await publish_change(db, FILM)
+    await db.commit()
+    if added or removed:
+        apply_change(FILM, None)
+    return LinksUpdateResult(added=added, removed=removed)
+
+
+@router.post(
+    "/films/delete",
+    response_model=BulkDeleteResult,
+    summary="Bulk Delete Films",
+    description="Удаляет все фильмы, подходящие под список id и/или фильтр",
+)
+async def bulk_delete_films(body: FilmSelector, db: AsyncSession = Depends(get_db)):
+    # связи с жанрами и странами удаляет сама база (ON DELETE CASCADE)
+    result = await db.execute(
+        delete(Film)
+        .where(*film_criteria(body))
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        await publish_change(db, FILM, action="deleted")
+    await db.commit()
+    if result.rowcount:
+        apply_change(FILM, None)
+    return BulkDeleteResult(deleted=result.rowcount)
+
+
+@router.post(
+    "/films/genres",
+    response_model=LinksUpdateResult,
+    summary="Bulk Update Film Genres",
+    description="Добавляет и удаляет жанры у всех выбранных фильмов",
+)
+async def bulk_update_genres(body: LinksUpdate, db: AsyncSession = Depends(get_db)):
+    return await update_links(db, body, FilmGenre, "genre_id", Genre, "Жанр не найден")
+
+
+@router.post(
+    "/films/countries",
+    response_model=LinksUpdateResult,
+    summary="Bulk Update Film Countries",
+    description="Добавляет и удаляет страны у всех выбранных фильмов",
+)
+async def bulk_update_countries(body: LinksUpdate, db: AsyncSession = Depends(get_db)):
+    return await update_links(
+        db, body, FilmCountry, "country_id", Country, "Страна не найдена"
+    )
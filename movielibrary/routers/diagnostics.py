@@ -0,0 +1,124 @@
+import tracemalloc
+from typing import List, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from movielibrary.auth_utils import get_current_admin
+from movielibrary.profiling import memory_snapshots, profiles
+from movielibrary.schemas.admin import MemorySnapshotInfo, MemoryStat, ProfileInfo
+
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+GroupBy = Literal["lineno", "filename", "traceback"]
+
+
+@router.get(
+    "/profiles",
+    response_model=List[ProfileInfo],
+    summary="List Request Profiles",
+    description="Последние профили запросов, снятые с заголовком X-Profile",
+)
+async def list_profiles():
+    return [
+        ProfileInfo(
+            id=profile.id,
+            method=profile.method,
+            path=profile.path,
+            started_at=profile.started_at,
+            duration=profile.duration,
+            samples=sum(profile.samples.values()),
+        )
+        for profile in profiles
+    ]
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    response_class=PlainTextResponse,
+    summary="Get Request Profile",
+    description="Стеки профиля в формате folded для flamegraph.pl или speedscope",
+)
+async def get_profile(profile_id: int):
+    profile = profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Профиль не найден")
+    return profile.folded()
+
+
+@router.post(
+    "/memory/start",
+    summary="Start Memory Tracing",
+    description="Включает tracemalloc; frames — глубина сохраняемого стека",
+)
+async def start_memory_tracing(frames: int = Query(25, ge=1, le=100)):
+    memory_snapshots.start(frames)
+    return {"tracing": True, "frames": tracemalloc.get_traceback_limit()}
+
+
+@router.post(
+    "/memory/stop",
+    summary="Stop Memory Tracing",
+    description="Выключает tracemalloc и удаляет снимки",
+)
+async def stop_memory_tracing():
+    memory_snapshots.stop()
+    return {"tracing": False}
+
+
+@router.post(
+    "/memory/snapshots",
+    response_model=MemorySnapshotInfo,
+    summary="Take Memory Snapshot",
+)
+async def take_memory_snapshot(
+    group_by: GroupBy = "lineno", limit: int = Query(20, ge=1, le=200)
+):
+    try:
+        # снимок большой кучи строится секунды: не блокируем цикл событий
+        snapshot_id = await run_in_threadpool(memory_snapshots.take)
+    except RuntimeError:
+        raise HTTPException(
+            status_code=409, detail="Сначала включите /memory/start"
+        ) from None
+    current, peak = tracemalloc.get_traced_memory()
+    top = await run_in_threadpool(memory_snapshots.top, snapshot_id, group_by, limit)
+    return MemorySnapshotInfo(
+        id=snapshot_id, traced_current=current, traced_peak=peak, top=top
+    )
+
+
+@router.get(
+    "/memory/diff",
+    response_model=List[MemoryStat],
+    summary="Compare Memory Snapshots",
+    description="Места выделений с наибольшим приростом памяти от base к target",
+)
+async def diff_memory_snapshots(
+    base: int,
+    target: int,
+    group_by: GroupBy = "lineno",
+    limit: int = Query(20, ge=1, le=200),
+):
+    missing = [i for i in (base, target) if memory_snapshots.get(i) is None]
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Снимки не найдены: {', '.join(map(str, missing))}",
+        )
+    return await run_in_threadpool(memory_snapshots.diff, base, target, group_by, limit)
+
+
+@router.get(
+    "/slow-queries",
+    summary="List Slow Queries",
+    description="Последние медленные SQL-запросы воркера и сводка по их формам",
+)
+async def list_slow_queries(request: Request, limit: int = Query(50, ge=1, le=500)):
+    return request.app.state.slow_queries.to_dict(limit)
+
+
+@router.delete("/slow-queries", status_code=204, summary="Clear Slow Queries")
+async def clear_slow_queries(request: Request):
+    request.app.state.slow_queries.clear()
@@ -1,14 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import desc, func, select
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from movielibrary.cache import (
+    film_cache,
+    statistics_cache,
+)
 from movielibrary.database import get_db
+from movielibrary.facets import SORT_NEWEST, FilmFilter, any_of
+from movielibrary.listing import catalog_snapshot, fetch_films_page
 from movielibrary.models import Film, FilmCountry, FilmGenre
-from movielibrary.schemas.film import FilmRead, FilmSearchResult
+from movielibrary.projections import (
+    Fields,
+    dump_films,
+    fields_dependency,
+    film_query,
+)
+from movielibrary.schemas.film import (
+    FilmBatch,
+    FilmBatchRequest,
+    FilmRead,
+    FilmSearchResult,
+)
+from movielibrary.sse import RETRY_MS, subscribe_events
+
+if TYPE_CHECKING:
+    from movielibrary.snapshot import CatalogSnapshot
 
 router = APIRouter()
 
+MAX_BATCH_SIZE = 200
+
 COMMON_FILM_OPTIONS = [
     selectinload(Film.genres).selectinload(FilmGenre.genre),
     selectinload(Film.countries).selectinload(FilmCountry.country),
@@ -17,31 +51,38 @@ COMMON_FILM_OPTIONS = [
 
 @router.get(
     "",
-    response_model=list[FilmRead],
+    response_model=None,
+    responses={200: {"model": list[FilmRead]}},
     summary="List Films",
     description="Возвращает список всех фильмов с жанрами и странами",
 )
-async def list_films(db: AsyncSession = Depends(get_db)):
-    stmt = select(Film).options(*COMMON_FILM_OPTIONS).order_by(desc(Film.id))
-    result = await db.execute(stmt)
-    films = result.unique().scalars().all()
-    return films
+async def list_films(
+    response: Response,
+    fields: Fields = Depends(fields_dependency("full")),
+    db: AsyncSession = Depends(get_db),
+    snapshot: Optional["CatalogSnapshot"] = Depends(catalog_snapshot),
+):
+    return await fetch_films_page(
+        db, snapshot, FilmFilter(), response, fields, None, None, SORT_NEWEST
+    )
 
 
 @router.get(
     "/search",
-    response_model=list[FilmSearchResult],
+    response_model=None,
+    responses={200: {"model": list[FilmSearchResult]}},
     summary="Search Films by Title",
     description="Позволяет искать фильмы по названию (частичное совпадение)",
 )
 async def search_films(
     q: str = Query(..., min_length=3, description="Название фильма"),
+    fields: Fields = Depends(fields_dependency("id,title,year,rating")),
     db: AsyncSession = Depends(get_db),
 ):
-    stmt = select(Film).filter(Film.title.ilike(f"%{q}%"))
+    stmt = film_query(fields).filter(Film.title.ilike(f"%{q}%"))
     result = await db.execute(stmt)
     films = result.scalars().all()
-    return films
+    return dump_films(films, fields)
 
 
 @router.get(
@@ -50,14 +91,126 @@ async def search_films(
     summary="Get films statistics",
     description="Показывает общую информацию о библиотеке фильмов",
 )
-async def get_films_statistics(db: AsyncSession = Depends(get_db)):
+async def get_films_statistics():
+    return await statistics_cache.load(None, load_statistics)
+
+
+async def load_statistics(db: AsyncSession) -> Dict[str, float]:
     result_count = await db.execute(select(func.count(Film.id)))
     films_count = result_count.scalar() or 0
 
     result_avg = await db.execute(select(func.avg(Film.rating)))
     average_rating = result_avg.scalar() or 0.0
 
-    return {"total_films": films_count, "average_rating": round(average_rating, 2)}
+    statistics = {
+        "total_films": films_count,
+        "average_rating": round(average_rating, 2),
+    }
+    return statistics
+
+
+@router.get(
+    "/events",
+    summary="Catalog Events",
+    description="Поток Server-Sent Events об изменениях каталога (film_created и др.); "
+    "поддерживает возобновление по заголовку Last-Event-ID",
+    response_class=StreamingResponse,
+)
+async def catalog_events(request: Request, last_event_id: Optional[str] = Header(None)):
+    broker = request.app.state.broker
+    if broker.full:
+        raise HTTPException(
+            status_code=503,
+            detail="Слишком много подписчиков, повторите позже",
+            headers={"Retry-After": str(RETRY_MS // 1000)},
+        )
+    return StreamingResponse(
+        subscribe_events(
+            broker, last_event_id, request.app.state.settings.sse_heartbeat_seconds
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def parse_ids(raw: str) -> List[int]:
+    """
+    Разбирает список id через запятую.
+    Raises:
+        HTTPException: 400 если в списке есть не числа
+    """
+    try:
+        return [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="ids должен быть списком чисел через запятую"
+        ) from None
+
+
+async def fetch_films_batch(db: AsyncSession, ids: List[int]) -> FilmBatch:
+    """
+    Загружает фильмы по списку id одним запросом (id = ANY(:ids)).
+    Фильмы из кэша не запрашиваются повторно; порядок ответа совпадает
+    с порядком ids, отсутствующие id перечисляются в missing.
+    Raises:
+        HTTPException: 400 если id больше MAX_BATCH_SIZE
+    """
+    ids = list(dict.fromkeys(ids))
+    if not ids or len(ids) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Нужно от 1 до {MAX_BATCH_SIZE} id за запрос",
+        )
+
+    found: Dict[int, FilmRead] = {}
+    versions = {}
+    for film_id in ids:
+        versions[film_id] = film_cache.version(film_id)
+        cached = film_cache.get(film_id)
+        if cached is not None:
+            found[film_id] = cached
+
+    to_load = [film_id for film_id in ids if film_id not in found]
+    if to_load:
+        stmt = (
+            select(Film).options(*COMMON_FILM_OPTIONS).filter(any_of(Film.id, to_load))
+        )
+        result = await db.execute(stmt)
+        for film in result.scalars().all():
+            found[film.id] = film_cache.put(
+                FilmRead.model_validate(film), film.id, version=versions[film.id]
+            )
+
+    return FilmBatch(
+        films=[found[film_id] for film_id in ids if film_id in found],
+        missing=[film_id for film_id in ids if film_id not in found],
+    )
+
+
+@router.get(
+    "/batch",
+    response_model=FilmBatch,
+    summary="Retrieve Films Batch",
+    description=f"Возвращает фильмы по списку id (до {MAX_BATCH_SIZE}) в порядке запроса; "
+    "ненайденные id перечисляются в missing",
+)
+async def retrieve_films_batch(
+    ids: str = Query(..., description="id фильмов через запятую", examples=["1,2,3"]),
+    db: AsyncSession = Depends(get_db),
+):
+    return await fetch_films_batch(db, parse_ids(ids))
+
+
+@router.post(
+    "/batch",
+    response_model=FilmBatch,
+    summary="Retrieve Films Batch (POST)",
+    description="То же, что GET /batch, для длинных списков id в теле запроса",
+)
+async def retrieve_films_batch_post(
+    body: FilmBatchRequest, db: AsyncSession = Depends(get_db)
+):
+    return await fetch_films_batch(db, body.ids)
 
 
 @router.get(
@@ -67,9 +220,14 @@ async def get_films_statistics(db: AsyncSession = Depends(get_db)):
     description="Возвращает подробную информацию о фильме по его ID, включая жанры и страны",
 )
 async def retrieve_film(film_id: int, db: AsyncSession = Depends(get_db)):
+    version = film_cache.version(film_id)
+    cached = film_cache.get(film_id)
+    if cached is not None:
+        return cached
+
     stmt = select(Film).options(*COMMON_FILM_OPTIONS).filter(Film.id == film_id)
     result = await db.execute(stmt)
     film = result.unique().scalars().first()
     if not film:
         raise HTTPException(status_code=404, detail="Фильм не найден")
-    return film
+    return film_cache.put(FilmRead.model_validate(film), film_id, version=version)
@@ -1,22 +1,29 @@
-from typing import List
+from typing import TYPE_CHECKING, List, Literal, Optional
 
-from fastapi import APIRouter, Depends
-from fastapi.templating import Jinja2Templates
-from sqlalchemy import desc, select
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from movielibrary.database import get_db
-from movielibrary.models import Country, Film, FilmCountry, FilmGenre, Genre
+from movielibrary.facets import SORT_NEWEST, FilmFilter
+from movielibrary.listing import catalog_snapshot, fetch_films_page
+from movielibrary.models import Country, Genre
+from movielibrary.models.enums import MediaType
+from movielibrary.projections import Fields, fields_dependency
 from movielibrary.schemas.film import FilmRead
 
-templates = Jinja2Templates(directory="movielibrary/templates")
+if TYPE_CHECKING:
+    from movielibrary.snapshot import CatalogSnapshot
+
 router = APIRouter()
 
-COMMON_FILM_OPTIONS = [
-    selectinload(Film.genres).selectinload(FilmGenre.genre),
-    selectinload(Film.countries).selectinload(FilmCountry.country),
-]
+MAX_PAGE_LIMIT = 100
+
+film_fields = fields_dependency("full")
+CURSOR_QUERY = Query(None, description="Курсор из заголовка X-Next-Cursor")
+LIMIT_QUERY = Query(
+    None, ge=1, le=MAX_PAGE_LIMIT, description="Максимальное число фильмов в ответе"
+)
 
 
 @router.get(
@@ -41,80 +48,150 @@ async def list_countries(db: AsyncSession = Depends(get_db)):
 
 @router.get(
     "/genres/{genre_name}",
-    response_model=List[FilmRead],
+    response_model=None,
+    responses={200: {"model": List[FilmRead]}},
     summary="List Films By Genre",
     description="Возвращает список всех фильмов, отфильтрованными по выбранному жанру",
 )
-async def read_films_by_genre(genre_name: str, db: AsyncSession = Depends(get_db)):
-    stmt = (
-        select(Film)
-        .options(*COMMON_FILM_OPTIONS)
-        .join(Film.genres)
-        .join(FilmGenre.genre)
-        .filter(Genre.name == genre_name)
-        .order_by(desc(Film.id))
+async def read_films_by_genre(
+    genre_name: str,
+    response: Response,
+    fields: Fields = Depends(film_fields),
+    cursor: Optional[str] = CURSOR_QUERY,
+    limit: Optional[int] = LIMIT_QUERY,
+    db: AsyncSession = Depends(get_db),
+    snapshot: Optional["CatalogSnapshot"] = Depends(catalog_snapshot),
+):
+    return await fetch_films_page(
+        db,
+        snapshot,
+        FilmFilter(genres=(genre_name,)),
+        response,
+        fields,
+        cursor,
+        limit,
+        SORT_NEWEST,
     )
-    result = await db.execute(stmt)
-    films = result.scalars().all()
-    films_for_response = [FilmRead.model_validate(film) for film in films]
-    return films_for_response
 
 
 @router.get(
     "/countries/{country_name}",
-    response_model=List[FilmRead],
+    response_model=None,
+    responses={200: {"model": List[FilmRead]}},
     summary="List Films By Country",
     description="Возвращает список всех фильмов, отфильтрованными по выбранной стране",
 )
-async def read_films_by_country(country_name: str, db: AsyncSession = Depends(get_db)):
-    stmt = (
-        select(Film)
-        .options(*COMMON_FILM_OPTIONS)
-        .join(Film.countries)
-        .join(FilmCountry.country)
-        .filter(Country.name == country_name)
-        .order_by(desc(Film.id))
+async def read_films_by_country(
+    country_name: str,
+    response: Response,
+    fields: Fields = Depends(film_fields),
+    cursor: Optional[str] = CURSOR_QUERY,
+    limit: Optional[int] = LIMIT_QUERY,
+    db: AsyncSession = Depends(get_db),
+    snapshot: Optional["CatalogSnapshot"] = Depends(catalog_snapshot),
+):
+    return await fetch_films_page(
+        db,
+        snapshot,
+        FilmFilter(countries=(country_name,)),
+        response,
+        fields,
+        cursor,
+        limit,
+        SORT_NEWEST,
     )
 
-    result = await db.execute(stmt)
-    films = result.scalars().all()
-    films_for_response = [FilmRead.model_validate(film) for film in films]
-    return films_for_response
+
+@router.get(
+    "/films",
+    response_model=None,
+    responses={200: {"model": List[FilmRead]}},
+    summary="Filter Films",
+    description="Возвращает фильмы, у которых есть все указанные жанры и страны, "
+    "с годом и рейтингом в заданных пределах; по умолчанию сначала новые",
+)
+async def filter_films(
+    response: Response,
+    genre: List[str] = Query([], description="Жанр; можно указать несколько"),
+    country: List[str] = Query([], description="Страна; можно указать несколько"),
+    year_from: Optional[int] = Query(None, description="Год выпуска от"),
+    year_to: Optional[int] = Query(None, description="Год выпуска до"),
+    rating_from: Optional[float] = Query(None, ge=0, le=10, description="Рейтинг от"),
+    rating_to: Optional[float] = Query(None, ge=0, le=10, description="Рейтинг до"),
+    type: Optional[MediaType] = Query(None, description="Фильм или сериал"),
+    sort: Literal["newest", "rating"] = Query(
+        SORT_NEWEST, description="newest — сначала новые, rating — по рейтингу"
+    ),
+    fields: Fields = Depends(film_fields),
+    cursor: Optional[str] = CURSOR_QUERY,
+    limit: Optional[int] = LIMIT_QUERY,
+    db: AsyncSession = Depends(get_db),
+    snapshot: Optional["CatalogSnapshot"] = Depends(catalog_snapshot),
+):
+    flt = FilmFilter(
+        genres=tuple(genre),
+        countries=tuple(country),
+        year_from=year_from,
+        year_to=year_to,
+        rating_from=rating_from,
+        rating_to=rating_to,
+        type=type,
+    )
+    return await fetch_films_page(
+        db, snapshot, flt, response, fields, cursor, limit, sort
+    )
 
 
 @router.get(
     "/years/{year}",
-    response_model=List[FilmRead],
+    response_model=None,
+    responses={200: {"model": List[FilmRead]}},
     summary="List Films By Year",
     description="Возвращает список всех фильмов, отфильтрованными по выбранному году выпуска",
 )
-async def read_films_by_year(year: int, db: AsyncSession = Depends(get_db)):
-    stmt = (
-        select(Film)
-        .options(*COMMON_FILM_OPTIONS)
-        .filter(Film.year == year)
-        .order_by(desc(Film.id))
+async def read_films_by_year(
+    year: int,
+    response: Response,
+    fields: Fields = Depends(film_fields),
+    cursor: Optional[str] = CURSOR_QUERY,
+    limit: Optional[int] = LIMIT_QUERY,
+    db: AsyncSession = Depends(get_db),
+    snapshot: Optional["CatalogSnapshot"] = Depends(catalog_snapshot),
+):
+    return await fetch_films_page(
+        db,
+        snapshot,
+        FilmFilter(year_from=year, year_to=year),
+        response,
+        fields,
+        cursor,
+        limit,
+        SORT_NEWEST,
     )
 
-    result = await db.execute(stmt)
-    films = result.scalars().all()
-    films_for_response = [FilmRead.model_validate(film) for film in films]
-    return films_for_response
-
 
 @router.get(
     "/series",
-    response_model=List[FilmRead],
+    response_model=None,
+    responses={200: {"model": List[FilmRead]}},
     summary="List Films",
     description="Возвращает список всех сериалов с жанрами и странами",
 )
-async def list_series(db: AsyncSession = Depends(get_db)):
-    stmt = (
-        select(Film)
-        .options(*COMMON_FILM_OPTIONS)
-        .filter(Film.type == "series")
-        .order_by(desc(Film.id))
+async def list_series(
+    response: Response,
+    fields: Fields = Depends(film_fields),
+    cursor: Optional[str] = CURSOR_QUERY,
+    limit: Optional[int] = LIMIT_QUERY,
+    db: AsyncSession = Depends(get_db),
+    snapshot: Optional["CatalogSnapshot"] = Depends(catalog_snapshot),
+):
+    return await fetch_films_page(
+        db,
+        snapshot,
+        FilmFilter(type=MediaType.series),
+        response,
+        fields,
+        cursor,
+        limit,
+        SORT_NEWEST,
     )
-    result = await db.execute(stmt)
-    films = result.scalars().all()
-    return films
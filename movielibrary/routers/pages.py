@@ -3,7 +3,6 @@ from typing import List, Optional
 
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     Depends,
     Form,
     HTTPException,
@@ -12,7 +11,6 @@ from fastapi import (
     status,
 )
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from pydantic import ValidationError
 from sqlalchemy import desc, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -26,16 +24,20 @@ from movielibrary.auth_utils import (
     get_user_by_email,
     verify_password,
 )
+from movielibrary.bus import publish_change
+from movielibrary.cache import FILM, apply_change, catalog_reads, query_key
 from movielibrary.database import get_db
+from movielibrary.facets import has_countries, has_genres
+from movielibrary.images import poster_srcset, poster_url
 from movielibrary.models import Country, Film, FilmCountry, FilmGenre, Genre, User
 from movielibrary.models.enums import MediaType
+from movielibrary.outbox import add_event
+from movielibrary.projections import CARD, film_query, project_films
 from movielibrary.schemas.film import FilmCreate, FilmRead
 from movielibrary.schemas.user import UserCreate
-from movielibrary.send_email import send_email_async
-from settings import settings
+from movielibrary.templating import StreamingTemplates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="movielibrary/templates")
 
 COMMON_FILM_OPTIONS = [
     selectinload(Film.genres).selectinload(FilmGenre.genre),
@@ -45,27 +47,68 @@ COMMON_FILM_OPTIONS = [
 MINUTE_IN_SECONDS = 60
 
 
-async def get_all_genres(db: AsyncSession):
+def token_max_age(request: Request) -> int:
+    """Срок жизни cookie access_token в секундах."""
+    settings = request.app.state.settings
+    return int(settings.access_token_expire_minutes) * MINUTE_IN_SECONDS
+
+
+def create_templates() -> StreamingTemplates:
+    return StreamingTemplates(
+        directory="movielibrary/templates",
+        globals={"poster_url": poster_url, "poster_srcset": poster_srcset},
+    )
+
+
+async def load_genres(db: AsyncSession):
     result = await db.execute(select(Genre))
     return result.scalars().all()
 
 
+async def get_all_genres():
+    return await catalog_reads.load(query_key("genres"), load_genres)
+
+
+async def load_latest_films(db: AsyncSession):
+    stmt = film_query(CARD).order_by(desc(Film.id)).limit(5)
+    result = await db.execute(stmt)
+    return project_films(result.scalars().all(), CARD)
+
+
+async def load_genre_page(db: AsyncSession, genre_name: str, page: int, page_size: int):
+    """
+    Returns:
+        Общее число фильмов жанра и карточки фильмов страницы
+    """
+    total_stmt = select(func.count()).select_from(Film).filter(has_genres(genre_name))
+    total_result = await db.execute(total_stmt)
+    total_films = total_result.scalar()
+
+    stmt = (
+        film_query(CARD)
+        .filter(has_genres(genre_name))
+        .order_by(desc(Film.id))
+        .limit(page_size)
+        .offset((page - 1) * page_size)
+    )
+    result = await db.execute(stmt)
+    return total_films, project_films(result.scalars().all(), CARD)
+
+
 @router.get("/", response_class=HTMLResponse, summary="Read Films")
 async def read_films(
     request: Request,
-    db: AsyncSession = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional),
 ):
-    stmt = select(Film).options(*COMMON_FILM_OPTIONS).order_by(desc(Film.id)).limit(5)
-    result = await db.execute(stmt)
-    films = result.scalars().all()
-    films_for_template = [FilmRead.model_validate(film) for film in films]
-    genres_for_template = await get_all_genres(db)
+    films_for_template = await catalog_reads.load(
+        query_key("latest_films", limit=5), load_latest_films
+    )
+    genres_for_template = await get_all_genres()
 
     page = 1
     total_pages = 1
 
-    return templates.TemplateResponse(
+    return request.app.state.templates.TemplateResponse(
         "index.html",
         {
             "request": request,
@@ -80,7 +123,9 @@ async def read_films(
 
 @router.get("/register", response_class=HTMLResponse, summary="Register Form")
 async def register_form(request: Request):
-    return templates.TemplateResponse("register.html", {"request": request})
+    return request.app.state.templates.TemplateResponse(
+        "register.html", {"request": request}
+    )
 
 
 @router.post("/register", response_class=HTMLResponse, summary="Register")
@@ -115,7 +160,7 @@ async def register(
             status_code=500, detail="Ошибка при создании пользователя"
         ) from None
 
-    token = create_access_token(email=new_user.email)
+    token = create_access_token(new_user.email, request.app.state.settings)
     response = RedirectResponse(url="/", status_code=status.HTTP_302_FOUND)
     response.set_cookie(
         key="access_token",
@@ -123,7 +168,7 @@ async def register(
         httponly=True,
         secure=True,
         samesite="lax",
-        max_age=int(settings.access_token_expire_minutes) * MINUTE_IN_SECONDS,
+        max_age=token_max_age(request),
         path="/",
     )
     return response
@@ -131,7 +176,9 @@ async def register(
 
 @router.get("/login", response_class=HTMLResponse, summary="Login Form")
 async def login_form(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request})
+    return request.app.state.templates.TemplateResponse(
+        "login.html", {"request": request}
+    )
 
 
 @router.post("/login", response_class=HTMLResponse, summary="Login")
@@ -150,7 +197,7 @@ async def login(
     user.last_login = datetime.utcnow()
     await db.commit()
 
-    token = create_access_token(email=user.email)
+    token = create_access_token(user.email, request.app.state.settings)
     response = RedirectResponse(url="/", status_code=status.HTTP_302_FOUND)
     response.set_cookie(
         key="access_token",
@@ -158,7 +205,7 @@ async def login(
         httponly=True,
         secure=True,
         samesite="lax",
-        max_age=int(settings.access_token_expire_minutes) * MINUTE_IN_SECONDS,
+        max_age=token_max_age(request),
         path="/",
     )
     return response
@@ -169,7 +216,7 @@ async def account(
     request: Request,
     current_user: Optional[User] = Depends(get_current_user_optional),
 ):
-    return templates.TemplateResponse(
+    return request.app.state.templates.TemplateResponse(
         "account.html",
         {
             "request": request,
@@ -196,7 +243,7 @@ async def change_password(
     current_user.password_hash = get_password_hash(new_password)
     db.add(current_user)
     await db.commit()
-    return templates.TemplateResponse(
+    return request.app.state.templates.TemplateResponse(
         "account.html",
         {
             "request": request,
@@ -230,8 +277,7 @@ async def list_series(
     total_films = total_result.scalar()
 
     stmt = (
-        select(Film)
-        .options(*COMMON_FILM_OPTIONS)
+        film_query(CARD)
         .filter(Film.type == "series")
         .order_by(desc(Film.id))
         .limit(page_size)
@@ -240,12 +286,12 @@ async def list_series(
     result = await db.execute(stmt)
     films = result.scalars().all()
 
-    genres_for_template = await get_all_genres(db)
-    films_for_template = [FilmRead.model_validate(film) for film in films]
+    genres_for_template = await get_all_genres()
+    films_for_template = project_films(films, CARD)
 
     total_pages = (total_films + page_size - 1) // page_size
 
-    return templates.TemplateResponse(
+    return request.app.state.templates.TemplateResponse(
         "index.html",
         {
             "request": request,
@@ -272,18 +318,13 @@ async def search_films(
         total_pages = 0
     else:
         total_stmt = (
-            select(func.count(Film.id.distinct()))
-            .select_from(Film)
-            .join(Film.genres)
-            .join(FilmGenre.genre)
-            .filter(Film.title.ilike(f"%{q}%"))
+            select(func.count()).select_from(Film).filter(Film.title.ilike(f"%{q}%"))
         )
         total_result = await db.execute(total_stmt)
         total_films = total_result.scalar()
 
         stmt = (
-            select(Film)
-            .options(*COMMON_FILM_OPTIONS)
+            film_query(CARD)
             .filter(Film.title.ilike(f"%{q}%"))
             .order_by(desc(Film.id))
             .limit(page_size)
@@ -291,11 +332,11 @@ async def search_films(
         )
         result = await db.execute(stmt)
         films = result.scalars().all()
-        films_for_template = [FilmRead.model_validate(film) for film in films]
+        films_for_template = project_films(films, CARD)
         total_pages = (total_films + page_size - 1) // page_size
 
-    genres_for_template = await get_all_genres(db)
-    return templates.TemplateResponse(
+    genres_for_template = await get_all_genres()
+    return request.app.state.templates.TemplateResponse(
         "index.html",
         {
             "request": request,
@@ -314,40 +355,20 @@ async def search_films(
 async def read_films_by_genre(
     genre_name: str,
     request: Request,
-    db: AsyncSession = Depends(get_db),
     page: int = Query(1, ge=1),
     page_size: int = 5,
     current_user: Optional[User] = Depends(get_current_user_optional),
 ):
-    total_stmt = (
-        select(func.count(Film.id.distinct()))
-        .select_from(Film)
-        .join(Film.genres)
-        .join(FilmGenre.genre)
-        .filter(Genre.name == genre_name)
-    )
-    total_result = await db.execute(total_stmt)
-    total_films = total_result.scalar()
-
-    stmt = (
-        select(Film)
-        .options(*COMMON_FILM_OPTIONS)
-        .join(Film.genres)
-        .join(FilmGenre.genre)
-        .filter(Genre.name == genre_name)
-        .order_by(desc(Film.id))
-        .limit(page_size)
-        .offset((page - 1) * page_size)
+    total_films, films_for_template = await catalog_reads.load(
+        query_key("genre_page", genre=genre_name, page=page, page_size=page_size),
+        lambda db: load_genre_page(db, genre_name, page, page_size),
     )
-    result = await db.execute(stmt)
-    films = result.scalars().all()
-    films_for_template = [FilmRead.model_validate(film) for film in films]
 
-    genres_for_template = await get_all_genres(db)
+    genres_for_template = await get_all_genres()
 
     total_pages = (total_films + page_size - 1) // page_size
 
-    return templates.TemplateResponse(
+    return request.app.state.templates.TemplateResponse(
         "index.html",
         {
             "request": request,
@@ -374,34 +395,27 @@ async def read_films_by_country(
     current_user: Optional[User] = Depends(get_current_user_optional),
 ):
     total_stmt = (
-        select(func.count(Film.id.distinct()))
-        .select_from(Film)
-        .join(Film.countries)
-        .join(FilmCountry.country)
-        .filter(Country.name == country_name)
+        select(func.count()).select_from(Film).filter(has_countries(country_name))
     )
     total_result = await db.execute(total_stmt)
     total_films = total_result.scalar()
 
     stmt = (
-        select(Film)
-        .options(*COMMON_FILM_OPTIONS)
-        .join(Film.countries)
-        .join(FilmCountry.country)
-        .filter(Country.name == country_name)
+        film_query(CARD)
+        .filter(has_countries(country_name))
         .order_by(desc(Film.id))
         .limit(page_size)
         .offset((page - 1) * page_size)
     )
     result = await db.execute(stmt)
     films = result.scalars().all()
-    films_for_template = [FilmRead.model_validate(film) for film in films]
+    films_for_template = project_films(films, CARD)
 
-    genres_for_template = await get_all_genres(db)
+    genres_for_template = await get_all_genres()
 
     total_pages = (total_films + page_size - 1) // page_size
 
-    return templates.TemplateResponse(
+    return request.app.state.templates.TemplateResponse(
         "index.html",
         {
             "request": request,
@@ -428,8 +442,7 @@ async def read_films_by_year(
     total_films = total_result.scalar()
 
     stmt = (
-        select(Film)
-        .options(*COMMON_FILM_OPTIONS)
+        film_query(CARD)
         .filter(Film.year == year)
         .order_by(desc(Film.id))
         .limit(page_size)
@@ -437,13 +450,13 @@ async def read_films_by_year(
     )
     result = await db.execute(stmt)
     films = result.scalars().all()
-    films_for_template = [FilmRead.model_validate(film) for film in films]
+    films_for_template = project_films(films, CARD)
 
-    genres_for_template = await get_all_genres(db)
+    genres_for_template = await get_all_genres()
 
     total_pages = (total_films + page_size - 1) // page_size
 
-    return templates.TemplateResponse(
+    return request.app.state.templates.TemplateResponse(
         "index.html",
         {
             "request": request,
@@ -468,8 +481,8 @@ async def read_film(
     film = result.scalars().first()
     film = FilmRead.model_validate(film)
     page_title = film.title
-    genres_for_template = await get_all_genres(db)
-    return templates.TemplateResponse(
+    genres_for_template = await get_all_genres()
+    return request.app.state.templates.TemplateResponse(
         "film_details.html",
         {
             "request": request,
@@ -495,7 +508,7 @@ async def show_create_film_form(
     result_country = await db.execute(stmt_country)
     country_list = result_country.scalars().all()
 
-    return templates.TemplateResponse(
+    return request.app.state.templates.TemplateResponse(
         "create.html",
         {
             "request": request,
@@ -508,7 +521,7 @@ async def show_create_film_form(
 
 @router.post("/create", summary="Create Film")
 async def create_film(
-    background_tasks: BackgroundTasks,
+    request: Request,
     title: str = Form(..., min_length=1),
     year: int = Form(..., ge=1895),
     rating: float = Form(..., ge=0, le=10),
@@ -521,7 +534,7 @@ async def create_film(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user_required),
 ):
-    if code != settings.valid_code:
+    if code != request.app.state.settings.valid_code:
         raise HTTPException(status_code=400, detail="Неверный код доступа")
 
     try:
@@ -564,12 +577,16 @@ async def create_film(
         for country_id in countries:
             db.add(FilmCountry(film_id=new_film.id, country_id=country_id))
 
+        # письмо отправит outbox-воркер после фиксации транзакции
+        add_event(db, "film_created", {"film_id": new_film.id, "title": new_film.title})
+        # остальные воркеры сбросят кэши по уведомлению после commit
+        await publish_change(db, FILM, new_film.id, "created")
         await db.commit()
     except Exception:
         await db.rollback()
         raise HTTPException(
             status_code=500, detail="Ошибка при создании фильма"
         ) from None
+    apply_change(FILM, new_film.id)
 
-    background_tasks.add_task(send_email_async, new_film.title)
     return RedirectResponse(url="/", status_code=status.HTTP_302_FOUND)
@@ -0,0 +1,165 @@
+import asyncio
+import multiprocessing
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from PIL import UnidentifiedImageError
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from movielibrary.database import get_db
+from movielibrary.images import (
+    POSTER_MEDIA_TYPES,
+    POSTER_VARIANTS,
+    PosterCache,
+    choose_format,
+    render_variant,
+    variant_key,
+)
+from movielibrary.models import Film
+from settings import Settings
+
+router = APIRouter()
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+FETCH_TIMEOUT_SECONDS = 10
+MEGABYTE = 1024 * 1024
+
+
+class SourceTooLarge(Exception):
+    pass
+
+
+class Posters:
+    """
+    Постеры приложения по настройкам create_app: дисковый кэш, пул
+    процессов рендеринга и источник исходников. Кэш и пул создаются
+    при первом запросе постера, а не при старте приложения.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._cache: Optional[PosterCache] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight: dict[str, asyncio.Task] = {}
+
+    @property
+    def cache(self) -> PosterCache:
+        if self._cache is None:
+            self._cache = PosterCache(
+                Path(self.settings.poster_cache_dir),
+                max_bytes=self.settings.poster_cache_max_mb * MEGABYTE,
+            )
+        return self._cache
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.settings.poster_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def fetch_original(self, photo: str) -> bytes:
+        """
+        Скачивает исходник постера, читая не больше POSTER_SOURCE_MAX_MB.
+        Raises:
+            SourceTooLarge: Исходник больше допустимого размера
+        """
+        max_bytes = self.settings.poster_source_max_mb * MEGABYTE
+        url = f"{self.settings.poster_source_url}/{quote(photo)}"
+        with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT_SECONDS) as resp:
+            data = resp.read(max_bytes + 1)
+        if len(data) > max_bytes:
+            raise SourceTooLarge(photo)
+        return data
+
+    async def _render_and_store(
+        self, photo: str, variant: str, fmt: str, key: str
+    ) -> Path:
+        loop = asyncio.get_running_loop()
+        source = await asyncio.to_thread(self.fetch_original, photo)
+        data = await loop.run_in_executor(
+            self.executor, render_variant, source, POSTER_VARIANTS[variant], fmt
+        )
+        return await asyncio.to_thread(self.cache.put, key, fmt, data)
+
+    async def variant_path(self, photo: str, variant: str, fmt: str) -> Path:
+        """
+        Возвращает путь к варианту постера, создавая его при первом запросе.
+        Одновременные запросы одного и того же варианта ждут общую задачу.
+        """
+        key = variant_key(photo, variant, fmt)
+        cached = self.cache.get(key, fmt)
+        if cached:
+            return cached
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._render_and_store(photo, variant, fmt, key))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+
+async def photo_in_catalog(db: AsyncSession, photo: str) -> bool:
+    return bool(await db.scalar(select(exists().where(Film.photo == photo))))
+
+
+@router.get(
+    "/{variant}/{photo}",
+    response_class=FileResponse,
+    summary="Read Poster Variant",
+    description="Возвращает уменьшенную копию постера в формате WebP или AVIF",
+)
+async def read_poster(
+    variant: str, photo: str, request: Request, db: AsyncSession = Depends(get_db)
+):
+    if variant not in POSTER_VARIANTS or photo.startswith(".") or ".." in photo:
+        raise HTTPException(status_code=404, detail="Постер не найден")
+
+    fmt = choose_format(request.headers.get("accept", ""))
+    etag = f'"{variant_key(photo, variant, fmt)}"'
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": etag, "Vary": "Accept"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    # рендерятся только постеры фильмов каталога: произвольные имена
+    # не должны занимать пул рендеринга и дисковый кэш
+    posters: Posters = request.app.state.posters
+    cached = posters.cache.get(variant_key(photo, variant, fmt), fmt)
+    if cached is None and not await photo_in_catalog(db, photo):
+        raise HTTPException(status_code=404, detail="Постер не найден")
+
+    try:
+        path = cached or await posters.variant_path(photo, variant, fmt)
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            raise HTTPException(status_code=404, detail="Постер не найден") from None
+        raise HTTPException(
+            status_code=502, detail="Не удалось загрузить постер"
+        ) from None
+    except UnidentifiedImageError:
+        raise HTTPException(status_code=404, detail="Постер не найден") from None
+    except SourceTooLarge:
+        raise HTTPException(
+            status_code=502, detail="Исходник постера слишком большой"
+        ) from None
+    except OSError:
+        raise HTTPException(
+            status_code=502, detail="Не удалось загрузить постер"
+        ) from None
+
+    return FileResponse(path, media_type=POSTER_MEDIA_TYPES[fmt], headers=headers)
@@ -0,0 +1,78 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+from movielibrary.models.enums import MediaType
+
+MAX_BULK_IDS = 10_000
+
+
+class FilmSelector(BaseModel):
+    """
+    Набор фильмов для массовой операции: список id и/или фильтр.
+    Все указанные условия объединяются через AND.
+    """
+
+    ids: Optional[List[int]] = Field(None, max_length=MAX_BULK_IDS)
+    genre: Optional[str] = None
+    country: Optional[str] = None
+    year: Optional[int] = None
+    type: Optional[MediaType] = None
+
+    @model_validator(mode="after")
+    def validate_not_empty(self):
+        if not any(
+            value is not None
+            for value in (self.ids, self.genre, self.country, self.year, self.type)
+        ):
+            raise ValueError("Нужно указать ids или хотя бы одно условие фильтра")
+        return self
+
+
+class LinksUpdate(BaseModel):
+    """Массовое добавление и удаление жанров или стран у выбранных фильмов."""
+
+    films: FilmSelector
+    add: List[str] = []
+    remove: List[str] = []
+
+    @model_validator(mode="after")
+    def validate_changes(self):
+        if not self.add and not self.remove:
+            raise ValueError("Нужно указать add или remove")
+        if set(self.add) & set(self.remove):
+            raise ValueError("Одно значение нельзя одновременно добавить и удалить")
+        return self
+
+
+class BulkDeleteResult(BaseModel):
+    deleted: int
+
+
+class LinksUpdateResult(BaseModel):
+    added: int
+    removed: int
+
+
+class ProfileInfo(BaseModel):
+    id: int
+    method: str
+    path: str
+    started_at: float
+    duration: float
+    samples: int
+
+
+class MemoryStat(BaseModel):
+    trace: List[str]
+    size: int
+    count: int
+    size_diff: Optional[int] = None
+    count_diff: Optional[int] = None
+
+
+class MemorySnapshotInfo(BaseModel):
+    id: int
+    traced_current: int
+    traced_peak: int
+    top: List[MemoryStat]
@@ -44,6 +44,15 @@ class FilmCreate(FilmBase):
     photo: str
 
 
+class FilmBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+
+class FilmBatch(BaseModel):
+    films: List[FilmRead]
+    missing: List[int]
+
+
 class FilmSearchResult(BaseModel):
     id: int
     title: str
@@ -1,31 +1,269 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from email.message import Message
 from email.mime.text import MIMEText
+from typing import List, Optional, Sequence, Tuple
 
 import aiosmtplib
 
-from settings import settings
-
-sender_email = settings.email
-password = settings.email_app_password
-receiver_emails = [
-    email.strip() for email in settings.receiver_emails.split(",") if email.strip()
-]
-
-
-async def send_email_async(title: str) -> None:
-    for receiver_email in receiver_emails:
-        text = f"На https://filmlibrary.ru добавлен новый фильм: {title}"
-        msg = MIMEText(text, "plain")
-        msg["From"] = f'"FilmLibrary" <{sender_email}>'
-        msg["To"] = receiver_email
-        msg["Subject"] = "Привет от FilmLibrary!"
-
-        await aiosmtplib.send(
-            msg,
-            sender=sender_email,
-            recipients=[receiver_email],
-            hostname="smtp.yandex.ru",
-            port=465,
-            username=sender_email,
-            password=password,
-            use_tls=True,
+from settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Соединение, простоявшее дольше, переоткрывается: сервер мог его уже закрыть
+IDLE_TIMEOUT_SECONDS = 60
+RETRY_BASE_DELAY_SECONDS = 1.0
+
+
+@dataclass
+class BatchReport:
+    """Итог отправки пачки писем."""
+
+    sent: int = 0
+    failed: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def per_second(self) -> float:
+        return self.sent / self.elapsed if self.elapsed else float(self.sent)
+
+
+@dataclass
+class _Connection:
+    client: aiosmtplib.SMTP
+    last_used: float = 0.0
+
+
+class SMTPPool:
+    """
+    Пул авторизованных SMTP-соединений.
+    Число одновременных отправок ограничено размером пула; упавшее соединение
+    закрывается, а письмо повторяется на новом с экспоненциальной задержкой.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        sender: str,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        size: int = 3,
+        max_retries: int = 3,
+        retry_delay: float = RETRY_BASE_DELAY_SECONDS,
+        timeout: float = 30,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self._idle: List[_Connection] = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def _connect(self) -> _Connection:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            use_tls=self.use_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        return _Connection(client)
+
+    async def _acquire(self) -> _Connection:
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                conn = self._idle.pop()
+                idle_for = time.monotonic() - conn.last_used
+                if conn.client.is_connected and idle_for < IDLE_TIMEOUT_SECONDS:
+                    return conn
+                self._discard(conn)
+            return await self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn: _Connection) -> None:
+        conn.last_used = time.monotonic()
+        self._idle.append(conn)
+        self._slots.release()
+
+    def _discard(self, conn: _Connection) -> None:
+        try:
+            conn.client.close()
+        except Exception:
+            pass
+
+    async def send(self, message: Message, recipients: Sequence[str]) -> None:
+        """
+        Отправляет письмо через соединение из пула.
+        Raises:
+            aiosmtplib.SMTPException: Если письмо не ушло после всех повторов
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                conn = await self._acquire()
+            except (aiosmtplib.SMTPException, OSError):
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self.retry_delay * 2**attempt)
+                continue
+
+            try:
+                await conn.client.send_message(
+                    message, sender=self.sender, recipients=list(recipients)
+                )
+            except BaseException as e:
+                # в том числе отмена задачи: иначе соединение и слот пула
+                # теряются, и после size отмен отправка ждёт вечно
+                self._discard(conn)
+                self._slots.release()
+                if not isinstance(e, (aiosmtplib.SMTPException, OSError)):
+                    raise
+                permanent = (
+                    isinstance(e, aiosmtplib.SMTPResponseException) and e.code >= 500
+                )
+                if permanent or attempt == self.max_retries:
+                    raise
+                logger.warning(
+                    "SMTP send failed (%s), retry %d/%d",
+                    e,
+                    attempt + 1,
+                    self.max_retries,
+                )
+                await asyncio.sleep(self.retry_delay * 2**attempt)
+            else:
+                self._release(conn)
+                return
+
+    async def send_many(
+        self, messages: Sequence[Tuple[Message, Sequence[str]]]
+    ) -> BatchReport:
+        """
+        Отправляет пачку писем параллельно (не больше size одновременно).
+        Args:
+            messages: Пары (письмо, получатели)
+        Returns:
+            Отчёт с числом отправленных писем, ошибками и скоростью
+        """
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(self.send(message, recipients) for message, recipients in messages),
+            return_exceptions=True,
+        )
+        report = BatchReport(elapsed=time.perf_counter() - started)
+        for (_, recipients), result in zip(messages, results, strict=True):
+            if isinstance(result, BaseException):
+                report.failed.extend(recipients)
+                logger.error("Не удалось отправить письмо %s: %s", recipients, result)
+            else:
+                report.sent += 1
+        logger.info(
+            "Отправлено писем: %d за %.2f с (%.1f/с), ошибок: %d",
+            report.sent,
+            report.elapsed,
+            report.per_second,
+            len(report.failed),
         )
+        return report
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                await conn.client.quit()
+            except (aiosmtplib.SMTPException, OSError):
+                self._discard(conn)
+
+
+_mailer: Optional[SMTPPool] = None
+_receivers: List[str] = []
+
+
+def configure_mailer(settings: Settings) -> None:
+    """
+    Настраивает почтовый пул и получателей по настройкам процесса,
+    который отправляет письма (воркера outbox). Соединения открываются
+    при первой отправке.
+    """
+    global _mailer, _receivers
+    _mailer = SMTPPool(
+        hostname=settings.smtp_hostname,
+        port=settings.smtp_port,
+        sender=settings.email,
+        username=settings.email,
+        password=settings.email_app_password,
+        use_tls=True,
+        size=settings.smtp_pool_size,
+    )
+    _receivers = [
+        email.strip() for email in settings.receiver_emails.split(",") if email.strip()
+    ]
+
+
+def receiver_emails() -> List[str]:
+    return list(_receivers)
+
+
+def get_mailer() -> SMTPPool:
+    if _mailer is None:
+        raise RuntimeError("Почта не настроена: сначала вызовите configure_mailer")
+    return _mailer
+
+
+async def close_mailer() -> None:
+    global _mailer
+    if _mailer is not None:
+        await _mailer.close()
+        _mailer = None
+
+
+def build_message(sender: str, receiver_email: str, text: str) -> MIMEText:
+    msg = MIMEText(text, "plain")
+    msg["From"] = f'"FilmLibrary" <{sender}>'
+    msg["To"] = receiver_email
+    msg["Subject"] = "Привет от FilmLibrary!"
+    return msg
+
+
+def new_films_text(titles: Sequence[str]) -> str:
+    if len(titles) == 1:
+        return f"На https://filmlibrary.ru добавлен новый фильм: {titles[0]}"
+    lines = "\n".join(f"- {title}" for title in titles)
+    return f"На https://filmlibrary.ru добавлены новые фильмы:\n{lines}"
+
+
+async def send_email_async(title: str) -> BatchReport:
+    return await send_films_email_async([title])
+
+
+async def send_films_email_async(
+    titles: Sequence[str], recipients: Optional[Sequence[str]] = None
+) -> BatchReport:
+    """
+    Отправляет каждому получателю одно письмо со всеми добавленными фильмами.
+    Args:
+        titles: Названия добавленных фильмов
+        recipients: Получатели; по умолчанию RECEIVER_EMAILS
+    """
+    mailer = get_mailer()
+    text = new_films_text(titles)
+    if recipients is None:
+        recipients = receiver_emails()
+    messages = [
+        (build_message(mailer.sender, receiver_email, text), [receiver_email])
+        for receiver_email in recipients
+    ]
+    return await mailer.send_many(messages)
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Set
+
+import asyncpg
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Сколько разных форм запросов держать в сводке
+MAX_SHAPES = 500
+MAX_STATEMENT_LENGTH = 4000
+# EXPLAIN ANALYZE выполняет запрос, поэтому на побочном соединении
+# он ограничен по времени и всегда откатывается
+EXPLAIN_TIMEOUT_MS = 10_000
+
+# Запрос текущего HTTP-запроса; scope, а не путь: маршрут появляется
+# в нём только после роутинга
+current_request: ContextVar[Optional[Scope]] = ContextVar(
+    "current_request", default=None
+)
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\$\d+|\b\d+(?:\.\d+)?\b|%\(\w+\)s|\?")
+LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+SPACES = re.compile(r"\s+")
+
+
+def normalize(statement: str) -> str:
+    """
+    Форма запроса без значений: литералы и параметры заменяются на ?,
+    списки IN (?, ?, ...) сворачиваются, чтобы запросы с разным
+    числом id попадали в одну группу.
+    """
+    shape = LITERALS.sub("?", SPACES.sub(" ", statement).strip())
+    return LISTS.sub("(...)", shape)
+
+
+def redact(value: Any) -> Any:
+    """
+    Числа, даты и флаги сохраняются как есть — по ним видно, какая
+    страница или фильм тормозит; строки и байты заменяются их длиной,
+    так в журнал не попадают email, хэши паролей и тексты.
+    """
+    if isinstance(value, date):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return f"<str {len(value)}>"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<bytes {len(value)}>"
+    if isinstance(value, (list, tuple)):
+        items = [redact(item) for item in value[:10]]
+        if len(value) > 10:
+            items.append(f"<{len(value) - 10} more>")
+        return items
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    return f"<{type(value).__name__}>"
+
+
+def route_name(scope: Optional[Scope]) -> Optional[str]:
+    if scope is None:
+        return None
+    route = scope.get("route")
+    path = route.path if route is not None and hasattr(route, "path") else scope["path"]
+    return f"{scope['method']} {path}"
+
+
+@dataclass
+class SlowQuery:
+    at: datetime
+    duration_ms: float
+    shape: str
+    statement: str
+    parameters: Any
+    route: Optional[str]
+    plan: Optional[str] = None
+
+
+@dataclass
+class ShapeStats:
+    shape: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+class SlowQueryLog:
+    """
+    Последние медленные запросы и сводка по их формам в памяти воркера.
+    Часть SELECT-запросов повторяется с EXPLAIN (ANALYZE, BUFFERS) на
+    отдельном asyncpg-соединении, чтобы не занимать соединения пула.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        maxlen: int,
+        explain_ratio: float = 0.0,
+        explain_dsn: Optional[str] = None,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_ratio = explain_ratio
+        self.explain_dsn = explain_dsn
+        self.queries: Deque[SlowQuery] = deque(maxlen=maxlen)
+        self.shapes: Dict[str, ShapeStats] = {}
+        self._explain_conn: Optional[asyncpg.Connection] = None
+        self._explaining = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    def record(
+        self,
+        statement: str,
+        parameters: Any,
+        duration_ms: float,
+        dialect: str,
+    ) -> Optional[SlowQuery]:
+        if duration_ms < self.threshold_ms:
+            return None
+        shape = normalize(statement)
+        query = SlowQuery(
+            at=datetime.now(timezone.utc),
+            duration_ms=round(duration_ms, 2),
+            shape=shape,
+            statement=statement[:MAX_STATEMENT_LENGTH],
+            parameters=redact(parameters),
+            route=route_name(current_request.get()),
+        )
+        self.queries.append(query)
+        stats = self.shapes.get(shape)
+        if stats is None and len(self.shapes) < MAX_SHAPES:
+            stats = self.shapes[shape] = ShapeStats(shape)
+        if stats is not None:
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+        logger.warning(
+            "Slow query %.0f ms [%s]: %s", duration_ms, query.route or "-", shape
+        )
+        if self._should_explain(statement, dialect):
+            self._explaining = True
+            task = asyncio.get_running_loop().create_task(
+                self._explain(query, statement, parameters)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return query
+
+    def _should_explain(self, statement: str, dialect: str) -> bool:
+        # одновременно не больше одного EXPLAIN: под нагрузкой медленных
+        # запросов много, а план хватит и одного на форму
+        return (
+            self.explain_dsn is not None
+            and dialect == "postgresql"
+            and not self._explaining
+            and statement.split(None, 1)[0].upper() in ("SELECT", "WITH")
+            and random.random() < self.explain_ratio
+        )
+
+    async def _explain(self, query: SlowQuery, statement: str, parameters: Any) -> None:
+        try:
+            if self._explain_conn is None or self._explain_conn.is_closed():
+                self._explain_conn = await asyncpg.connect(self.explain_dsn)
+                await self._explain_conn.execute(
+                    f"SET statement_timeout = {EXPLAIN_TIMEOUT_MS}"
+                )
+            transaction = self._explain_conn.transaction()
+            await transaction.start()
+            try:
+                rows = await self._explain_conn.fetch(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {statement}", *(parameters or ())
+                )
+            finally:
+                await transaction.rollback()
+            query.plan = "\n".join(row[0] for row in rows)
+        except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            logger.warning("EXPLAIN failed for %s: %r", query.shape, e)
+        finally:
+            self._explaining = False
+
+    def top_shapes(self, limit: int) -> List[ShapeStats]:
+        return sorted(self.shapes.values(), key=lambda s: s.total_ms, reverse=True)[
+            :limit
+        ]
+
+    def to_dict(self, limit: int) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold_ms,
+            "queries": [asdict(q) for q in reversed(self.queries)][:limit],
+            "shapes": [asdict(s) for s in self.top_shapes(limit)],
+        }
+
+    def clear(self) -> None:
+        self.queries.clear()
+        self.shapes.clear()
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        if self._explain_conn is not None and not self._explain_conn.is_closed():
+            await self._explain_conn.close()
+
+
+def instrument_engine(engine: AsyncEngine, log: SlowQueryLog) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        started = conn.info["query_started"].pop()
+        log.record(
+            statement,
+            parameters,
+            (time.perf_counter() - started) * 1000,
+            sync_engine.dialect.name,
+        )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        if context.connection is not None:
+            started = context.connection.info.get("query_started")
+            if started:
+                started.pop()
+
+
+class QueryRouteMiddleware:
+    """Делает scope запроса доступным хукам SQLAlchemy через contextvar."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_request.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_request.reset(token)
@@ -0,0 +1,243 @@
+"""
+Колоночный снимок каталога в памяти воркера для фильтров и сортировки.
+
+Включается настройкой CATALOG_SNAPSHOT и требует numpy
+(poetry install -E snapshot). Снимок держит по массиву на колонку films
+и битовые маски жанров и стран; фильтры считаются векторными масками,
+лучшие по рейтингу выбираются argpartition, а тела фильмов берутся
+из film_json_cache.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from sqlalchemy import select
+
+from movielibrary.cache import CATALOG, CatalogVersions, Sessions
+from movielibrary.facets import SORT_RATING, FilmFilter
+from movielibrary.models import Country, Film, Genre
+
+logger = logging.getLogger(__name__)
+
+TYPE_CODES = {"movie": 0, "series": 1}
+# Позиция бита для id, которых нет в справочнике
+NOTHING = -1
+
+Cursor = Union[int, Tuple[float, int]]
+
+
+class FilmKey(NamedTuple):
+    id: int
+    version: int
+    rating: float
+
+
+def pack_bits(lists: Sequence[Sequence[int]], positions: Dict[int, int]) -> np.ndarray:
+    """
+    Битовые маски фильмов: строка на фильм, по биту на жанр (страну)
+    в позиции positions[id]; слов по 64 бита столько, сколько нужно.
+    """
+    words = max(1, (len(positions) + 63) // 64)
+    bits = np.zeros((len(lists), words), dtype=np.uint64)
+    lookup = np.full(max(positions, default=0) + 1, NOTHING, dtype=np.int64)
+    lookup[list(positions)] = list(positions.values())
+
+    counts = np.fromiter((len(ids) for ids in lists), dtype=np.int64, count=len(lists))
+    flat = np.fromiter(
+        (i for ids in lists for i in ids), dtype=np.int64, count=int(counts.sum())
+    )
+    rows = np.repeat(np.arange(len(lists)), counts)
+    # id, которых нет в справочнике, пропускаются
+    bit = np.full(len(flat), NOTHING, dtype=np.int64)
+    known = flat < len(lookup)
+    bit[known] = lookup[flat[known]]
+    rows, bit = rows[bit >= 0], bit[bit >= 0]
+    values = np.left_shift(np.uint64(1), (bit % 64).astype(np.uint64))
+    np.bitwise_or.at(bits, (rows, bit // 64), values)
+    return bits
+
+
+@dataclass
+class Snapshot:
+    """Неизменяемый снимок; фильмы упорядочены по возрастанию id."""
+
+    version: int
+    ids: np.ndarray
+    versions: np.ndarray
+    years: np.ndarray
+    ratings: np.ndarray
+    types: np.ndarray
+    genre_bits: np.ndarray
+    country_bits: np.ndarray
+    genre_positions: Dict[str, int]
+    country_positions: Dict[str, int]
+
+    @classmethod
+    def build(
+        cls,
+        version: int,
+        rows: Sequence[tuple],
+        genres: Dict[str, int],
+        countries: Dict[str, int],
+    ) -> "Snapshot":
+        """
+        Args:
+            version: Версия каталога, прочитанная до загрузки строк
+            rows: (id, version, year, rating, type, genre_ids, country_ids)
+            genres: id жанров по названиям
+            countries: id стран по названиям
+        """
+        rows = sorted(rows, key=lambda row: row[0])
+        columns = list(zip(*rows, strict=True)) or [()] * 7
+        # позиция бита по id жанра (страны)
+        genre_bit = {genre_id: i for i, genre_id in enumerate(sorted(genres.values()))}
+        country_bit = {
+            country_id: i for i, country_id in enumerate(sorted(countries.values()))
+        }
+        return cls(
+            version=version,
+            ids=np.array(columns[0], dtype=np.int64),
+            versions=np.array(columns[1], dtype=np.int64),
+            years=np.array(columns[2], dtype=np.int32),
+            ratings=np.array(columns[3], dtype=np.float64),
+            types=np.array([TYPE_CODES[t] for t in columns[4]], dtype=np.int8),
+            genre_bits=pack_bits(columns[5], genre_bit),
+            country_bits=pack_bits(columns[6], country_bit),
+            genre_positions={name: genre_bit[id_] for name, id_ in genres.items()},
+            country_positions={
+                name: country_bit[id_] for name, id_ in countries.items()
+            },
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def mask(self, flt: FilmFilter) -> np.ndarray:
+        mask = np.ones(len(self), dtype=bool)
+        if flt.year_from is not None:
+            mask &= self.years >= flt.year_from
+        if flt.year_to is not None:
+            mask &= self.years <= flt.year_to
+        if flt.rating_from is not None:
+            mask &= self.ratings >= flt.rating_from
+        if flt.rating_to is not None:
+            mask &= self.ratings <= flt.rating_to
+        if flt.type is not None:
+            mask &= self.types == TYPE_CODES[flt.type]
+        for names, bits, positions in (
+            (flt.genres, self.genre_bits, self.genre_positions),
+            (flt.countries, self.country_bits, self.country_positions),
+        ):
+            for name in names:
+                position = positions.get(name)
+                if position is None:
+                    return np.zeros(len(self), dtype=bool)
+                bit = np.uint64(1) << np.uint64(position % 64)
+                mask &= (bits[:, position // 64] & bit) != 0
+        return mask
+
+    def select(
+        self,
+        flt: FilmFilter,
+        sort: str,
+        cursor: Optional[Cursor],
+        limit: Optional[int],
+    ) -> List[FilmKey]:
+        """
+        Returns:
+            Подходящие фильмы в порядке сортировки, не больше limit,
+            если он задан
+        """
+        mask = self.mask(flt)
+        if sort == SORT_RATING:
+            if cursor is not None:
+                rating, film_id = cursor
+                mask &= (self.ratings < rating) | (
+                    (self.ratings == rating) & (self.ids < film_id)
+                )
+            found = np.flatnonzero(mask)
+            ratings = self.ratings[found]
+            if limit is not None and limit < len(found):
+                # лучшие limit за линейное время; фильмы с тем же рейтингом,
+                # что у последнего из них, остаются, чтобы порядок по id
+                # совпадал с курсором
+                top = np.argpartition(-ratings, limit - 1)[:limit]
+                keep = ratings >= ratings[top].min()
+                found, ratings = found[keep], ratings[keep]
+            found = found[np.lexsort((-self.ids[found], -ratings))]
+        else:
+            if cursor is not None:
+                mask &= self.ids < cursor
+            found = np.flatnonzero(mask)[::-1]
+        if limit is not None:
+            found = found[:limit]
+        return [
+            FilmKey(*row)
+            for row in zip(
+                self.ids[found].tolist(),
+                self.versions[found].tolist(),
+                self.ratings[found].tolist(),
+                strict=True,
+            )
+        ]
+
+
+class CatalogSnapshot:
+    """
+    Текущий снимок каталога и его пересборка. Пока снимка нет, запрос
+    ждёт первой загрузки; после изменения каталога запросы получают
+    прежний снимок, а новый собирается в фоне одной задачей.
+    """
+
+    def __init__(self, versions: CatalogVersions, sessions: Sessions):
+        self.versions = versions
+        self.sessions = sessions
+        self.current: Optional[Snapshot] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def get(self) -> Snapshot:
+        current = self.current
+        if current is None:
+            return await asyncio.shield(self._rebuild())
+        if current.version != self.versions.get(CATALOG):
+            self._rebuild()
+        return current
+
+    def _rebuild(self) -> asyncio.Task:
+        if self._task is None:
+            self._task = asyncio.create_task(self._load())
+            self._task.add_done_callback(self._finish)
+        return self._task
+
+    async def _load(self) -> Snapshot:
+        version = self.versions.get(CATALOG)
+        async with self.sessions() as db:
+            result = await db.execute(
+                select(
+                    Film.id,
+                    Film.version,
+                    Film.year,
+                    Film.rating,
+                    Film.type,
+                    Film.genre_ids,
+                    Film.country_ids,
+                )
+            )
+            rows = result.all()
+            genres = dict((await db.execute(select(Genre.name, Genre.id))).all())
+            countries = dict((await db.execute(select(Country.name, Country.id))).all())
+        # сборка массивов занимает процессор: цикл событий не ждёт её
+        snapshot = await asyncio.to_thread(
+            Snapshot.build, version, rows, genres, countries
+        )
+        self.current = snapshot
+        logger.info("Catalog snapshot v%d: %d films", version, len(snapshot))
+        return snapshot
+
+    def _finish(self, task: asyncio.Task) -> None:
+        self._task = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Catalog snapshot rebuild failed: %r", task.exception())
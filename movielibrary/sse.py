@@ -0,0 +1,180 @@
+import asyncio
+import json
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+
+from movielibrary.bus import CatalogChange
+
+# Сколько событий может ждать отправки медленному клиенту, прежде чем
+# его отключат: клиент переподключится с Last-Event-ID
+SUBSCRIBER_QUEUE_SIZE = 100
+# Пауза перед переподключением, которую EventSource берёт из поля retry
+RETRY_MS = 3000
+RESET = "reset"
+
+
+@dataclass(frozen=True)
+class ServerEvent:
+    id: Optional[str]
+    event: str
+    data: Dict[str, Any]
+
+    def encode(self) -> bytes:
+        lines = []
+        if self.id is not None:
+            lines.append(f"id: {self.id}")
+        lines.append(f"event: {self.event}")
+        lines.append(f"data: {json.dumps(self.data, ensure_ascii=False)}")
+        return ("\n".join(lines) + "\n\n").encode()
+
+
+def change_event(change: Optional[CatalogChange]) -> ServerEvent:
+    """
+    Превращает уведомление шины в событие ленты: film_created, film_deleted...
+    id события — txid транзакции, поэтому он одинаков во всех воркерах.
+    """
+    if change is None:
+        return ServerEvent(None, RESET, {})
+    return ServerEvent(
+        str(change.version),
+        f"{change.entity}_{change.action}",
+        {"id": change.entity_id},
+    )
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(self, broker: "EventBroker", backlog: List[ServerEvent]):
+        self.broker = broker
+        # пропущенные события для возобновления, снятые вместе с подпиской
+        self.backlog = backlog
+        self.queue: asyncio.Queue[Optional[ServerEvent]] = asyncio.Queue(
+            SUBSCRIBER_QUEUE_SIZE
+        )
+
+    def close(self) -> None:
+        self.broker._subscribers.discard(self)
+
+    def terminate(self) -> None:
+        """Отписывает и ставит в очередь None, который завершит поток клиента."""
+        self.close()
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class EventBroker:
+    """
+    Раздаёт события подписчикам одного воркера и хранит последние события
+    в кольцевом буфере для возобновления по Last-Event-ID.
+    """
+
+    def __init__(self, history_size: int, max_subscribers: int):
+        self.history: Deque[ServerEvent] = deque(maxlen=history_size)
+        self.max_subscribers = max_subscribers
+        self._subscribers: Set[Subscription] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: ServerEvent) -> None:
+        if event.id is not None:
+            self.history.append(event)
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.terminate()
+
+    def on_catalog_change(self, change: Optional[CatalogChange]) -> None:
+        self.publish(change_event(change))
+
+    def replay(self, last_event_id: str) -> Optional[List[ServerEvent]]:
+        """
+        Returns:
+            События после last_event_id или None, если его уже нет в буфере
+        """
+        events = list(self.history)
+        for index, event in enumerate(events):
+            if event.id == last_event_id:
+                return events[index + 1 :]
+        return None
+
+    @property
+    def full(self) -> bool:
+        return len(self._subscribers) >= self.max_subscribers
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscription:
+        """
+        Регистрирует подписчика и сразу снимает пропущенные им события,
+        чтобы они не задвоились с новыми.
+        Raises:
+            TooManySubscribers: Если достигнут лимит подписчиков воркера
+        """
+        if self.full:
+            raise TooManySubscribers
+        backlog: List[ServerEvent] = []
+        if last_event_id:
+            missed = self.replay(last_event_id)
+            backlog = [ServerEvent(None, RESET, {})] if missed is None else missed
+        subscription = Subscription(self, backlog)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def close(self) -> None:
+        """Завершает все потоки, например при остановке воркера."""
+        for subscription in list(self._subscribers):
+            subscription.terminate()
+
+
+async def stream_events(
+    subscription: Subscription, heartbeat: float
+) -> AsyncIterator[bytes]:
+    """
+    Поток text/event-stream: пропущенные события из буфера, затем новые.
+    Если Last-Event-ID уже вытеснен из буфера или пришёл из другого воркера,
+    клиент получает reset и должен перечитать каталог целиком.
+    """
+    try:
+        yield f"retry: {RETRY_MS}\n\n".encode()
+        for event in subscription.backlog:
+            yield event.encode()
+
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                # комментарий не даёт прокси закрыть простаивающее соединение
+                yield b": ping\n\n"
+                continue
+            if event is None:
+                return
+            yield event.encode()
+    finally:
+        subscription.close()
+
+
+async def subscribe_events(
+    broker: EventBroker, last_event_id: Optional[str], heartbeat: float
+) -> AsyncIterator[bytes]:
+    """
+    Подписывается при первом чтении тела ответа, а не в обработчике:
+    если клиент ушёл раньше или middleware заменил ответ, подписка
+    не создаётся и не занимает место в лимите подписчиков.
+    """
+    try:
+        subscription = broker.subscribe(last_event_id)
+    except TooManySubscribers:
+        # лимит заняли между проверкой в обработчике и началом потока;
+        # клиент переподключится через retry
+        yield f"retry: {RETRY_MS}\n\n".encode()
+        return
+    try:
+        async for chunk in stream_events(subscription, heartbeat):
+            yield chunk
+    finally:
+        subscription.close()
@@ -0,0 +1,119 @@
+import asyncio
+from functools import cached_property
+from typing import Any, AsyncIterator, Dict, Iterator, Mapping, Optional
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from starlette.concurrency import iterate_in_threadpool
+from starlette.responses import StreamingResponse
+
+from movielibrary.tracing import span
+
+# Первая порция уходит, как только отрендерен <head> и навигация:
+# браузер начинает грузить CSS, пока рендерятся карточки
+FIRST_FLUSH_BYTES = 1024
+FLUSH_BYTES = 16 * 1024
+# Страницы, где в контексте есть список длиннее, рендерятся в потоке
+THREAD_RENDER_THRESHOLD = 200
+
+
+class StreamingTemplates:
+    """
+    Замена Jinja2Templates, которая отдаёт страницу по мере рендеринга.
+    Небольшие страницы рендерятся асинхронным окружением Jinja в цикле событий
+    с паузой после каждой отправленной порции; большие — синхронным
+    окружением в пуле потоков, чтобы не блокировать другие запросы.
+    Окружения Jinja создаются при первом рендеринге.
+    """
+
+    def __init__(self, directory: str, globals: Optional[Dict[str, Any]] = None):
+        self.loader = FileSystemLoader(directory)
+        self.globals = globals or {}
+
+    @cached_property
+    def env(self) -> Environment:
+        env = Environment(
+            loader=self.loader, autoescape=select_autoescape(), enable_async=True
+        )
+        env.globals.update(self.globals)
+        return env
+
+    @cached_property
+    def thread_env(self) -> Environment:
+        env = Environment(loader=self.loader, autoescape=select_autoescape())
+        # глобальные функции шаблонов общие для обоих окружений
+        env.globals = self.env.globals
+        return env
+
+    def TemplateResponse(
+        self,
+        name: str,
+        context: Dict[str, Any],
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: str = "text/html",
+    ) -> StreamingResponse:
+        if render_size(context) > THREAD_RENDER_THRESHOLD:
+            template = self.thread_env.get_template(name)
+            # порции собираются в потоке, чтобы не переключаться на каждый фрагмент
+            body = encoded(iterate_in_threadpool(batches(template.generate(context))))
+        else:
+            body = buffered(self.env.get_template(name).generate_async(context))
+        return StreamingResponse(
+            traced(body, name),
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+        )
+
+
+def render_size(context: Dict[str, Any]) -> int:
+    return max(
+        (len(value) for value in context.values() if isinstance(value, (list, tuple))),
+        default=0,
+    )
+
+
+async def buffered(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """
+    Склеивает мелкие фрагменты Jinja в порции разумного размера.
+    После каждой порции цикл событий получает управление.
+    """
+    buffer: list[str] = []
+    size = 0
+    limit = FIRST_FLUSH_BYTES
+    async for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            yield "".join(buffer).encode()
+            buffer, size, limit = [], 0, FLUSH_BYTES
+            await asyncio.sleep(0)
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def batches(chunks: Iterator[str]) -> Iterator[str]:
+    """Синхронный вариант buffered для рендеринга в потоке."""
+    buffer: list[str] = []
+    size = 0
+    limit = FIRST_FLUSH_BYTES
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            yield "".join(buffer)
+            buffer, size, limit = [], 0, FLUSH_BYTES
+    if buffer:
+        yield "".join(buffer)
+
+
+async def traced(body: AsyncIterator[bytes], name: str) -> AsyncIterator[bytes]:
+    """Спан рендеринга: страница рендерится, пока отдаётся клиенту."""
+    with span(f"render {name}", **{"template.name": name}):
+        async for chunk in body:
+            yield chunk
+
+
+async def encoded(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        yield chunk.encode()
@@ -0,0 +1,307 @@
+import json
+import logging
+import os
+import re
+import secrets
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "movielibrary"
+# Виды спанов OTLP
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+MAX_STATEMENT_LENGTH = 2000
+
+
+@dataclass
+class Span:
+    trace: "Trace"
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    kind: int = INTERNAL
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if error is not None:
+            self.error = repr(error)
+        self.end_ns = time.time_ns()
+        self.trace.on_end(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": (
+                {"code": STATUS_ERROR, "message": self.error}
+                if self.error
+                else {"code": STATUS_OK}
+            ),
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Trace:
+    """
+    Спаны одного запроса. Они копятся до окончания корневого спана и
+    выгружаются одной записью; спаны фоновых задач, переживших запрос,
+    выгружаются по отдельности.
+    """
+
+    def __init__(self, exporter: "Exporter", trace_id: str):
+        self.exporter = exporter
+        self.trace_id = trace_id
+        self.root: Optional[Span] = None
+        self._finished: List[Span] = []
+
+    def on_end(self, span: Span) -> None:
+        if self.root is None or (
+            self.root.end_ns is not None and span is not self.root
+        ):
+            self.exporter.export([span])
+            return
+        self._finished.append(span)
+        if span is self.root:
+            spans, self._finished = self._finished, []
+            self.exporter.export(spans)
+
+
+class Exporter:
+    """
+    Пишет спаны в формате OTLP/JSON, по одному ExportTraceServiceRequest
+    на строку — как файловый экспортёр OpenTelemetry Collector.
+    Такой файл читают otelcol (receiver otlpjsonfile) и Jaeger.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def export(self, spans: List[Span]) -> None:
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": otlp_value(SERVICE_NAME)}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [span.to_otlp() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        try:
+            self.stream.write(json.dumps(request, ensure_ascii=False) + "\n")
+            self.stream.flush()
+        except OSError:
+            logger.exception("Failed to export %d spans", len(spans))
+
+
+def file_exporter(path: str) -> Exporter:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return Exporter(open(path, "a", encoding="utf-8", buffering=1))
+
+
+def console_exporter() -> Exporter:
+    return Exporter(sys.stderr)
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def new_id(size: int) -> str:
+    return secrets.token_hex(size)
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """
+    Разбирает заголовок W3C traceparent.
+    Returns:
+        (trace_id, id родительского спана, sampled) или None, если заголовка нет
+        или он некорректен
+    """
+    if not header:
+        return None
+    match = TRACEPARENT.match(header.strip().lower())
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def is_sampled(trace_id: str, ratio: float) -> bool:
+    """Решение по trace_id, как в TraceIdRatioBased: одинаково во всех процессах."""
+    return int(trace_id[16:], 16) < ratio * 2**64
+
+
+@contextmanager
+def span(
+    name: str, kind: int = INTERNAL, **attributes: Any
+) -> Iterator[Optional[Span]]:
+    """
+    Дочерний спан текущего запроса. Вне трассируемого запроса ничего
+    не делает и отдаёт None, поэтому вызывать его можно где угодно.
+    """
+    parent = current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace, new_id(8), parent.span_id, name, kind, attributes)
+    token = current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.end(e)
+        raise
+    else:
+        child.end()
+    finally:
+        current_span.reset(token)
+
+
+class TracingMiddleware:
+    """
+    Открывает серверный спан на каждый отобранный HTTP-запрос.
+    Если клиент прислал traceparent, запрос продолжает его трассу и
+    наследует решение о сэмплировании; иначе трасса отбирается с
+    вероятностью sample_ratio.
+    """
+
+    def __init__(self, app: ASGIApp, exporter: Exporter, sample_ratio: float):
+        self.app = app
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        parent = parse_traceparent(Headers(scope=scope).get("traceparent"))
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = new_id(16), None
+            sampled = is_sampled(trace_id, self.sample_ratio)
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(self.exporter, trace_id)
+        root = Span(
+            trace,
+            new_id(8),
+            parent_id,
+            f"{scope['method']} {scope['path']}",
+            SERVER,
+            {"http.request.method": scope["method"], "url.path": scope["path"]},
+        )
+        trace.root = root
+        token = current_span.set(root)
+
+        async def send_with_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.set(**{"http.response.status_code": message["status"]})
+            await send(message)
+
+        error: Optional[BaseException] = None
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            route = scope.get("route")
+            if route is not None and hasattr(route, "path"):
+                root.name = f"{scope['method']} {route.path}"
+                root.set(**{"http.route": route.path})
+            current_span.reset(token)
+            root.end(error)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Спан на каждый SQL-запрос движка; параметры запросов не пишутся."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        parent = current_span.get()
+        if parent is None:
+            return
+        sql = Span(
+            parent.trace,
+            new_id(8),
+            parent.span_id,
+            statement.split(None, 1)[0].upper() if statement else "SQL",
+            CLIENT,
+            {
+                "db.system": sync_engine.dialect.name,
+                "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            },
+        )
+        conn.info.setdefault("trace_spans", []).append(sql)
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            sql = spans.pop()
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                sql.set(**{"db.rows": cursor.rowcount})
+            sql.end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        spans = (
+            context.connection.info.get("trace_spans") if context.connection else None
+        )
+        if spans:
+            spans.pop().end(context.original_exception)
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
 
@@ -17,14 +19,75 @@ class Settings(BaseSettings):
     email: str
     email_app_password: str
     receiver_emails: str
+    smtp_hostname: str = "smtp.yandex.ru"
+    smtp_port: int = 465
+    smtp_pool_size: int = 3
+
+    outbox_batch_size: int = 50
+    outbox_poll_interval: float = 2.0
+    outbox_max_attempts: int = 8
+    # Сколько событие остаётся за воркером, пока он отправляет письма;
+    # должно быть больше времени отправки пачки со всеми повторами SMTP
+    outbox_claim_timeout_seconds: int = 600
+
+    # Окно и размер дайджеста писем о новых фильмах; 0 отключает ожидание
+    notify_digest_window_seconds: int = 900
+    notify_digest_max_films: int = 50
 
     secret_key: str
+    # Пользователи с доступом к /api/admin, через запятую
+    admin_emails: str = ""
     access_token_expire_minutes: int
     algorithm: str
 
     db_pool_size: int
     db_max_overflow: int
 
+    # Лента /api/films/events: подписчиков на воркер, событий для
+    # возобновления по Last-Event-ID и интервал heartbeat в секундах
+    sse_max_subscribers: int = 100
+    sse_history_size: int = 1000
+    sse_heartbeat_seconds: float = 15.0
+
+    # Популярные чтения (главная, статистика, жанры): сколько секунд
+    # значение свежее и сколько ещё его можно отдавать, обновляя в фоне
+    hot_cache_ttl_seconds: float = 30.0
+    hot_cache_max_stale_seconds: float = 300.0
+    # Сколько фильмов держать готовыми JSON-фрагментами для списков
+    film_json_cache_size: int = 50_000
+    # Сколько фильмов держать в кэше карточек (/api/films/{id} и batch)
+    film_cache_size: int = 10_000
+    # Фильтры и сортировка списков по снимку каталога в памяти (нужен numpy)
+    catalog_snapshot: bool = False
+
+    # Частота поиска и входа с одного IP: запросов в минуту и подряд
+    search_rate_per_minute: int = 60
+    search_rate_burst: int = 10
+    login_rate_per_minute: int = 10
+    login_rate_burst: int = 5
+
+    # Журнал медленных запросов (/api/admin/slow-queries): порог в мс
+    # (0 выключает), размер журнала и доля SELECT, для которых снимается
+    # EXPLAIN (ANALYZE, BUFFERS). ANALYZE выполняет запрос ещё раз, поэтому
+    # по умолчанию выключен
+    slow_query_ms: float = 200.0
+    slow_query_log_size: int = 200
+    slow_query_explain_ratio: float = 0.0
+
+    # Трассировка: console, file или пусто (выключена); доля трасс без
+    # входящего traceparent и файл для экспорта в формате OTLP/JSON
+    tracing_exporter: str = ""
+    tracing_sample_ratio: float = 1.0
+    tracing_file: str = "traces/spans.jsonl"
+
+    poster_source_url: str = "https://cdn.jsdelivr.net/gh/spaceoceanoutlook/static-assets@master/images/films"
+    # Лимит дискового кэша постеров на весь каталог, общий для воркеров
+    poster_cache_dir: str = "cache/posters"
+    poster_cache_max_mb: int = 512
+    poster_workers: int = 2
+    # Исходники постеров больше этого размера не скачиваются и не декодируются
+    poster_source_max_mb: int = 20
+
     @property
     def sqlalchemy_url(self) -> str:
         return f"postgresql+psycopg2://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
@@ -33,7 +96,25 @@ class Settings(BaseSettings):
     def database_url(self) -> str:
         return f"postgresql+asyncpg://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
 
+    @property
+    def postgres_dsn(self) -> str:
+        """DSN для прямых подключений через asyncpg (COPY, LISTEN)."""
+        return f"postgresql://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
+
     model_config = ConfigDict(env_file=".env")
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Настройки процесса, читаются из окружения при первом обращении:
+    импорт модулей проекта не требует .env.
+    """
+    return Settings()
+
+
+def __getattr__(name: str):
+    # `from settings import settings` для скриптов вроде alembic/env.py
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
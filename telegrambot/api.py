@@ -0,0 +1,193 @@
+import secrets
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, Optional
+
+import aiohttp
+from multidict import CIMultiDict
+
+# Время жизни ответов API в кэше бота, секунды
+GENRES_TTL = 600
+GENRE_FILMS_TTL = 60
+FILM_DETAILS_TTL = 300
+
+CACHE_MAXSIZE = 1024
+
+CONNECTOR_LIMIT = 20
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 60
+REQUEST_TIMEOUT = 10
+
+
+# Трасса текущего апдейта: все запросы к API из одного обработчика
+# попадают в одну трассу W3C Trace Context
+current_trace: ContextVar[Optional[str]] = ContextVar("current_trace", default=None)
+
+
+async def trace_update(
+    handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+    event: Any,
+    data: Dict[str, Any],
+) -> Any:
+    """Outer-middleware aiogram: открывает новую трассу на каждый апдейт."""
+    token = current_trace.set(secrets.token_hex(16))
+    try:
+        return await handler(event, data)
+    finally:
+        current_trace.reset(token)
+
+
+def traceparent(sample_ratio: float = 1.0) -> str:
+    """
+    Заголовок traceparent для исходящего запроса. Сам бот спаны не
+    экспортирует, поэтому флаг sampled ставится по тому же правилу, что
+    и в API (доля trace_id, TRACING_SAMPLE_RATIO): сервер, который
+    следует флагу родителя, трассирует бота с той же долей, что и остальных.
+    """
+    trace_id = current_trace.get() or secrets.token_hex(16)
+    sampled = int(trace_id[16:], 16) < sample_ratio * 2**64
+    return f"00-{trace_id}-{secrets.token_hex(8)}-{'01' if sampled else '00'}"
+
+
+@dataclass
+class CachedResponse:
+    data: Any
+    headers: Mapping[str, str] = field(default_factory=CIMultiDict)
+    etag: Optional[str] = None
+    expires_at: float = 0.0
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+
+class TTLCache:
+    """
+    Ограниченный по размеру кэш. Просроченные записи не удаляются сразу:
+    их ETag нужен для условного запроса к API.
+    """
+
+    def __init__(self, maxsize: int = CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: Hashable, entry: CachedResponse) -> None:
+        self._data[key] = entry
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class ApiClient:
+    """
+    Клиент API MovieLibrary поверх одной долгоживущей aiohttp-сессии.
+    Ответы кэшируются на ttl секунд, после чего перепроверяются по ETag.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        session: aiohttp.ClientSession,
+        cache: Optional[TTLCache] = None,
+        sample_ratio: float = 1.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.session = session
+        self.cache = cache if cache is not None else TTLCache()
+        self.sample_ratio = sample_ratio
+
+    @classmethod
+    def create(cls, base_url: str, sample_ratio: float = 1.0) -> "ApiClient":
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTOR_LIMIT,
+            limit_per_host=CONNECTOR_LIMIT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        )
+        return cls(base_url, session, sample_ratio=sample_ratio)
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    async def __aenter__(self) -> "ApiClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @staticmethod
+    def cache_key(path: str, params: Optional[Dict[str, Any]] = None) -> Hashable:
+        return (path, tuple(sorted((params or {}).items())))
+
+    def peek(
+        self, path: str, params: Optional[Dict[str, Any]] = None
+    ) -> Optional[CachedResponse]:
+        """Возвращает свежий ответ из кэша без обращения к API."""
+        entry = self.cache.get(self.cache_key(path, params))
+        if entry is not None and entry.is_fresh:
+            return entry
+        return None
+
+    async def get(
+        self, path: str, params: Optional[Dict[str, Any]] = None, ttl: float = 0
+    ) -> CachedResponse:
+        """
+        Выполняет GET-запрос к API с учётом локального кэша.
+        Args:
+            path: Путь относительно API_BASE_URL
+            params: Параметры строки запроса
+            ttl: Сколько секунд ответ считается свежим; 0 отключает кэш
+        Returns:
+            Ответ с разобранным JSON и заголовками
+        """
+        key = self.cache_key(path, params)
+        entry = self.cache.get(key) if ttl else None
+        if entry is not None and entry.is_fresh:
+            return entry
+
+        headers = {"traceparent": traceparent(self.sample_ratio)}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+
+        url = f"{self.base_url}{path}"
+        async with self.session.get(url, params=params, headers=headers) as resp:
+            if resp.status == 304 and entry is not None:
+                entry.expires_at = time.monotonic() + ttl
+                self.cache.set(key, entry)
+                return entry
+            resp.raise_for_status()
+            entry = CachedResponse(
+                data=await resp.json(),
+                headers=resp.headers.copy(),
+                etag=resp.headers.get("ETag"),
+                expires_at=time.monotonic() + ttl,
+            )
+
+        if ttl:
+            self.cache.set(key, entry)
+        return entry
+
+    async def get_json(
+        self, path: str, params: Optional[Dict[str, Any]] = None, ttl: float = 0
+    ) -> Any:
+        """Получить JSON с базовой проверкой статуса."""
+        response = await self.get(path, params=params, ttl=ttl)
+        return response.data
@@ -0,0 +1,73 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from api import ApiClient
+
+# Пауза после нажатия клавиши, прежде чем идти в API, секунды
+SEARCH_DEBOUNCE = 0.4
+# Сколько секунд результаты поиска по одному запросу переиспользуются ботом
+SEARCH_TTL = 30
+# Сколько секунд Telegram может отдавать закэшированный ответ на inline-запрос
+INLINE_CACHE_TIME = 60
+# API ищет только по запросам от 3 символов
+MIN_QUERY_LENGTH = 3
+# Telegram принимает не больше 50 результатов в ответе
+MAX_INLINE_RESULTS = 50
+
+
+def normalize_query(query: str) -> str:
+    """Приводит запрос к ключу кэша: нижний регистр, одиночные пробелы."""
+    return " ".join(query.lower().split())
+
+
+class LatestOnly:
+    """
+    Выполняет для каждого ключа (пользователя) только последнюю задачу:
+    новая задача отменяет ещё не завершившуюся предыдущую.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def run(
+        self, key: Hashable, factory: Callable[[], Awaitable[Any]]
+    ) -> Optional[Any]:
+        """
+        Запускает задачу и ждёт её результата.
+        Returns:
+            Результат задачи или None, если её вытеснила более новая
+        """
+        previous = self._tasks.get(key)
+        if previous is not None:
+            previous.cancel()
+
+        task = asyncio.ensure_future(factory())
+        self._tasks[key] = task
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled() and not _current_task_cancelling():
+                return None
+            task.cancel()
+            raise
+        finally:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+
+
+def _current_task_cancelling() -> bool:
+    current = asyncio.current_task()
+    return current is not None and current.cancelling() > 0
+
+
+async def search_films(api: ApiClient, query: str) -> List[Dict[str, Any]]:
+    """Ждёт, пока пользователь перестанет печатать, и выполняет поиск."""
+    params = {"q": query}
+    cached = api.peek("/api/films/search", params)
+    if cached is not None:
+        return cached.data
+    await asyncio.sleep(SEARCH_DEBOUNCE)
+    return await api.get_json("/api/films/search", params=params, ttl=SEARCH_TTL)
@@ -2,28 +2,62 @@ import asyncio
 import os
 from typing import Any, Dict, List, Optional
 
-import aiohttp
 from aiogram import Bot, Dispatcher, F, types
 from aiogram.filters import Command
 from dotenv import load_dotenv
 
-load_dotenv()
+from api import (
+    FILM_DETAILS_TTL,
+    GENRE_FILMS_TTL,
+    GENRES_TTL,
+    ApiClient,
+    trace_update,
+)
+from inline import (
+    INLINE_CACHE_TIME,
+    MAX_INLINE_RESULTS,
+    MIN_QUERY_LENGTH,
+    LatestOnly,
+    normalize_query,
+    search_films,
+)
+from paging import (
+    GENRE_PREFIX,
+    MORE_PREFIX,
+    STALE_PAGE_ALERT,
+    PageKeys,
+    parse_genre_data,
+)
+from sender import SendScheduler
 
-TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-if not TOKEN:
-    raise ValueError("TELEGRAM_BOT_TOKEN не установлен в переменных окружения")
+load_dotenv()
 
 API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8000")
+# Та же доля трасс, что у API: .env общий
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
 
-bot = Bot(token=TOKEN)
-dp = Dispatcher()
-
+# Сколько фильмов показывать за одно нажатие "Еще"
+GENRE_PAGE_SIZE = 5
+# Сколько результатов поиска помещать в одну клавиатуру
+SEARCH_RESULTS_LIMIT = 50
 
-async def fetch_json(session: aiohttp.ClientSession, url: str) -> Any:
-    """Получить JSON с базовой проверкой статуса."""
-    async with session.get(url) as resp:
-        resp.raise_for_status()
-        return await resp.json()
+dp = Dispatcher()
+dp.update.outer_middleware(trace_update)
+
+
+def film_buttons(
+    films: List[Dict[str, Any]],
+) -> List[List[types.InlineKeyboardButton]]:
+    """Строки клавиатуры: по одной кнопке на фильм, открывающей подробности."""
+    return [
+        [
+            types.InlineKeyboardButton(
+                text=f"🎬 {film.get('title', 'Без названия')}",
+                callback_data=f"film_{film.get('id')}",
+            )
+        ]
+        for film in films
+    ]
 
 
 @dp.message(Command("search"))
@@ -32,14 +66,14 @@ async def cmd_search(message: types.Message):
 
 
 @dp.message(Command("genres"))
-async def cmd_genres(message: types.Message):
-    url = f"{API_BASE_URL}/api/filters/genres/"
-    async with aiohttp.ClientSession() as session:
-        try:
-            genres_data: List[str] = await fetch_json(session, url)
-        except Exception as e:
-            await message.answer(f"Не удалось получить жанры: {e}")
-            return
+async def cmd_genres(message: types.Message, api: ApiClient):
+    try:
+        genres_data: List[str] = await api.get_json(
+            "/api/filters/genres", ttl=GENRES_TTL
+        )
+    except Exception as e:
+        await message.answer(f"Не удалось получить жанры: {e}")
+        return
 
     if not genres_data:
         await message.answer("Жанры не найдены.")
@@ -47,7 +81,7 @@ async def cmd_genres(message: types.Message):
 
     # каждая строка — список кнопок
     buttons = [
-        [types.InlineKeyboardButton(text=genre, callback_data=f"genre_{genre}")]
+        [types.InlineKeyboardButton(text=genre, callback_data=GENRE_PREFIX + genre)]
         for genre in genres_data
     ]
     markup = types.InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -55,117 +89,162 @@ async def cmd_genres(message: types.Message):
     await message.answer("Выбери жанр:", reply_markup=markup)
 
 
-@dp.callback_query(F.data.startswith("genre_"))
-async def handle_genre_callback(call: types.CallbackQuery):
-    data = call.data.replace("genre_", "")
+@dp.callback_query(F.data.startswith(GENRE_PREFIX))
+async def handle_genre_callback(
+    call: types.CallbackQuery, api: ApiClient, pages: PageKeys
+):
+    page = parse_genre_data(call.data)
+    if page is None:
+        await call.answer(STALE_PAGE_ALERT, show_alert=True)
+        return
+    genre, cursor = page
+    await send_genre_page(call, api, pages, genre, cursor)
 
-    if "|" in data:
-        genre, offset_str = data.split("|", 1)
-        try:
-            offset = int(offset_str)
-        except ValueError:
-            offset = 0
-    else:
-        genre = data
-        offset = 0
-
-    url = f"{API_BASE_URL}/api/filters/genres/{genre}"
-    async with aiohttp.ClientSession() as session:
-        try:
-            films: List[Dict[str, Any]] = await fetch_json(session, url)
-        except Exception as e:
-            await call.message.answer(f"Не удалось получить фильмы жанра {genre}: {e}")
-            await call.answer()
-            return
+
+@dp.callback_query(F.data.startswith(MORE_PREFIX))
+async def handle_more_callback(
+    call: types.CallbackQuery, api: ApiClient, pages: PageKeys
+):
+    page = pages.get(call.data)
+    if page is None:
+        await call.answer(STALE_PAGE_ALERT, show_alert=True)
+        return
+    genre, cursor = page
+    await send_genre_page(call, api, pages, genre, cursor)
+
+
+async def send_genre_page(
+    call: types.CallbackQuery,
+    api: ApiClient,
+    pages: PageKeys,
+    genre: str,
+    cursor: Optional[str],
+) -> None:
+    params = {"fields": "slim", "limit": GENRE_PAGE_SIZE}
+    if cursor:
+        params["cursor"] = cursor
+
+    try:
+        response = await api.get(
+            f"/api/filters/genres/{genre}", params=params, ttl=GENRE_FILMS_TTL
+        )
+    except Exception as e:
+        await call.message.answer(f"Не удалось получить фильмы жанра {genre}: {e}")
+        await call.answer()
+        return
 
     await call.answer()
 
+    films: List[Dict[str, Any]] = response.data
     if not films:
         await call.message.answer(
             f"Фильмы жанра *{genre}* не найдены.", parse_mode="Markdown"
         )
         return
 
-    if offset == 0:
-        await call.message.answer(f"Фильмы жанра *{genre}*:", parse_mode="Markdown")
-
-    films_slice = films[offset : offset + 5]
-
-    for film in films_slice:
-        title = film.get("title", "Без названия")
-        film_id = film.get("id")
-        # разметка через inline_keyboard
-        details_markup = types.InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    types.InlineKeyboardButton(
-                        text="Подробнее", callback_data=f"film_{film_id}"
-                    )
-                ]
-            ]
-        )
-        await call.message.answer(f"🎬 {title}", reply_markup=details_markup)
-
-    # кнопка "Еще"
-    next_offset = offset + 5
-    if next_offset < len(films):
-        more_markup = types.InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    types.InlineKeyboardButton(
-                        text="Еще", callback_data=f"genre_{genre}|{next_offset}"
-                    )
-                ]
-            ]
+    # все фильмы страницы и кнопка "Еще" отправляются одним сообщением;
+    # курсор следующей страницы приходит в заголовке ответа
+    buttons = film_buttons(films)
+    next_cursor = response.headers.get("X-Next-Cursor")
+    if next_cursor:
+        more_data = pages.put(genre, next_cursor)
+        buttons.append(
+            [types.InlineKeyboardButton(text="Еще", callback_data=more_data)]
         )
-        await call.message.answer("🍿", reply_markup=more_markup)
+
+    title = f"Фильмы жанра *{genre}*:" if cursor is None else "🍿"
+    await call.message.answer(
+        title,
+        parse_mode="Markdown",
+        reply_markup=types.InlineKeyboardMarkup(inline_keyboard=buttons),
+    )
 
 
 @dp.message(F.text & ~F.via_bot)
-async def handle_text(message: types.Message):
+async def handle_text(message: types.Message, api: ApiClient):
     query = (message.text or "").strip()
     if not query:
         return
 
-    url = f"{API_BASE_URL}/api/films/search?q={query}"
-    async with aiohttp.ClientSession() as session:
-        try:
-            films: List[Dict[str, Any]] = await fetch_json(session, url)
-        except Exception as e:
-            await message.answer(f"Не удалось выполнить поиск: {e}")
-            return
+    try:
+        films: List[Dict[str, Any]] = await api.get_json(
+            "/api/films/search", params={"q": query}
+        )
+    except Exception as e:
+        await message.answer(f"Не удалось выполнить поиск: {e}")
+        return
 
     if not films:
         await message.answer("Ничего не найдено.")
         return
 
-    for film in films:
-        title = film.get("title", "Без названия")
-        film_id = film.get("id")
-        markup = types.InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    types.InlineKeyboardButton(
-                        text="Подробнее", callback_data=f"film_{film_id}"
-                    )
+    text = f"Найдено фильмов: {len(films)}"
+    if len(films) > SEARCH_RESULTS_LIMIT:
+        text += f". Показаны первые {SEARCH_RESULTS_LIMIT}, уточни запрос"
+    markup = types.InlineKeyboardMarkup(
+        inline_keyboard=film_buttons(films[:SEARCH_RESULTS_LIMIT])
+    )
+    await message.answer(text, reply_markup=markup)
+
+
+@dp.inline_query()
+async def handle_inline_query(
+    inline_query: types.InlineQuery, api: ApiClient, searches: LatestOnly
+):
+    query = normalize_query(inline_query.query)
+    if len(query) < MIN_QUERY_LENGTH:
+        await inline_query.answer([], cache_time=INLINE_CACHE_TIME)
+        return
+
+    try:
+        films = await searches.run(
+            inline_query.from_user.id, lambda: search_films(api, query)
+        )
+    except Exception:
+        await inline_query.answer([], cache_time=0, is_personal=True)
+        return
+    if films is None:
+        # пользователь уже набрал более новый запрос
+        return
+
+    results = [
+        types.InlineQueryResultArticle(
+            id=str(film.get("id")),
+            title=film.get("title") or "Без названия",
+            description=f"{film.get('year') or '—'} · ⭐ {film.get('rating') or '—'}",
+            input_message_content=types.InputTextMessageContent(
+                message_text=f"🎬 {film.get('title') or 'Без названия'}"
+            ),
+            reply_markup=types.InlineKeyboardMarkup(
+                inline_keyboard=[
+                    [
+                        types.InlineKeyboardButton(
+                            text="Подробнее", callback_data=f"film_{film.get('id')}"
+                        )
+                    ]
                 ]
-            ]
+            ),
         )
-        await message.answer(f"🎬 {title}", reply_markup=markup)
+        for film in films[:MAX_INLINE_RESULTS]
+    ]
+    await inline_query.answer(results, cache_time=INLINE_CACHE_TIME)
 
 
 @dp.callback_query(F.data.startswith("film_"))
-async def handle_film_details(call: types.CallbackQuery):
+async def handle_film_details(call: types.CallbackQuery, api: ApiClient):
     film_id = call.data.split("_", 1)[1]
-    url = f"{API_BASE_URL}/api/films/{film_id}"
-
-    async with aiohttp.ClientSession() as session:
-        try:
-            film_data: Dict[str, Optional[Any]] = await fetch_json(session, url)
-        except Exception as e:
-            await call.message.answer(f"Не удалось получить информацию о фильме: {e}")
-            await call.answer()
+
+    try:
+        film_data: Dict[str, Optional[Any]] = await api.get_json(
+            f"/api/films/{film_id}", ttl=FILM_DETAILS_TTL
+        )
+    except Exception as e:
+        if call.message is None:
+            await call.answer(f"Не удалось получить информацию о фильме: {e}")
             return
+        await call.message.answer(f"Не удалось получить информацию о фильме: {e}")
+        await call.answer()
+        return
 
     title = film_data.get("title") or "Без названия"
     year = film_data.get("year") or "—"
@@ -179,12 +258,37 @@ async def handle_film_details(call: types.CallbackQuery):
         f"📖 Описание: {description}"
     )
 
-    await call.message.answer(message_text, parse_mode="HTML")
+    if call.message is None:
+        # кнопка из сообщения, отправленного через inline-режим
+        await call.bot.edit_message_text(
+            message_text,
+            inline_message_id=call.inline_message_id,
+            parse_mode="HTML",
+        )
+    else:
+        await call.message.answer(message_text, parse_mode="HTML")
     await call.answer()
 
 
+def create_bot() -> Bot:
+    """
+    Создаёт бота при запуске, а не при импорте: тестам обработчиков
+    токен не нужен.
+    Raises:
+        ValueError: Если TELEGRAM_BOT_TOKEN не задан
+    """
+    token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not token:
+        raise ValueError("TELEGRAM_BOT_TOKEN не установлен в переменных окружения")
+    bot = Bot(token=token)
+    bot.session.middleware(SendScheduler())
+    return bot
+
+
 async def main():
-    await dp.start_polling(bot)
+    bot = create_bot()
+    async with ApiClient.create(API_BASE_URL, TRACING_SAMPLE_RATIO) as api:
+        await dp.start_polling(bot, api=api, searches=LatestOnly(), pages=PageKeys())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,64 @@
+import secrets
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Сколько страниц "Еще" помнит бот; старые кнопки после вытеснения
+# просят открыть жанр заново
+PAGE_KEYS_MAXSIZE = 10_000
+# Префикс callback_data кнопки "Еще"
+MORE_PREFIX = "more_"
+# Префикс callback_data кнопки жанра
+GENRE_PREFIX = "genre_"
+# Ответ на кнопку "Еще", страницу которой бот уже не может открыть
+STALE_PAGE_ALERT = "Список устарел, выбери жанр заново: /genres"
+
+
+def parse_genre_data(data: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Разбирает callback_data кнопки жанра. Кнопки "Еще" из старых сообщений
+    хранят после "|" числовое смещение (до перехода на курсоры)
+    или курсор следующей страницы.
+    Returns:
+        Жанр и курсор (None — первая страница) или None для кнопки
+        со смещением: по смещению курсор не восстановить
+    """
+    genre, _, cursor = data.removeprefix(GENRE_PREFIX).partition("|")
+    if cursor.isdigit():
+        return None
+    return genre, cursor or None
+
+
+class PageKeys:
+    """
+    Короткие ключи для кнопки "Еще". Жанр и курсор следующей страницы
+    вместе могут не поместиться в 64 байта callback_data, поэтому
+    в кнопку кладётся ключ, а сами они хранятся в памяти бота.
+    """
+
+    def __init__(self, maxsize: int = PAGE_KEYS_MAXSIZE):
+        self.maxsize = maxsize
+        self._pages: OrderedDict[str, Tuple[str, str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def put(self, genre: str, cursor: str) -> str:
+        """
+        Returns:
+            callback_data кнопки "Еще" для этой страницы
+        """
+        key = secrets.token_urlsafe(6)
+        self._pages[key] = (genre, cursor)
+        while len(self._pages) > self.maxsize:
+            self._pages.popitem(last=False)
+        return MORE_PREFIX + key
+
+    def get(self, data: str) -> Optional[Tuple[str, str]]:
+        """
+        Returns:
+            Жанр и курсор по callback_data или None, если ключ вытеснен
+        """
+        page = self._pages.get(data.removeprefix(MORE_PREFIX))
+        if page is not None:
+            self._pages.move_to_end(data.removeprefix(MORE_PREFIX))
+        return page
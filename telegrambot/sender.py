@@ -0,0 +1,176 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from typing import Hashable, List, Optional
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, AnswerInlineQuery, TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+
+logger = logging.getLogger(__name__)
+
+# Лимиты Telegram: около 30 сообщений в секунду на бота и 1 в секунду на чат
+GLOBAL_RATE = 30
+GLOBAL_BURST = 30
+CHAT_RATE = 1
+CHAT_BURST = 3
+
+MAX_RETRIES = 3
+MAX_TRACKED_CHATS = 10_000
+
+# Чем меньше число, тем раньше запрос получает токен
+PRIORITY_ANSWER = 0
+PRIORITY_SEND = 1
+
+PRIORITY_METHODS = (AnswerCallbackQuery, AnswerInlineQuery)
+
+
+class TokenBucket:
+    """Классический token bucket: rate токенов в секунду, не больше capacity."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self) -> float:
+        """
+        Пытается взять токен.
+        Returns:
+            0, если токен взят, иначе сколько секунд ждать до следующего
+        """
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def drain(self) -> None:
+        """Обнуляет запас токенов, например после ответа RetryAfter."""
+        self._refill()
+        self.tokens = min(self.tokens, 0)
+
+    async def acquire(self) -> None:
+        while delay := self.consume():
+            await asyncio.sleep(delay)
+
+
+class PriorityGate:
+    """
+    Выдаёт токены общего bucket'а в порядке приоритета, а внутри одного
+    приоритета — в порядке очереди.
+    """
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self._waiters: List[List[int]] = []
+        self._counter = itertools.count()
+        self._cond = asyncio.Condition()
+
+    async def acquire(self, priority: int) -> None:
+        entry = [priority, next(self._counter)]
+        async with self._cond:
+            heapq.heappush(self._waiters, entry)
+            self._cond.notify_all()
+            try:
+                while True:
+                    if self._waiters[0] is not entry:
+                        await self._cond.wait()
+                        continue
+                    delay = self.bucket.consume()
+                    if not delay:
+                        heapq.heappop(self._waiters)
+                        self._cond.notify_all()
+                        return
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), delay)
+                    except TimeoutError:
+                        pass
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """
+    Middleware сессии бота, которое ограничивает исходящие запросы общим
+    token bucket'ом и отдельным для каждого чата, повторяет запросы после RetryAfter
+    и пропускает ответы на callback/inline запросы вперёд очереди.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = GLOBAL_RATE,
+        global_burst: float = GLOBAL_BURST,
+        chat_rate: float = CHAT_RATE,
+        chat_burst: float = CHAT_BURST,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.gate = PriorityGate(TokenBucket(global_rate, global_burst))
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._chat_buckets: OrderedDict[Hashable, TokenBucket] = OrderedDict()
+
+    def chat_bucket(self, chat_id: Hashable) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+            if len(self._chat_buckets) > MAX_TRACKED_CHATS:
+                self._chat_buckets.popitem(last=False)
+        self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id: Optional[Hashable] = getattr(method, "chat_id", None)
+        if isinstance(method, PRIORITY_METHODS):
+            priority = PRIORITY_ANSWER
+        elif chat_id is not None:
+            priority = PRIORITY_SEND
+        else:
+            # getUpdates и прочие служебные вызовы не ограничиваем
+            return await make_request(bot, method)
+
+        attempt = 0
+        while True:
+            if chat_id is not None:
+                await self.chat_bucket(chat_id).acquire()
+            await self.gate.acquire(priority)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                logger.warning(
+                    "Flood limit on %s, retry %d in %ss",
+                    type(method).__name__,
+                    attempt,
+                    e.retry_after,
+                )
+                if chat_id is not None:
+                    self.chat_bucket(chat_id).drain()
+                await asyncio.sleep(e.retry_after)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# модули бота импортируются как верхнеуровневые (так же, как в main.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
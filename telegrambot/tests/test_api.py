@@ -0,0 +1,132 @@
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from api import ApiClient, TTLCache, current_trace, traceparent
+
+
+class FakeApi:
+    """Заглушка API MovieLibrary: жанры с ETag и ответом 304 на совпавший ETag."""
+
+    def __init__(self):
+        self.genres = ["Драма"]
+        self.requests: list[dict] = []
+
+    @property
+    def etag(self) -> str:
+        return f'"{len(self.genres)}"'
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests.append(
+            {
+                "path": request.path,
+                "if_none_match": request.headers.get("If-None-Match"),
+                "peer": request.transport.get_extra_info("peername"),
+            }
+        )
+        if request.headers.get("If-None-Match") == self.etag:
+            return web.Response(status=304, headers={"ETag": self.etag})
+        return web.json_response(self.genres, headers={"ETag": self.etag})
+
+
+@pytest_asyncio.fixture
+async def fake_api():
+    api = FakeApi()
+    app = web.Application()
+    app.router.add_get("/api/{path:.*}", api.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    yield api, f"http://127.0.0.1:{port}"
+    await runner.cleanup()
+
+
+@pytest_asyncio.fixture
+async def client(fake_api):
+    _, base_url = fake_api
+    async with ApiClient.create(base_url) as client:
+        yield client
+
+
+def expire(client: ApiClient, path: str) -> None:
+    client.cache.get(client.cache_key(path)).expires_at = 0.0
+
+
+@pytest.mark.asyncio
+async def test_fresh_entry_is_served_from_cache(fake_api, client):
+    api, _ = fake_api
+    assert await client.get_json("/api/genres", ttl=60) == ["Драма"]
+    assert await client.get_json("/api/genres", ttl=60) == ["Драма"]
+    assert client.peek("/api/genres").data == ["Драма"]
+    assert len(api.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_without_ttl_every_call_hits_api(fake_api, client):
+    api, _ = fake_api
+    await client.get_json("/api/genres")
+    await client.get_json("/api/genres")
+    assert len(api.requests) == 2
+    assert len(client.cache) == 0
+    # оба запроса прошли по одному keep-alive соединению общей сессии
+    assert api.requests[0]["peer"] == api.requests[1]["peer"]
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_revalidated_with_304(fake_api, client):
+    api, _ = fake_api
+    first = await client.get("/api/genres", ttl=60)
+    expire(client, "/api/genres")
+    assert client.peek("/api/genres") is None
+
+    second = await client.get("/api/genres", ttl=60)
+    assert api.requests[1]["if_none_match"] == '"1"'
+    # 304: тот же ответ, снова свежий
+    assert second is first
+    assert second.is_fresh
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_replaced_when_data_changed(fake_api, client):
+    api, _ = fake_api
+    await client.get("/api/genres", ttl=60)
+    expire(client, "/api/genres")
+    api.genres.append("Комедия")
+
+    response = await client.get("/api/genres", ttl=60)
+    assert response.data == ["Драма", "Комедия"]
+    assert response.etag == '"2"'
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entry_is_evicted(fake_api):
+    api, base_url = fake_api
+    async with ApiClient.create(base_url) as client:
+        client.cache = TTLCache(maxsize=2)
+        await client.get("/api/genres/1", ttl=60)
+        await client.get("/api/genres/2", ttl=60)
+        await client.get("/api/genres/1", ttl=60)
+        await client.get("/api/genres/3", ttl=60)
+        assert len(client.cache) == 2
+        assert client.peek("/api/genres/1") is not None
+        assert client.peek("/api/genres/2") is None
+
+        # вытесненная запись запрашивается заново, без условного заголовка
+        await client.get("/api/genres/2", ttl=60)
+        assert api.requests[-1]["if_none_match"] is None
+        assert len(api.requests) == 4
+
+
+def test_traceparent_follows_sample_ratio():
+    """Флаг sampled решается по trace_id с долей API, а не всегда 01."""
+    token = current_trace.set("0" * 16 + "8" + "0" * 15)
+    try:
+        # младшая половина trace_id — ровно середина диапазона
+        assert traceparent(1.0).endswith("-01")
+        assert traceparent(0.6).endswith("-01")
+        assert traceparent(0.4).endswith("-00")
+        assert traceparent(0.0).endswith("-00")
+    finally:
+        current_trace.reset(token)
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from inline import LatestOnly, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  Матрица   Перезагрузка ") == "матрица перезагрузка"
+
+
+@pytest.mark.asyncio
+async def test_newer_search_cancels_previous():
+    searches = LatestOnly()
+    started = []
+
+    async def search(query: str) -> str:
+        started.append(query)
+        await asyncio.sleep(0.05)
+        return query
+
+    first = asyncio.create_task(searches.run(1, lambda: search("мат")))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(searches.run(1, lambda: search("матрица")))
+
+    assert await first is None
+    assert await second == "матрица"
+    assert started == ["мат", "матрица"]
+    assert len(searches) == 0
+
+
+@pytest.mark.asyncio
+async def test_searches_of_different_users_are_independent():
+    searches = LatestOnly()
+
+    async def search(query: str) -> str:
+        await asyncio.sleep(0.01)
+        return query
+
+    results = await asyncio.gather(
+        searches.run(1, lambda: search("a")), searches.run(2, lambda: search("b"))
+    )
+    assert results == ["a", "b"]
@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+from sender import (
+    PRIORITY_ANSWER,
+    PRIORITY_SEND,
+    PriorityGate,
+    SendScheduler,
+    TokenBucket,
+)
+
+TOKEN = "42:TEST"
+
+
+class FakeBotApi:
+    """Локальная заглушка Bot API: первые flood_errors запросов получают 429."""
+
+    def __init__(self, flood_errors: int = 0):
+        self.flood_errors = flood_errors
+        self.calls: list[tuple[str, float]] = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls.append((method, time.monotonic()))
+        if self.flood_errors:
+            self.flood_errors -= 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1},
+                },
+                status=429,
+            )
+        if method == "sendMessage":
+            result = {
+                "message_id": len(self.calls),
+                "date": 0,
+                "chat": {"id": 1, "type": "private"},
+                "text": "ok",
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+
+@pytest_asyncio.fixture
+async def fake_api():
+    api = FakeBotApi()
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", api.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    yield api, f"http://127.0.0.1:{port}"
+    await runner.cleanup()
+
+
+def make_bot(base_url: str, scheduler: SendScheduler) -> Bot:
+    session = AiohttpSession(api=TelegramAPIServer.from_base(base_url))
+    session.middleware(scheduler)
+    return Bot(token=TOKEN, session=session)
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_retried(fake_api):
+    api, base_url = fake_api
+    api.flood_errors = 1
+    bot = make_bot(base_url, SendScheduler())
+    try:
+        message = await bot.send_message(chat_id=1, text="hi")
+    finally:
+        await bot.session.close()
+    assert message.text == "ok"
+    assert [name for name, _ in api.calls] == ["sendMessage"] * 2
+
+
+@pytest.mark.asyncio
+async def test_chat_bucket_spaces_out_messages(fake_api):
+    api, base_url = fake_api
+    bot = make_bot(base_url, SendScheduler(chat_rate=20, chat_burst=1))
+    try:
+        for _ in range(3):
+            await bot.send_message(chat_id=1, text="hi")
+    finally:
+        await bot.session.close()
+    times = [at for _, at in api.calls]
+    assert times[2] - times[0] >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_gate_prefers_callback_answers():
+    gate = PriorityGate(TokenBucket(rate=50, capacity=1))
+    await gate.acquire(PRIORITY_SEND)
+    order = []
+
+    async def take(priority, name):
+        await gate.acquire(priority)
+        order.append(name)
+
+    sends = [asyncio.create_task(take(PRIORITY_SEND, f"send{i}")) for i in range(2)]
+    await asyncio.sleep(0)
+    answer = asyncio.create_task(take(PRIORITY_ANSWER, "answer"))
+    await asyncio.gather(*sends, answer)
+    assert order[0] == "answer"
+
+
+def test_token_bucket_reports_wait_time():
+    bucket = TokenBucket(rate=2, capacity=1)
+    assert bucket.consume() == 0
+    assert 0 < bucket.consume() <= 0.5
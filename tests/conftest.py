@@ -0,0 +1,26 @@
+import os
+
+# get_settings() читает обязательные переменные окружения;
+# для тестов хватает заглушек, реальные сервисы не используются
+TEST_ENV = {
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "postgres",
+    "POSTGRES_DB": "films_test",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "VALID_CODE": "test-code",
+    "TELEGRAM_BOT_TOKEN": "42:TEST",
+    "API_BASE_URL": "http://testserver",
+    "EMAIL": "sender@example.com",
+    "EMAIL_APP_PASSWORD": "password",
+    "RECEIVER_EMAILS": "first@example.com, second@example.com",
+    "ADMIN_EMAILS": "admin@example.com",
+    "SECRET_KEY": "test-secret",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "ALGORITHM": "HS256",
+    "DB_POOL_SIZE": "5",
+    "DB_MAX_OVERFLOW": "5",
+}
+
+for key, value in TEST_ENV.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,142 @@
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from movielibrary.auth_utils import get_current_user_required
+from movielibrary.cache import STATISTICS, catalog_versions
+from movielibrary.database import get_db
+from movielibrary.main import create_app
+from movielibrary.models import Country, Film, FilmCountry, FilmGenre, Genre, User
+from movielibrary.models.base import Base
+from settings import get_settings
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'films.db'}")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def enable_foreign_keys(dbapi_connection, _):
+        # в SQLite каскадное удаление работает только с включёнными внешними ключами
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        db.add_all([Genre(id=1, name="Драма"), Genre(id=2, name="Комедия")])
+        db.add(Country(id=1, name="США"))
+        for film_id in range(1, 7):
+            db.add(
+                Film(
+                    id=film_id,
+                    title=f"Фильм {film_id}",
+                    year=2000 + film_id % 2,
+                    rating=7.0,
+                    photo=f"{film_id}.webp",
+                    type="movie",
+                )
+            )
+        await db.flush()
+        for film_id in range(1, 7):
+            db.add(FilmGenre(film_id=film_id, genre_id=1))
+            db.add(FilmCountry(film_id=film_id, country_id=1))
+        await db.commit()
+    yield factory
+    await engine.dispose()
+
+
+@pytest.fixture
+def settings():
+    return get_settings()
+
+
+@pytest.fixture
+def app(settings):
+    return create_app(settings)
+
+
+@pytest_asyncio.fixture
+async def client(app, session_factory):
+    async def override_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user_required] = lambda: User(
+        email="admin@example.com"
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+async def count(session_factory, model):
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(model))
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_cascades(client, session_factory):
+    version = catalog_versions.get(STATISTICS)
+    response = await client.post("/api/admin/films/delete", json={"year": 2001})
+    assert response.json() == {"deleted": 3}
+    assert await count(session_factory, Film) == 3
+    assert await count(session_factory, FilmGenre) == 3
+    assert await count(session_factory, FilmCountry) == 3
+    assert catalog_versions.get(STATISTICS) == version + 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_genres(client, session_factory):
+    body = {"films": {"ids": [1, 2, 3]}, "add": ["Комедия"], "remove": ["Драма"]}
+    response = await client.post("/api/admin/films/genres", json=body)
+    assert response.json() == {"added": 3, "removed": 3}
+
+    # повторное добавление не создаёт дубликатов
+    body = {"films": {"genre": "Комедия"}, "add": ["Комедия"]}
+    response = await client.post("/api/admin/films/genres", json=body)
+    assert response.json() == {"added": 0, "removed": 0}
+    assert await count(session_factory, FilmGenre) == 6
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_unknown_country(client):
+    body = {"films": {"ids": [1]}, "add": ["Атлантида"]}
+    response = await client.post("/api/admin/films/countries", json=body)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_empty_selector_rejected(client, session_factory):
+    """Пустой селектор не должен означать «все фильмы»"""
+    response = await client.post("/api/admin/films/delete", json={})
+    assert response.status_code == 422
+    assert await count(session_factory, Film) == 6
+
+
+@pytest.mark.asyncio
+async def test_requires_admin(app, client):
+    app.dependency_overrides[get_current_user_required] = lambda: User(
+        email="user@example.com"
+    )
+    response = await client.post("/api/admin/films/delete", json={"ids": [1]})
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "settings", [get_settings().model_copy(update={"admin_emails": "boss@example.com"})]
+)
+async def test_admins_come_from_app_settings(app, client):
+    """Администраторы берутся из настроек create_app, а не из окружения."""
+    response = await client.post("/api/admin/films/delete", json={"ids": [1]})
+    assert response.status_code == 403
+
+    app.dependency_overrides[get_current_user_required] = lambda: User(
+        email="boss@example.com"
+    )
+    response = await client.post("/api/admin/films/delete", json={"ids": [1]})
+    assert response.status_code == 200
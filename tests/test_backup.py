@@ -0,0 +1,147 @@
+import json
+import os
+import re
+from contextlib import asynccontextmanager
+
+import pytest
+
+from movielibrary import backup
+from movielibrary.backup import GzipSink, file_sha256, read_chunks, verify_checksums
+
+
+async def read_all(path):
+    return b"".join([chunk async for chunk in read_chunks(path)])
+
+
+@pytest.mark.asyncio
+async def test_gzip_sink_roundtrip(tmp_path):
+    path = tmp_path / "films.copy.gz"
+    payload = [os.urandom(1000), b"PGCOPY\n" * 5000, b""]
+    sink = GzipSink(path)
+    for chunk in payload:
+        sink.write(chunk)
+    digest = sink.close()
+
+    assert digest == file_sha256(path)
+    assert sink.bytes == path.stat().st_size
+    assert await read_all(path) == b"".join(payload)
+
+
+@pytest.mark.asyncio
+async def test_verify_checksums_detects_corruption(tmp_path):
+    sink = GzipSink(tmp_path / "genres.copy.gz")
+    sink.write(b"data" * 100)
+    manifest = {"tables": [{"file": "genres.copy.gz", "sha256": sink.close()}]}
+    await verify_checksums(tmp_path, manifest)
+
+    with (tmp_path / "genres.copy.gz").open("ab") as f:
+        f.write(b"\0")
+    with pytest.raises(ValueError):
+        await verify_checksums(tmp_path, manifest)
+
+
+class FakePostgres:
+    """
+    Схема с индексом и ограничениями, которую меняют только DDL-команды
+    restore: проверяется, какие объекты остались после загрузки.
+    """
+
+    CONSTRAINTS = [
+        {
+            "relation": "film_genre",
+            "name": "film_genre_film_id_fkey",
+            "type": "f",
+            "definition": "FOREIGN KEY (film_id) REFERENCES films(id)",
+        },
+        {
+            "relation": "films",
+            "name": "films_title_key",
+            "type": "u",
+            "definition": "UNIQUE (title)",
+        },
+    ]
+    INDEXES = [
+        {
+            "name": "idx_films_year",
+            "definition": "CREATE INDEX idx_films_year ON public.films USING btree (year)",
+        }
+    ]
+
+    def __init__(self):
+        self.objects = {"film_genre_film_id_fkey", "films_title_key", "idx_films_year"}
+        self.truncated = 0
+
+
+class FakeConnection:
+    def __init__(self, db: FakePostgres):
+        self.db = db
+
+    async def fetchval(self, query, *args):
+        return "rev" if "alembic_version" in query else None
+
+    async def fetch(self, query, *args):
+        if "pg_constraint WHERE" in query:
+            return FakePostgres.CONSTRAINTS
+        return FakePostgres.INDEXES
+
+    async def execute(self, query, *args):
+        for pattern, present in (
+            (r'DROP CONSTRAINT "(\w+)"', False),
+            (r"DROP INDEX (\w+)", False),
+            (r'ADD CONSTRAINT "(\w+)"', True),
+            (r"CREATE INDEX (\w+)", True),
+        ):
+            if match := re.search(pattern, query):
+                if present:
+                    self.db.objects.add(match[1])
+                else:
+                    self.db.objects.discard(match[1])
+        if query.startswith("TRUNCATE"):
+            self.db.truncated += 1
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_failed_full_restore_recreates_constraints(tmp_path, monkeypatch):
+    """
+    Загрузка упала: индексы и ограничения возвращаются, частичные данные
+    очищаются, а SQL для ручного восстановления остаётся рядом с дампом.
+    """
+    db = FakePostgres()
+
+    async def connect(dsn):
+        return FakeConnection(db)
+
+    async def load_tables(*args):
+        raise ConnectionError("connection lost")
+
+    monkeypatch.setattr(backup.asyncpg, "connect", connect)
+    monkeypatch.setattr(backup, "load_tables", load_tables)
+
+    sink = GzipSink(tmp_path / "films.copy.gz")
+    sink.write(b"")
+    manifest = {
+        "alembic_revision": "rev",
+        "since_id": None,
+        "tables": [{"table": "films", "file": "films.copy.gz", "sha256": sink.close()}],
+    }
+    (tmp_path / backup.MANIFEST).write_text(json.dumps(manifest))
+
+    with pytest.raises(ConnectionError):
+        await backup.restore("postgresql://", tmp_path, jobs=2)
+
+    assert db.objects == {
+        "film_genre_film_id_fkey",
+        "films_title_key",
+        "idx_films_year",
+    }
+    assert db.truncated == 2
+    script = (tmp_path / backup.RECOVERY_SCRIPT).read_text()
+    assert "CREATE INDEX idx_films_year" in script
+    assert 'ADD CONSTRAINT "film_genre_film_id_fkey" FOREIGN KEY' in script
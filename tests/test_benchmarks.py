@@ -0,0 +1,39 @@
+from benchmarks.catalog import GENRES, SyntheticCatalog
+from benchmarks.load import RouteResult, build_routes, percentile
+
+
+def test_catalog_is_deterministic():
+    first = SyntheticCatalog(films=200, seed=7)
+    second = SyntheticCatalog(films=200, seed=7)
+    assert list(first.film_rows()) == list(second.film_rows())
+    assert list(first.film_genre_rows()) == list(second.film_genre_rows())
+
+
+def test_catalog_links_reference_existing_rows():
+    catalog = SyntheticCatalog(films=300)
+    links = list(catalog.film_genre_rows())
+    assert {film_id for film_id, _ in links} == set(range(1, 301))
+    assert all(1 <= genre_id <= len(GENRES) for _, genre_id in links)
+    assert len(links) == len(set(links))
+
+
+def test_percentile():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
+
+
+def test_route_result_counts_errors():
+    result = RouteResult.from_samples(
+        "api.films.list", [0.01, 0.02, 0.03], [200, 503, 0], duration=1.5
+    )
+    assert result.requests == 3
+    assert result.errors == 2
+    assert result.rps == 2.0
+    assert result.status_codes == {"200": 1, "503": 1, "0": 1}
+
+
+def test_routes_cover_api_and_pages():
+    names = {route.name for route in build_routes(films=10)}
+    assert {"api.films.retrieve", "api.filters.genre", "pages.film"} <= names
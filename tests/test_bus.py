@@ -0,0 +1,37 @@
+import pytest
+
+from movielibrary.bus import CatalogChange, invalidate_local_caches
+from movielibrary.cache import FILM, film_cache, statistics_cache
+
+
+def test_parse_change():
+    assert CatalogChange.parse("film:42:9001") == CatalogChange(FILM, 42, 9001)
+    assert CatalogChange.parse("film:*:9002").entity_id is None
+    assert CatalogChange.parse("film:42:9003:created").action == "created"
+    with pytest.raises(ValueError):
+        CatalogChange.parse("film:42")
+
+
+def test_change_invalidates_only_that_film():
+    film_cache.put("first", 1)
+    film_cache.put("second", 2)
+    statistics_cache.put({"total_films": 2})
+
+    invalidate_local_caches(CatalogChange(FILM, 1, 100))
+    assert film_cache.get(1) is None
+    assert film_cache.get(2) == "second"
+    assert statistics_cache.get() is None
+
+
+def test_missed_notifications_flush_everything():
+    film_cache.put("second", 2)
+    invalidate_local_caches(None)
+    assert film_cache.get(2) is None
+
+
+def test_stale_put_is_ignored():
+    """Значение, посчитанное до изменения, не должно попасть в кэш как свежее"""
+    version = film_cache.version(3)
+    invalidate_local_caches(CatalogChange(FILM, 3, 101))
+    film_cache.put("old", 3, version=version)
+    assert film_cache.get(3) is None
@@ -0,0 +1,56 @@
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from movielibrary.etag import ETagMiddleware
+
+app = FastAPI()
+app.add_middleware(ETagMiddleware)
+
+
+@app.get("/api/genres")
+async def genres():
+    return ["Драма", "Комедия"]
+
+
+@app.get("/api/stream")
+async def stream():
+    async def chunks():
+        yield b"a"
+        yield b"b"
+
+    return StreamingResponse(chunks())
+
+
+@app.get("/page")
+async def page():
+    return {"ok": True}
+
+
+client = TestClient(app)
+
+
+def test_etag_added_to_api_response():
+    response = client.get("/api/genres")
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('W/"')
+
+
+def test_matching_if_none_match_returns_304():
+    etag = client.get("/api/genres").headers["etag"]
+    response = client.get("/api/genres", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_stale_if_none_match_returns_body():
+    response = client.get("/api/genres", headers={"If-None-Match": 'W/"old"'})
+    assert response.status_code == 200
+    assert response.json() == ["Драма", "Комедия"]
+
+
+def test_streaming_and_non_api_responses_are_untouched():
+    assert client.get("/api/stream").content == b"ab"
+    assert "etag" not in client.get("/api/stream").headers
+    assert "etag" not in client.get("/page").headers
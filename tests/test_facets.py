@@ -0,0 +1,37 @@
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+
+from movielibrary.facets import FilmFilter, has_countries, has_genres
+from movielibrary.models import Film
+
+
+def compile_pg(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_genre_filter_has_no_join():
+    """Фильтр по жанру — условие по одной таблице films, без JOIN и DISTINCT."""
+    sql = compile_pg(select(func.count()).select_from(Film).where(has_genres("Драма")))
+    assert "JOIN" not in sql
+    assert "DISTINCT" not in sql
+    assert "films.genre_ids @> ARRAY[(SELECT genres.id" in sql
+
+
+def test_several_facets_become_one_containment_each():
+    """Несколько жанров сворачиваются в один массив, страны — во второй."""
+    sql = compile_pg(
+        select(Film.id).where(has_genres("Драма", "Комедия"), has_countries("США"))
+    )
+    assert sql.count("@>") == 2
+    assert sql.count("SELECT genres.id") == 2
+    assert "films.country_ids @> ARRAY[(SELECT countries.id" in sql
+
+
+def test_film_filter_criteria():
+    """Пустой фильтр не добавляет условий; пределы включают границы."""
+    assert FilmFilter().criteria() == []
+    flt = FilmFilter(genres=("Драма",), year_from=1970, rating_to=8.0)
+    sql = compile_pg(select(Film.id).where(*flt.criteria()))
+    assert "films.genre_ids @>" in sql
+    assert "films.year >= " in sql
+    assert "films.rating <= " in sql
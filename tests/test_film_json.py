@@ -0,0 +1,137 @@
+import json
+
+import pytest
+import pytest_asyncio
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from movielibrary import projections
+from movielibrary.cache import CatalogVersions, FilmJsonCache
+from movielibrary.models import Country, Film, FilmCountry, FilmGenre, Genre
+from movielibrary.models.base import Base
+from movielibrary.projections import FILM_FIELDS, dump_films, film_json, films_json
+
+
+def make_film(film_id):
+    film = Film(
+        id=film_id, title="Сталкер", year=1979, rating=8.1, photo="1.webp", version=1
+    )
+    film.genres = [FilmGenre(genre=Genre(id=1, name="Драма"))]
+    film.countries = [FilmCountry(country=Country(id=1, name="СССР"))]
+    return film
+
+
+def test_fragment_matches_json_response():
+    """Фрагмент побайтно совпадает с тем, что отдавал JSONResponse."""
+    film = make_film(1)
+    body = JSONResponse(dump_films([film], FILM_FIELDS)).body
+    assert body == b"[" + film_json(film) + b"]"
+
+
+def test_entry_is_valid_for_its_version_and_generation():
+    versions = CatalogVersions()
+    cache = FilmJsonCache(versions)
+    cache.put(1, 3, b"{}")
+    assert cache.get(1, 3) == b"{}"
+    # триггер базы увеличил версию фильма
+    assert cache.get(1, 4) is None
+    cache.put(1, 4, b"{}")
+    versions.flush()
+    assert cache.get(1, 4) is None
+
+
+def test_least_recently_used_film_is_evicted():
+    cache = FilmJsonCache(CatalogVersions(), max_entries=2)
+    cache.put(1, 1, b"1")
+    cache.put(2, 1, b"2")
+    cache.get(1, 1)
+    cache.put(3, 1, b"3")
+    assert len(cache) == 2
+    assert cache.get(2, 1) is None
+    assert cache.get(1, 1) == b"1"
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Свой кэш фрагментов на тест вместо общего film_json_cache."""
+    cache = FilmJsonCache(CatalogVersions())
+    monkeypatch.setattr(projections, "film_json_cache", cache)
+    return cache
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add(Genre(id=1, name="Драма"))
+        for film_id, version in ((31, 1), (32, 2), (33, 1)):
+            session.add(
+                Film(
+                    id=film_id,
+                    title=f"Фильм {film_id} из базы",
+                    year=2000,
+                    rating=7.0,
+                    photo=f"{film_id}.webp",
+                    version=version,
+                )
+            )
+        await session.flush()
+        session.add(FilmGenre(film_id=32, genre_id=1))
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_list_body_is_joined_from_cached_fragments(cache):
+    for film_id in (21, 22):
+        cache.put(film_id, 5, b'{"id":%d}' % film_id)
+    # все фильмы в кэше: база не нужна, порядок — как в списке id
+    body = await films_json(None, [(22, 5), (21, 5)])
+    assert body == b'[{"id":22},{"id":21}]'
+    assert await films_json(None, []) == b"[]"
+
+
+@pytest.mark.asyncio
+async def test_misses_are_loaded_and_cached_with_new_version(cache, db):
+    """
+    Фильм из кэша не перечитывается, отсутствующий и изменившийся
+    загружаются одним запросом и кладутся в кэш с версией из базы.
+    """
+    cache.put(31, 1, b'{"id":31,"title":"cached"}')
+    cache.put(32, 1, b'{"id":32,"title":"stale"}')
+
+    body = await films_json(db, [(33, 1), (31, 1), (999, 1), (32, 2)])
+
+    films = json.loads(body)
+    # удалённый фильм 999 пропущен, порядок — как в списке id
+    assert [film["id"] for film in films] == [33, 31, 32]
+    assert films[1]["title"] == "cached"
+    assert films[2]["title"] == "Фильм 32 из базы"
+    assert [genre["name"] for genre in films[2]["genre_list"]] == ["Драма"]
+    assert json.loads(cache.get(32, 2)) == films[2]
+    assert cache.get(32, 1) is None
+    assert json.loads(cache.get(33, 1)) == films[0]
+
+
+@pytest.mark.asyncio
+async def test_flush_during_load_leaves_entries_stale(cache, db, monkeypatch):
+    """Записи кладутся с номером сброса, прочитанным до загрузки."""
+    execute = db.execute
+
+    async def execute_and_flush(*args, **kwargs):
+        result = await execute(*args, **kwargs)
+        # каталог сбросили, пока фильмы загружались
+        cache.versions.flush()
+        return result
+
+    monkeypatch.setattr(db, "execute", execute_and_flush)
+
+    films = json.loads(await films_json(db, [(31, 1)]))
+
+    assert [film["id"] for film in films] == [31]
+    assert len(cache) == 1
+    assert cache.get(31, 1) is None
@@ -0,0 +1,107 @@
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from movielibrary.cache import FILM, CatalogVersions, EntityCache, film_cache
+from movielibrary.models import Film, FilmGenre, Genre
+from movielibrary.models.base import Base
+from movielibrary.routers import films
+from movielibrary.routers.films import MAX_BATCH_SIZE, fetch_films_batch, parse_ids
+from movielibrary.schemas.film import FilmRead
+
+
+def cached_film(film_id):
+    film = FilmRead(
+        id=film_id,
+        title=f"Фильм {film_id}",
+        year=2000,
+        rating=7.0,
+        photo=f"{film_id}.webp",
+        genre_list=[],
+        country_list=[],
+    )
+    return film_cache.put(film, film_id)
+
+
+def test_parse_ids():
+    assert parse_ids("3, 1,2,") == [3, 1, 2]
+    with pytest.raises(HTTPException) as exc_info:
+        parse_ids("1,два")
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_batch_keeps_order_and_skips_duplicates():
+    for film_id in (10, 11, 12):
+        cached_film(film_id)
+    # все фильмы есть в кэше, поэтому база не нужна
+    batch = await fetch_films_batch(None, [12, 10, 12, 11])
+    assert [film.id for film in batch.films] == [12, 10, 11]
+    assert batch.missing == []
+
+
+@pytest.mark.asyncio
+async def test_batch_size_is_capped():
+    with pytest.raises(HTTPException) as exc_info:
+        await fetch_films_batch(None, list(range(MAX_BATCH_SIZE + 1)))
+    assert exc_info.value.status_code == 400
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add(Genre(id=1, name="Драма"))
+        for film_id in (101, 102, 103):
+            session.add(
+                Film(
+                    id=film_id,
+                    title=f"Фильм {film_id} из базы",
+                    year=2000,
+                    rating=7.0,
+                    photo=f"{film_id}.webp",
+                )
+            )
+        await session.flush()
+        session.add(FilmGenre(film_id=102, genre_id=1))
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_batch_loads_misses_from_database(db, monkeypatch):
+    """
+    Фильм из кэша не перечитывается, остальные загружаются одним
+    запросом и попадают в кэш; порядок — как в запросе.
+    """
+    cache = EntityCache(CatalogVersions(), FILM)
+    monkeypatch.setattr(films, "film_cache", cache)
+    cache.put(
+        FilmRead(
+            id=101,
+            title="Фильм 101 из кэша",
+            year=2000,
+            rating=7.0,
+            photo="101.webp",
+            genre_list=[],
+            country_list=[],
+        ),
+        101,
+    )
+
+    batch = await fetch_films_batch(db, [103, 999, 101, 102])
+
+    assert [film.id for film in batch.films] == [103, 101, 102]
+    assert [film.title for film in batch.films] == [
+        "Фильм 103 из базы",
+        "Фильм 101 из кэша",
+        "Фильм 102 из базы",
+    ]
+    assert [genre.name for genre in batch.films[2].genres] == ["Драма"]
+    assert batch.missing == [999]
+    assert cache.get(103).title == "Фильм 103 из базы"
@@ -0,0 +1,136 @@
+import asyncio
+from contextlib import nullcontext
+
+import pytest
+from sqlalchemy import exc
+
+from movielibrary.cache import (
+    FILM,
+    CatalogVersions,
+    EntityCache,
+    HotReadCache,
+    query_key,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Loader:
+    """Загрузчик, который считает вызовы и отвечает, когда его отпустят."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.error = None
+
+    async def __call__(self, db):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.calls
+
+
+def make_cache(clock):
+    versions = CatalogVersions()
+    cache = HotReadCache(
+        versions,
+        "catalog",
+        ttl=10,
+        max_stale=100,
+        sessions=lambda: nullcontext(None),
+        clock=clock,
+    )
+    return versions, cache
+
+
+def test_query_key_ignores_parameter_order():
+    assert query_key("genre_page", genre="Драма", page=2) == query_key(
+        "genre_page", page=2, genre="Драма"
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_are_coalesced():
+    _, cache = make_cache(Clock())
+    loader = Loader()
+    pending = [asyncio.create_task(cache.load("index", loader)) for _ in range(20)]
+    await asyncio.sleep(0)
+    loader.release.set()
+    assert await asyncio.gather(*pending) == [1] * 20
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate():
+    clock = Clock()
+    _, cache = make_cache(clock)
+    loader = Loader()
+    loader.release.set()
+    assert await cache.load("index", loader) == 1
+
+    # устаревшее значение отдаётся сразу, обновление идёт в фоне
+    clock.now = 20
+    assert await cache.load("index", loader) == 1
+    await asyncio.sleep(0)
+    assert await cache.load("index", loader) == 2
+
+
+@pytest.mark.asyncio
+async def test_catalog_change_waits_for_fresh_value():
+    versions, cache = make_cache(Clock())
+    loader = Loader()
+    loader.release.set()
+    await cache.load("index", loader)
+    versions.bump("catalog")
+    assert await cache.load("index", loader) == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_value_served_while_database_unavailable():
+    versions, cache = make_cache(Clock())
+    loader = Loader()
+    loader.release.set()
+    await cache.load("index", loader)
+
+    versions.bump("catalog")
+    loader.error = exc.OperationalError("SELECT 1", {}, ConnectionRefusedError())
+    assert await cache.load("index", loader) == 1
+
+    # без сохранённого значения ошибка не скрывается
+    with pytest.raises(exc.OperationalError):
+        await cache.load("genres", loader)
+
+
+def test_entity_cache_evicts_least_recently_used():
+    cache = EntityCache(CatalogVersions(), FILM, max_entries=2)
+    cache.put("first", 1)
+    cache.put("second", 2)
+    cache.get(1)
+    cache.put("third", 3)
+    assert len(cache) == 2
+    assert cache.get(2) is None
+    assert cache.get(1) == "first"
+
+
+def test_forgotten_entity_versions_do_not_revive_stale_entries():
+    versions = CatalogVersions(max_entities=4)
+    cache = EntityCache(versions, FILM)
+    cache.put("old", 1)
+    versions.invalidate(FILM, 1)
+    for film_id in range(2, 6):
+        versions.invalidate(FILM, film_id)
+
+    # изменение фильма 1 забыто, но его старая запись не стала действительной
+    assert len(versions._entities) == 2
+    assert cache.get(1) is None
+    cache.put("new", 1)
+    assert cache.get(1) == "new"
+    versions.invalidate(FILM, 1)
+    assert cache.get(1) is None
@@ -0,0 +1,77 @@
+from io import BytesIO
+
+from PIL import Image
+
+from movielibrary.images import (
+    PosterCache,
+    poster_srcset,
+    render_variant,
+    variant_key,
+)
+
+
+def make_jpeg(width: int, height: int) -> bytes:
+    output = BytesIO()
+    Image.new("RGB", (width, height), "red").save(output, format="JPEG")
+    return output.getvalue()
+
+
+def test_render_variant_keeps_aspect_ratio():
+    data = render_variant(make_jpeg(1000, 1500), 300, "webp")
+    with Image.open(BytesIO(data)) as image:
+        assert image.format == "WEBP"
+        assert image.size == (300, 450)
+
+
+def test_render_variant_does_not_upscale():
+    data = render_variant(make_jpeg(200, 300), 600, "webp")
+    with Image.open(BytesIO(data)) as image:
+        assert image.size == (200, 300)
+
+
+def test_variant_key_depends_on_format():
+    assert variant_key("a.webp", "card", "webp") != variant_key(
+        "a.webp", "card", "avif"
+    )
+
+
+def test_poster_srcset():
+    assert poster_srcset("Фильм 1.webp", "card") == (
+        "/posters/card/%D0%A4%D0%B8%D0%BB%D1%8C%D0%BC%201.webp 1x, "
+        "/posters/card@2x/%D0%A4%D0%B8%D0%BB%D1%8C%D0%BC%201.webp 2x"
+    )
+
+
+def test_poster_cache_evicts_least_recently_used(tmp_path):
+    """Вытесняется вариант, к которому дольше всего не обращались"""
+    cache = PosterCache(tmp_path, max_bytes=25)
+    cache.put("aa1", "webp", b"x" * 10)
+    cache.put("bb2", "webp", b"x" * 10)
+    assert cache.get("aa1", "webp") is not None
+
+    cache.put("cc3", "webp", b"x" * 10)
+
+    assert cache.get("bb2", "webp") is None
+    assert cache.get("aa1", "webp") is not None
+    assert cache.total_bytes == 20
+
+
+def test_poster_cache_restores_index_from_disk(tmp_path):
+    PosterCache(tmp_path, max_bytes=100).put("aa1", "webp", b"x" * 10)
+    cache = PosterCache(tmp_path, max_bytes=100)
+    assert cache.get("aa1", "webp") == tmp_path / "aa" / "aa1.webp"
+
+
+def test_poster_cache_is_shared_between_workers(tmp_path):
+    """Воркеры видят файлы друг друга, и лимит считается по всему каталогу"""
+    first = PosterCache(tmp_path, max_bytes=25)
+    second = PosterCache(tmp_path, max_bytes=25)
+    first.put("aa1", "webp", b"x" * 10)
+    second.put("bb2", "webp", b"x" * 10)
+    assert second.get("aa1", "webp") is not None
+
+    first.put("cc3", "webp", b"x" * 10)
+
+    assert second.get("bb2", "webp") is None
+    assert first.get("aa1", "webp") is not None
+    assert first.total_bytes == 20
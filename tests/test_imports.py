@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["movielibrary.main", "movielibrary.outbox", "movielibrary.cache", "settings"],
+)
+def test_import_does_not_need_settings(module):
+    """Импорт не читает .env и не создаёт движок: воркерам и тестам он дешёв."""
+    env = {"PATH": os.environ.get("PATH", "")}
+    completed = subprocess.run(
+        [sys.executable, "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert completed.returncode == 0, completed.stderr
@@ -0,0 +1,274 @@
+import socket
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from aiosmtpd.controller import Controller
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from movielibrary import outbox, send_email
+from movielibrary.models import OutboxEvent
+from movielibrary.send_email import SMTPPool
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(OutboxEvent.__table__.create)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    registry = {}
+    monkeypatch.setattr(outbox, "HANDLERS", registry)
+    return registry
+
+
+@pytest.fixture
+def digests(monkeypatch):
+    received = []
+
+    async def handle(payloads):
+        received.append([payload["n"] for payload in payloads])
+
+    monkeypatch.setattr(outbox, "BATCH_HANDLERS", {"digest_event": handle})
+    return received
+
+
+async def add_events(session_factory, *payloads, event_type="test_event", age=0):
+    created_at = datetime.now(timezone.utc) - timedelta(seconds=age)
+    async with session_factory() as db:
+        for payload in payloads:
+            event = outbox.add_event(db, event_type, payload)
+            event.created_at = event.available_at = created_at
+        await db.commit()
+
+
+async def run_digest(session_factory, max_size=10):
+    return await run_digest_of(session_factory, "digest_event", max_size)
+
+
+async def run_digest_of(session_factory, event_type, max_size=10):
+    return await outbox.process_digest(
+        session_factory,
+        event_type,
+        window=timedelta(minutes=15),
+        max_size=max_size,
+        max_attempts=3,
+    )
+
+
+async def all_events(session_factory):
+    async with session_factory() as db:
+        result = await db.execute(select(OutboxEvent).order_by(OutboxEvent.id))
+        return result.scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_process_batch_marks_events_processed(session_factory, handlers):
+    received = []
+
+    async def handle(payload):
+        received.append(payload["n"])
+
+    handlers["test_event"] = handle
+    await add_events(session_factory, {"n": 1}, {"n": 2}, {"n": 3})
+
+    processed = await outbox.process_batch(session_factory, 2, max_attempts=3)
+
+    assert processed == 2
+    assert received == [1, 2]
+    events = await all_events(session_factory)
+    assert [event.processed_at is not None for event in events] == [True, True, False]
+
+
+@pytest.mark.asyncio
+async def test_events_are_claimed_before_handler_runs(session_factory, handlers):
+    """
+    Обработчик работает после commit захвата: строки уже не заблокированы,
+    но другой воркер их не берёт, пока не истекла аренда.
+    """
+    concurrent = []
+
+    async def handle(payload):
+        concurrent.append(
+            await outbox.process_batch(session_factory, 10, max_attempts=3)
+        )
+
+    handlers["test_event"] = handle
+    await add_events(session_factory, {"n": 1})
+
+    assert await outbox.process_batch(session_factory, 10, max_attempts=3) == 1
+    assert concurrent == [0]
+    [event] = await all_events(session_factory)
+    assert event.processed_at is not None
+    assert event.processed_at.tzinfo is timezone.utc
+
+
+@pytest.mark.asyncio
+async def test_expired_claim_is_taken_again(session_factory, handlers):
+    """Если воркер упал после захвата, событие вернётся по истечении аренды."""
+    received = []
+
+    async def handle(payload):
+        received.append(payload["n"])
+
+    handlers["test_event"] = handle
+    await add_events(session_factory, {"n": 1})
+    async with session_factory() as db, db.begin():
+        events = (await db.execute(outbox.pending_events())).scalars().all()
+        outbox.claim(events, timedelta(seconds=-1))
+
+    assert await outbox.process_batch(session_factory, 10, max_attempts=3) == 1
+    assert received == [1]
+
+
+@pytest.mark.asyncio
+async def test_failed_event_is_rescheduled(session_factory, handlers):
+    async def handle(payload):
+        raise ConnectionError("smtp down")
+
+    handlers["test_event"] = handle
+    await add_events(session_factory, {"n": 1})
+
+    await outbox.process_batch(session_factory, 10, max_attempts=3)
+
+    [event] = await all_events(session_factory)
+    assert event.attempts == 1
+    assert "smtp down" in event.last_error
+    assert event.processed_at is None
+    assert event.available_at > event.created_at
+    # событие отложено и не захватывается повторно до available_at
+    assert await outbox.process_batch(session_factory, 10, max_attempts=3) == 0
+
+
+@pytest.mark.asyncio
+async def test_event_fails_permanently_after_max_attempts(session_factory, handlers):
+    await add_events(session_factory, {"n": 1})
+
+    await outbox.process_batch(session_factory, 10, max_attempts=1)
+
+    [event] = await all_events(session_factory)
+    assert event.failed_at is not None
+    assert "Нет обработчика" in event.last_error
+
+
+@pytest.mark.asyncio
+async def test_digest_sends_first_film_immediately(session_factory, digests):
+    await add_events(session_factory, {"n": 1}, event_type="digest_event")
+
+    assert await run_digest(session_factory) == 1
+    assert digests == [[1]]
+
+
+@pytest.mark.asyncio
+async def test_digest_buffers_burst_until_window_ends(session_factory, digests):
+    await add_events(session_factory, {"n": 1}, event_type="digest_event")
+    await run_digest(session_factory)
+
+    await add_events(session_factory, {"n": 2}, {"n": 3}, event_type="digest_event")
+    assert await run_digest(session_factory) == 0
+
+    await add_events(session_factory, {"n": 4}, event_type="digest_event", age=3600)
+    assert await run_digest(session_factory) == 3
+    assert digests == [[1], [2, 3, 4]]
+
+
+@pytest.mark.asyncio
+async def test_digest_flushes_when_size_reached(session_factory, digests):
+    await add_events(session_factory, {"n": 1}, event_type="digest_event")
+    await run_digest(session_factory)
+
+    await add_events(
+        session_factory, {"n": 2}, {"n": 3}, {"n": 4}, event_type="digest_event"
+    )
+    assert await run_digest(session_factory, max_size=2) == 2
+    assert digests == [[1], [2, 3]]
+
+
+@pytest.mark.asyncio
+async def test_regular_batch_skips_digest_events(session_factory, handlers, digests):
+    await add_events(session_factory, {"n": 1}, event_type="digest_event")
+    assert await outbox.process_batch(session_factory, 10, max_attempts=3) == 0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RejectingHandler:
+    """SMTP-сервер, который отвергает письма адресатам из rejected."""
+
+    def __init__(self, *rejected):
+        self.rejected = set(rejected)
+        self.delivered = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.rejected:
+            return "550 Mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.delivered.extend(envelope.rcpt_tos)
+        return "250 OK"
+
+
+@pytest_asyncio.fixture
+async def smtp_server(monkeypatch):
+    handler = RejectingHandler("second@example.com")
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    pool = SMTPPool(
+        hostname="127.0.0.1",
+        port=controller.port,
+        sender="sender@example.com",
+        use_tls=False,
+        retry_delay=0.01,
+    )
+    monkeypatch.setattr(send_email, "_mailer", pool)
+    monkeypatch.setattr(
+        send_email,
+        "receiver_emails",
+        lambda: ["first@example.com", "second@example.com"],
+    )
+    yield handler
+    await pool.close()
+    controller.stop()
+
+
+@pytest.mark.asyncio
+async def test_digest_retries_only_rejected_recipient(session_factory, smtp_server):
+    """
+    Письмо ушло первому получателю, второй отверг его: дайджест
+    обработан, а второму ставится отдельное событие с повторами.
+    """
+    await add_events(session_factory, {"title": "Сталкер"}, event_type="film_created")
+    assert await run_digest_of(session_factory, "film_created") == 1
+    assert smtp_server.delivered == ["first@example.com"]
+
+    digest, retry = await all_events(session_factory)
+    assert digest.processed_at is not None
+    assert retry.event_type == "film_email"
+    assert retry.payload == {"titles": ["Сталкер"], "recipient": "second@example.com"}
+
+    await outbox.process_batch(session_factory, 10, max_attempts=3)
+    [_, retry] = await all_events(session_factory)
+    assert retry.attempts == 1
+    assert retry.processed_at is None
+
+    smtp_server.rejected.clear()
+    async with session_factory() as db:
+        event = await db.get(OutboxEvent, retry.id)
+        event.available_at = datetime.now(timezone.utc)
+        await db.commit()
+    await outbox.process_batch(session_factory, 10, max_attempts=3)
+    [_, retry] = await all_events(session_factory)
+    assert retry.processed_at is not None
+    assert smtp_server.delivered == ["first@example.com", "second@example.com"]
@@ -0,0 +1,177 @@
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from movielibrary.overload import (
+    AUTH,
+    CACHED,
+    LISTING,
+    SEARCH,
+    AdaptiveLimit,
+    LoadSheddingMiddleware,
+    RouteLimits,
+    TokenBucket,
+    route_class,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_route_class():
+    assert route_class("GET", "/api/films/17") == CACHED
+    assert route_class("GET", "/film/17") == CACHED
+    assert route_class("GET", "/genres/Драма") == LISTING
+    assert route_class("GET", "/") == LISTING
+    assert route_class("GET", "/api/films") == LISTING
+    assert route_class("GET", "/api/filters/years/1979") == LISTING
+    assert route_class("GET", "/api/films/search") == SEARCH
+    assert route_class("POST", "/login") == AUTH
+    # маршруты без запросов к базе не делят слоты со списками
+    assert route_class("GET", "/login") is None
+    assert route_class("GET", "/api/films/events") is None
+    assert route_class("GET", "/static/style.css") is None
+    assert route_class("GET", "/posters/card/1.jpg") is None
+    assert route_class("GET", "/api/admin/profiles") is None
+    assert route_class("GET", "/docs") is None
+
+
+def test_adaptive_limit_backs_off_and_recovers():
+    clock = Clock()
+    limit = AdaptiveLimit(target_latency=0.1, max_limit=10, clock=clock)
+    for _ in range(10):
+        assert limit.try_acquire()
+    assert not limit.try_acquire()
+
+    # медленные ответы одной волны уменьшают лимит только один раз
+    for _ in range(10):
+        limit.release(0.5)
+    assert limit.limit == pytest.approx(9)
+
+    clock.now = 1.0
+    limit.try_acquire()
+    limit.release(0.5)
+    assert limit.limit == pytest.approx(8.1)
+
+    for _ in range(100):
+        limit.try_acquire()
+        limit.release(0.01)
+    assert limit.limit == 10
+
+
+def test_token_bucket():
+    clock = Clock()
+    bucket = TokenBucket(rate=1, burst=2, clock=clock)
+    assert bucket.take("1.1.1.1") == 0
+    assert bucket.take("1.1.1.1") == 0
+    assert bucket.take("1.1.1.1") == pytest.approx(1)
+    # у другого клиента своё ведро
+    assert bucket.take("2.2.2.2") == 0
+    clock.now = 1.0
+    assert bucket.take("1.1.1.1") == 0
+
+
+# Адрес обратного прокси в сети docker compose (FORWARDED_ALLOW_IPS)
+PROXY = "172.28.0.1"
+
+
+def make_client(limits, client=("127.0.0.1", 123)):
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    async def slow_body(request):
+        async def chunks():
+            yield b"first"
+            # клиент медленно читает тело после заголовков
+            await asyncio.sleep(0.3)
+            yield b"last"
+
+        return StreamingResponse(chunks())
+
+    app = Starlette(
+        routes=[
+            Route("/search", ok),
+            Route("/genres/{name}", ok),
+            Route("/years/{year}", slow_body),
+        ]
+    )
+    # как uvicorn --forwarded-allow-ips: X-Forwarded-For учитывается
+    # только от доверенного прокси
+    app = ProxyHeadersMiddleware(
+        LoadSheddingMiddleware(app, limits), trusted_hosts=PROXY
+    )
+    transport = httpx.ASGITransport(app=app, client=client)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_and_shedding():
+    listing = AdaptiveLimit(target_latency=1, max_limit=1)
+    limits = RouteLimits(
+        concurrency={LISTING: listing, SEARCH: AdaptiveLimit(1, 5)},
+        rates={SEARCH: TokenBucket(rate=0.5, burst=1)},
+    )
+    async with make_client(limits) as client:
+        assert (await client.get("/search")).status_code == 200
+        response = await client.get("/search")
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "2"
+
+        assert (await client.get("/genres/Драма")).status_code == 200
+        # слот занят запросом, который ещё выполняется
+        listing.try_acquire()
+        response = await client.get("/genres/Драма")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_clients_behind_proxy_have_own_buckets():
+    """За доверенным прокси у каждого клиента своё ведро, а не одно на всех."""
+    limits = RouteLimits(
+        concurrency={SEARCH: AdaptiveLimit(1, 5)},
+        rates={SEARCH: TokenBucket(rate=0.5, burst=1)},
+    )
+    async with make_client(limits, client=(PROXY, 4000)) as client:
+        first = {"X-Forwarded-For": "203.0.113.1"}
+        second = {"X-Forwarded-For": "203.0.113.2"}
+        assert (await client.get("/search", headers=first)).status_code == 200
+        assert (await client.get("/search", headers=second)).status_code == 200
+        assert (await client.get("/search", headers=first)).status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_forwarded_for_from_untrusted_peer_is_ignored():
+    limits = RouteLimits(
+        concurrency={SEARCH: AdaptiveLimit(1, 5)},
+        rates={SEARCH: TokenBucket(rate=0.5, burst=1)},
+    )
+    async with make_client(limits, client=("198.51.100.7", 4000)) as client:
+        headers = {"X-Forwarded-For": "203.0.113.1"}
+        assert (await client.get("/search", headers=headers)).status_code == 200
+        # подменённый заголовок не даёт клиенту новое ведро
+        headers = {"X-Forwarded-For": "203.0.113.2"}
+        assert (await client.get("/search", headers=headers)).status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_latency_is_measured_until_response_start():
+    """Медленная отдача тела не считается медленным ответом."""
+    listing = AdaptiveLimit(target_latency=0.1, max_limit=4)
+    listing.limit = 2.0
+    limits = RouteLimits(concurrency={LISTING: listing}, rates={})
+    async with make_client(limits) as client:
+        response = await client.get("/years/1979")
+    assert response.content == b"firstlast"
+    assert listing.inflight == 0
+    assert listing.limit == pytest.approx(2.5)
@@ -0,0 +1,33 @@
+import pytest
+from fastapi import HTTPException
+
+from movielibrary.pagination import (
+    decode_cursor,
+    decode_rating_cursor,
+    encode_cursor,
+    encode_rating_cursor,
+)
+
+
+def test_cursor_roundtrip():
+    for film_id in (1, 254, 10**9):
+        assert decode_cursor(encode_cursor(film_id)) == film_id
+
+
+def test_cursor_is_short():
+    """Курсор должен помещаться в callback_data Telegram вместе с жанром"""
+    assert len(encode_cursor(10**9)) <= 16
+
+
+def test_invalid_cursor():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("не курсор")
+    assert exc_info.value.status_code == 400
+
+
+def test_rating_cursor_roundtrip():
+    for rating, film_id in ((8.1, 4), (0.0, 1), (7.333333333333333, 10**9)):
+        cursor = encode_rating_cursor(rating, film_id)
+        assert decode_rating_cursor(cursor) == (rating, film_id)
+    with pytest.raises(HTTPException):
+        decode_rating_cursor(encode_cursor(5))
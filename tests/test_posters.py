@@ -0,0 +1,112 @@
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+
+import httpx
+import pytest
+import pytest_asyncio
+from PIL import Image
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from movielibrary.database import get_db
+from movielibrary.main import create_app
+from movielibrary.models import Film
+from movielibrary.models.base import Base
+from movielibrary.routers import posters
+from settings import get_settings
+
+
+def make_jpeg() -> bytes:
+    output = BytesIO()
+    Image.new("RGB", (100, 150), "red").save(output, format="JPEG")
+    return output.getvalue()
+
+
+@pytest.fixture
+def source_server(tmp_path):
+    """Локальный источник исходников постеров: каталог и его URL."""
+    directory = tmp_path / "source"
+    directory.mkdir()
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=str(directory))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield directory, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def source(source_server):
+    return source_server[0]
+
+
+@pytest.fixture
+def settings(tmp_path, source_server):
+    """Настройки приложения: свой источник, кэш во временном каталоге, лимит 1 МБ."""
+    return get_settings().model_copy(
+        update={
+            "poster_source_url": source_server[1],
+            "poster_source_max_mb": 1,
+            "poster_cache_dir": str(tmp_path / "cache"),
+            "poster_cache_max_mb": 1,
+        }
+    )
+
+
+@pytest_asyncio.fixture
+async def client(settings):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        db.add(Film(id=1, title="Сталкер", year=1979, rating=8.1, photo="big.jpg"))
+        db.add(Film(id=2, title="Солярис", year=1972, rating=8.0, photo="small.jpg"))
+        await db.commit()
+
+    async def override_db():
+        async with factory() as db:
+            yield db
+
+    app = create_app(settings)
+    app.dependency_overrides[get_db] = override_db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+    app.state.posters.shutdown()
+    await engine.dispose()
+
+
+def test_fetch_original_rejects_oversized_source(settings, source):
+    (source / "small.jpg").write_bytes(b"x" * 1024)
+    (source / "big.jpg").write_bytes(b"x" * (posters.MEGABYTE + 1))
+    service = posters.Posters(settings)
+    assert service.fetch_original("small.jpg") == b"x" * 1024
+    with pytest.raises(posters.SourceTooLarge):
+        service.fetch_original("big.jpg")
+
+
+@pytest.mark.asyncio
+async def test_poster_is_cached_where_app_settings_say(client, settings, source):
+    (source / "small.jpg").write_bytes(make_jpeg())
+    response = await client.get("/posters/card/small.jpg", headers={"accept": ""})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert len(list(Path(settings.poster_cache_dir).glob("*/*.webp"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_photo_is_not_fetched(client, source):
+    """Имя не из каталога — 404 без скачивания, даже если файл есть у источника."""
+    (source / "other.jpg").write_bytes(make_jpeg())
+    response = await client.get("/posters/card/other.jpg")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_oversized_catalog_poster_is_rejected(client, source):
+    (source / "big.jpg").write_bytes(b"x" * (posters.MEGABYTE + 1))
+    response = await client.get("/posters/card/big.jpg")
+    assert response.status_code == 502
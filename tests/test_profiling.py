@@ -0,0 +1,91 @@
+import time
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from movielibrary.auth_utils import create_access_token
+from movielibrary.profiling import (
+    MemorySnapshots,
+    ProfilerMiddleware,
+    ProfileStore,
+    wants_profile,
+)
+from settings import get_settings
+
+
+def busy_handler(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def make_client(store):
+    async def films(request):
+        busy_handler(0.1)
+        return PlainTextResponse("ok")
+
+    app = ProfilerMiddleware(
+        Starlette(routes=[Route("/api/films", films)]), store, get_settings()
+    )
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+@pytest.mark.asyncio
+async def test_admin_request_is_profiled():
+    store = ProfileStore()
+    async with make_client(store) as client:
+        client.cookies.set(
+            "access_token", create_access_token("admin@example.com", get_settings())
+        )
+        response = await client.get("/api/films", params={"_profile": 1})
+
+    profile = store.get(int(response.headers["x-profile-id"]))
+    assert profile.path == "/api/films"
+    assert "busy_handler" in profile.folded()
+
+
+@pytest.mark.asyncio
+async def test_profile_flag_ignored_for_other_users():
+    store = ProfileStore()
+    async with make_client(store) as client:
+        client.cookies.set(
+            "access_token", create_access_token("user@example.com", get_settings())
+        )
+        response = await client.get("/api/films", headers={"X-Profile": "1"})
+    assert "x-profile-id" not in response.headers
+    assert list(store) == []
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        (b"_profile=1", True),
+        (b"page=2&_profile=1", True),
+        (b"_profile=0", False),
+        (b"foo_profile=1", False),
+        (b"q=_profile=1", False),
+        (b"", False),
+    ],
+)
+def test_profile_query_parameter_must_be_exact(query, expected):
+    scope = {"type": "http", "query_string": query, "headers": []}
+    assert wants_profile(scope) is expected
+
+
+def test_memory_diff_shows_growth():
+    snapshots = MemorySnapshots()
+    snapshots.start(frames=5)
+    try:
+        base = snapshots.take()
+        growing = [bytearray(1024) for _ in range(1000)]
+        target = snapshots.take()
+        top = snapshots.diff(base, target, "lineno", limit=1)[0]
+    finally:
+        snapshots.stop()
+    assert "test_profiling.py" in top["trace"][0]
+    assert top["size_diff"] >= 1024 * len(growing)
@@ -0,0 +1,46 @@
+import pytest
+from fastapi import HTTPException
+
+from movielibrary.models import Country, Film, FilmCountry, FilmGenre, Genre
+from movielibrary.projections import (
+    FILM_FIELDS,
+    dump_films,
+    film_query,
+    parse_fields,
+    projection_model,
+)
+from movielibrary.schemas.film import FilmRead
+
+
+def test_parse_fields():
+    assert parse_fields("slim") == ("id", "title")
+    assert parse_fields("full") == FILM_FIELDS
+    # id добавляется всегда, порядок — как в FilmRead
+    assert parse_fields("rating, title") == ("id", "title", "rating")
+    with pytest.raises(HTTPException) as exc_info:
+        parse_fields("title,password")
+    assert exc_info.value.status_code == 400
+
+
+def test_query_selects_only_requested_columns():
+    sql = str(film_query(("id", "title")))
+    assert "films.description" not in sql
+    assert "films.photo" not in sql
+    # жанры и страны догружаются, только если запрошены
+    assert len(film_query(("id", "title"))._with_options) == 1
+    assert len(film_query(("id", "genres"))._with_options) == 2
+
+
+def test_projection_model():
+    assert projection_model(FILM_FIELDS) is FilmRead
+    model = projection_model(("id", "title"))
+    assert set(model.model_fields) == {"id", "title"}
+    assert projection_model(("id", "title")) is model
+
+
+def test_dump_keeps_api_aliases():
+    film = Film(id=1, title="Сталкер", year=1979, rating=8.1, photo="1.webp")
+    film.genres = [FilmGenre(genre=Genre(id=1, name="Драма"))]
+    film.countries = [FilmCountry(country=Country(id=1, name="СССР"))]
+    [data] = dump_films([film], ("id", "genres"))
+    assert data == {"id": 1, "genre_list": [{"name": "Драма", "id": 1}]}
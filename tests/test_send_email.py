@@ -0,0 +1,116 @@
+import asyncio
+import socket
+from email.mime.text import MIMEText
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from movielibrary.send_email import SMTPPool
+
+
+class RecordingHandler:
+    def __init__(self, fail_first: int = 0):
+        self.fail_first = fail_first
+        self.delay = 0.0
+        self.envelopes = []
+        # адреса клиентов: по одному на SMTP-соединение
+        self.peers = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.peers.add(session.peer)
+        await asyncio.sleep(self.delay)
+        if self.fail_first:
+            self.fail_first -= 1
+            return "451 Temporary failure"
+        self.envelopes.append(envelope)
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield handler, controller.port
+    controller.stop()
+
+
+def make_pool(port: int, **kwargs) -> SMTPPool:
+    return SMTPPool(
+        hostname="127.0.0.1",
+        port=port,
+        sender="sender@example.com",
+        use_tls=False,
+        retry_delay=0.01,
+        **kwargs,
+    )
+
+
+def make_messages(count: int):
+    messages = []
+    for i in range(count):
+        msg = MIMEText(f"Письмо {i}", "plain")
+        msg["Subject"] = "Тест"
+        messages.append((msg, [f"user{i}@example.com"]))
+    return messages
+
+
+@pytest.mark.asyncio
+async def test_send_many_reuses_pooled_connections(smtp_server):
+    handler, port = smtp_server
+    pool = make_pool(port, size=2)
+    try:
+        report = await pool.send_many(make_messages(6))
+    finally:
+        await pool.close()
+
+    assert report.sent == 6
+    assert report.failed == []
+    assert len(handler.envelopes) == 6
+    assert len({envelope.rcpt_tos[0] for envelope in handler.envelopes}) == 6
+    # шесть писем ушли не больше чем по двум соединениям пула
+    assert 1 <= len(handler.peers) <= 2
+
+
+@pytest.mark.asyncio
+async def test_temporary_failure_is_retried(smtp_server):
+    handler, port = smtp_server
+    handler.fail_first = 1
+    pool = make_pool(port, size=1)
+    try:
+        report = await pool.send_many(make_messages(1))
+    finally:
+        await pool.close()
+
+    assert report.sent == 1
+    assert len(handler.envelopes) == 1
+
+
+@pytest.mark.asyncio
+async def test_unreachable_server_is_reported():
+    pool = make_pool(free_port(), size=1, max_retries=1)
+    report = await pool.send_many(make_messages(2))
+    assert report.sent == 0
+    assert report.failed == ["user0@example.com", "user1@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_send_frees_pool_slot(smtp_server):
+    handler, port = smtp_server
+    handler.delay = 1.0
+    pool = make_pool(port, size=1)
+    ((message, recipients),) = make_messages(1)
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.send(message, recipients), timeout=0.2)
+        handler.delay = 0.0
+        # единственный слот пула снова свободен
+        await asyncio.wait_for(pool.send(message, recipients), timeout=5)
+    finally:
+        await pool.close()
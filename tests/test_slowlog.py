@@ -0,0 +1,60 @@
+from datetime import timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from movielibrary.slowlog import (
+    SlowQueryLog,
+    current_request,
+    instrument_engine,
+    normalize,
+    redact,
+)
+
+
+def test_normalize_groups_statements_by_shape():
+    first = normalize("SELECT films.id\n  FROM films WHERE films.id IN ($1, $2, $3)")
+    second = normalize("SELECT films.id FROM films WHERE films.id IN ($1)")
+    assert first == "SELECT films.id FROM films WHERE films.id IN (...)"
+    assert normalize("SELECT * FROM films WHERE title = 'Дюна' LIMIT 5") == (
+        "SELECT * FROM films WHERE title = ? LIMIT ?"
+    )
+    assert second == "SELECT films.id FROM films WHERE films.id IN (?)"
+
+
+def test_redact_hides_strings():
+    assert redact(("user@example.com", 42, None, [1] * 12)) == [
+        "<str 16>",
+        42,
+        None,
+        [1] * 10 + ["<2 more>"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_slow_statement_recorded_with_route():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    log = SlowQueryLog(threshold_ms=0, maxlen=10)
+    instrument_engine(engine, log)
+
+    token = current_request.set({"method": "GET", "path": "/genres/Драма"})
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT :name"), {"name": "secret"})
+    finally:
+        current_request.reset(token)
+
+    (query,) = log.queries
+    assert query.route == "GET /genres/Драма"
+    assert query.parameters == ["<str 6>"]
+    assert query.shape == "SELECT ?"
+    assert query.at.tzinfo is timezone.utc
+    assert log.to_dict(limit=5)["shapes"][0]["count"] == 1
+    await engine.dispose()
+
+
+def test_fast_statements_are_ignored():
+    log = SlowQueryLog(threshold_ms=100, maxlen=10)
+    assert log.record("SELECT 1", (), 5, "postgresql") is None
+    assert not log.queries
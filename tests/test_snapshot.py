@@ -0,0 +1,92 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from movielibrary.facets import SORT_NEWEST, SORT_RATING, FilmFilter  # noqa: E402
+from movielibrary.models.enums import MediaType  # noqa: E402
+from movielibrary.snapshot import Snapshot, pack_bits  # noqa: E402
+
+GENRES = {"Драма": 10, "Комедия": 20, "Фантастика": 30}
+COUNTRIES = {"СССР": 1, "США": 2}
+
+# (id, version, year, rating, type, genre_ids, country_ids)
+ROWS = [
+    (4, 1, 1979, 8.1, "movie", [10, 30], [1]),
+    (1, 2, 1975, 7.9, "movie", [10], [1]),
+    (7, 1, 2008, 8.1, "series", [10], [2]),
+    (3, 1, 1993, 6.5, "movie", [20], [2]),
+    (9, 3, 1999, 8.1, "movie", [30], [2]),
+    (5, 1, 2014, 8.6, "movie", [10, 30], [2]),
+]
+
+
+def ids(keys):
+    return [key.id for key in keys]
+
+
+@pytest.fixture
+def snapshot():
+    return Snapshot.build(1, ROWS, GENRES, COUNTRIES)
+
+
+def test_pack_bits_spans_several_words():
+    positions = {i: i for i in range(70)}
+    bits = pack_bits([[0, 69], [], [64, 999]], positions)
+    assert bits.shape == (3, 2)
+    assert bits[0].tolist() == [1, 1 << 5]
+    assert bits[1].tolist() == [0, 0]
+    # id, которого нет в справочнике, пропускается
+    assert bits[2].tolist() == [0, 1]
+
+
+def test_filters(snapshot):
+    select = lambda flt: ids(snapshot.select(flt, SORT_NEWEST, None, None))  # noqa: E731
+    assert select(FilmFilter()) == [9, 7, 5, 4, 3, 1]
+    assert select(FilmFilter(year_from=1979, year_to=2008)) == [9, 7, 4, 3]
+    assert select(FilmFilter(rating_from=8.1, rating_to=8.1)) == [9, 7, 4]
+    # жанры — все сразу, а не любой из них
+    assert select(FilmFilter(genres=("Драма", "Фантастика"))) == [5, 4]
+    assert select(FilmFilter(genres=("Драма",), countries=("США",))) == [7, 5]
+    assert select(FilmFilter(type=MediaType.series)) == [7]
+    assert select(FilmFilter(genres=("Вестерн",))) == []
+
+
+def test_rating_top_keeps_ties_in_id_order(snapshot):
+    """
+    Первая страница по рейтингу: при равном рейтинге порядок по убыванию
+    id, как у курсора (rating, id) в SQL.
+    """
+    keys = snapshot.select(FilmFilter(), SORT_RATING, None, 2)
+    assert [(key.id, key.rating) for key in keys] == [(5, 8.6), (9, 8.1)]
+    assert keys[1].version == 3
+
+
+def test_rating_pages_match_full_sort(snapshot):
+    expected = ids(snapshot.select(FilmFilter(), SORT_RATING, None, None))
+    assert expected == [5, 9, 7, 4, 1, 3]
+    pages, cursor = [], None
+    while True:
+        page = snapshot.select(FilmFilter(), SORT_RATING, cursor, 2)
+        if not page:
+            break
+        pages.extend(ids(page))
+        cursor = (page[-1].rating, page[-1].id)
+    assert pages == expected
+
+
+def test_newest_with_cursor(snapshot):
+    keys = snapshot.select(FilmFilter(countries=("США",)), SORT_NEWEST, 7, 2)
+    assert ids(keys) == [5, 3]
+
+
+def test_empty_catalog():
+    snapshot = Snapshot.build(1, [], {}, {})
+    assert len(snapshot) == 0
+    assert snapshot.select(FilmFilter(), SORT_RATING, None, 20) == []
+
+
+def test_snapshot_matches_plain_python_on_synthetic_catalog():
+    """Бенчмарк сверяет страницы снимка с перебором строк в Python."""
+    from benchmarks.snapshot import run_snapshot
+
+    assert len(run_snapshot(films=2000, repeat=1)) == 4
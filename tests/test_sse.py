@@ -0,0 +1,95 @@
+import pytest
+
+from movielibrary.bus import CatalogChange
+from movielibrary.sse import (
+    SUBSCRIBER_QUEUE_SIZE,
+    EventBroker,
+    TooManySubscribers,
+    stream_events,
+    subscribe_events,
+)
+
+
+def film_created(film_id, version):
+    return CatalogChange("film", film_id, version, "created")
+
+
+async def take(stream, count):
+    return [await anext(stream) for _ in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_stream_resumes_after_last_event_id():
+    broker = EventBroker(history_size=10, max_subscribers=5)
+    for film_id, version in ((1, 100), (2, 101), (3, 102)):
+        broker.on_catalog_change(film_created(film_id, version))
+
+    stream = stream_events(broker.subscribe("100"), heartbeat=5)
+    chunks = await take(stream, 3)
+    assert chunks[0].startswith(b"retry:")
+    assert chunks[1] == b'id: 101\nevent: film_created\ndata: {"id": 2}\n\n'
+    assert chunks[2].startswith(b"id: 102\n")
+
+    broker.on_catalog_change(CatalogChange("film", None, 103, "deleted"))
+    assert (
+        await anext(stream) == b'id: 103\nevent: film_deleted\ndata: {"id": null}\n\n'
+    )
+    await stream.aclose()
+    assert len(broker) == 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_last_event_id_resets():
+    broker = EventBroker(history_size=2, max_subscribers=5)
+    for version in (100, 101, 102):
+        broker.on_catalog_change(film_created(version, version))
+
+    stream = stream_events(broker.subscribe("100"), heartbeat=5)
+    assert (await take(stream, 2))[1].startswith(b"event: reset")
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_heartbeat():
+    broker = EventBroker(history_size=2, max_subscribers=5)
+    stream = stream_events(broker.subscribe(), heartbeat=0.01)
+    assert (await take(stream, 2))[1] == b": ping\n\n"
+    await stream.aclose()
+
+
+def test_subscriber_limit():
+    broker = EventBroker(history_size=2, max_subscribers=1)
+    subscription = broker.subscribe()
+    with pytest.raises(TooManySubscribers):
+        broker.subscribe()
+    subscription.close()
+    broker.subscribe()
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_disconnected():
+    broker = EventBroker(history_size=2, max_subscribers=5)
+    stream = stream_events(broker.subscribe(), heartbeat=5)
+    await anext(stream)
+    for version in range(SUBSCRIBER_QUEUE_SIZE + 1):
+        broker.on_catalog_change(film_created(version, version))
+    assert len(broker) == 0
+
+    chunks = [chunk async for chunk in stream]
+    assert len(chunks) == SUBSCRIBER_QUEUE_SIZE - 1
+
+
+@pytest.mark.asyncio
+async def test_subscription_starts_with_the_stream():
+    """Тело ответа, которое так и не читали, не занимает место подписчика."""
+    broker = EventBroker(history_size=2, max_subscribers=1)
+    unread = subscribe_events(broker, None, heartbeat=5)
+    assert len(broker) == 0
+
+    stream = subscribe_events(broker, None, heartbeat=5)
+    await anext(stream)
+    assert len(broker) == 1
+    # лимит уже занят: второй поток только просит переподключиться
+    assert [chunk async for chunk in unread] == [b"retry: 3000\n\n"]
+    await stream.aclose()
+    assert len(broker) == 0
@@ -0,0 +1,54 @@
+import pytest
+
+from movielibrary import templating
+from movielibrary.templating import FIRST_FLUSH_BYTES, StreamingTemplates
+
+
+@pytest.fixture
+def templates(tmp_path):
+    (tmp_path / "base.html").write_text(
+        "<head>{{ title }}</head><main>{% block content %}{% endblock %}</main>"
+    )
+    (tmp_path / "list.html").write_text(
+        '{% extends "base.html" %}{% block content %}'
+        "{% for film in films %}<p>{{ shout(film) }}</p>{% endfor %}{% endblock %}"
+    )
+    templates = StreamingTemplates(str(tmp_path))
+    templates.env.globals.update(shout=str.upper)
+    return templates
+
+
+async def read_body(response):
+    return [chunk async for chunk in response.body_iterator]
+
+
+def expected(films, title="&lt;Фильмы&gt;"):
+    cards = "".join(f"<p>{film.upper()}</p>" for film in films)
+    return f"<head>{title}</head><main>{cards}</main>"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("threshold", [10_000, 0], ids=["async", "thread"])
+async def test_streamed_page_matches_full_render(templates, monkeypatch, threshold):
+    monkeypatch.setattr(templating, "THREAD_RENDER_THRESHOLD", threshold)
+    films = [f"фильм {i}" for i in range(2000)]
+    response = templates.TemplateResponse(
+        "list.html", {"title": "<Фильмы>", "films": films}
+    )
+    chunks = await read_body(response)
+
+    assert b"".join(chunks).decode() == expected(films)
+    assert response.media_type == "text/html"
+    # голова страницы уходит первой небольшой порцией
+    assert len(chunks) > 2
+    assert chunks[0].startswith(b"<head>")
+    assert len(chunks[0]) < 2 * FIRST_FLUSH_BYTES
+
+
+@pytest.mark.asyncio
+async def test_status_code(templates):
+    response = templates.TemplateResponse(
+        "list.html", {"title": "", "films": []}, status_code=404
+    )
+    assert response.status_code == 404
+    assert b"".join(await read_body(response)).decode() == expected([], title="")
@@ -0,0 +1,83 @@
+import io
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from movielibrary import tracing
+
+PARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+def exported(stream):
+    return [
+        span
+        for line in stream.getvalue().splitlines()
+        for resource in json.loads(line)["resourceSpans"]
+        for scope in resource["scopeSpans"]
+        for span in scope["spans"]
+    ]
+
+
+@pytest.fixture
+def client():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    tracing.instrument_engine(engine)
+
+    api = FastAPI()
+
+    @api.get("/api/films/{film_id}")
+    async def film(film_id: int):
+        with tracing.span("validate FilmRead"):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        return {"id": film_id}
+
+    stream = io.StringIO()
+    app = tracing.TracingMiddleware(
+        api,
+        tracing.Exporter(stream),
+        sample_ratio=1.0,
+    )
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test"), stream
+
+
+@pytest.mark.asyncio
+async def test_request_continues_incoming_trace(client):
+    http, stream = client
+    async with http:
+        await http.get("/api/films/7", headers={"traceparent": PARENT})
+
+    root, sql, validate = sorted(exported(stream), key=lambda s: s["name"])
+    assert {s["traceId"] for s in (validate, sql, root)} == {
+        "0af7651916cd43dd8448eb211c80319c"
+    }
+    assert root["name"] == "GET /api/films/{film_id}"
+    assert root["parentSpanId"] == "b7ad6b7169203331"
+    assert validate["parentSpanId"] == root["spanId"]
+    assert sql["parentSpanId"] == validate["spanId"]
+    assert {"key": "db.statement", "value": {"stringValue": "SELECT 1"}} in sql[
+        "attributes"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unsampled_parent_is_not_traced(client):
+    http, stream = client
+    async with http:
+        await http.get("/api/films/7", headers={"traceparent": PARENT[:-2] + "00"})
+    assert stream.getvalue() == ""
+
+
+def test_span_outside_request_is_noop():
+    with tracing.span("bcrypt verify") as span:
+        assert span is None
+
+
+def test_parse_traceparent_rejects_invalid():
+    assert tracing.parse_traceparent("00-" + "0" * 32 + "-b7ad6b7169203331-01") is None
+    assert tracing.parse_traceparent("garbage") is None